@@ -4,6 +4,7 @@ from alembic import context
 from sqlalchemy import engine_from_config, pool
 
 from app.config import settings
+from app.constants import URL_PARTITION_PREFIX
 from app.models import Base
 
 # this is the Alembic Config object, which provides
@@ -28,6 +29,12 @@ target_metadata = Base.metadata
 # ... etc.
 
 
+def include_name(name: str | None, type_: str, parent_names: dict[str, str | None]) -> bool:
+    # Monthly urls partitions are created and released at runtime (see app/partitions.py) and aren't in the
+    # metadata, so autogenerate would otherwise emit a drop_table for every one of them.
+    return not (type_ == "table" and name is not None and name.startswith(URL_PARTITION_PREFIX))
+
+
 def run_migrations_offline() -> None:
     """Run migrations in 'offline' mode.
 
@@ -44,6 +51,7 @@ def run_migrations_offline() -> None:
     context.configure(
         url=url,
         target_metadata=target_metadata,
+        include_name=include_name,
         literal_binds=True,
         dialect_opts={"paramstyle": "named"},
     )
@@ -66,7 +74,7 @@ def run_migrations_online() -> None:
     )
 
     with connectable.connect() as connection:
-        context.configure(connection=connection, target_metadata=target_metadata)
+        context.configure(connection=connection, target_metadata=target_metadata, include_name=include_name)
 
         with context.begin_transaction():
             context.run_migrations()
@@ -0,0 +1,34 @@
+"""Add per-link daily HyperLogLog visitor sketches
+
+Revision ID: 3f6c8d2a91b4
+Revises: e4b9a0c3d7f1
+Create Date: 2026-10-18 15:21:08.604113
+
+"""
+
+from collections.abc import Sequence
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "3f6c8d2a91b4"
+down_revision: str | None = "e4b9a0c3d7f1"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        "visitor_sketches",
+        sa.Column("short_url", sa.String(length=20), nullable=False),
+        sa.Column("bucket_start", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("registers", sa.LargeBinary(), nullable=False),
+        sa.PrimaryKeyConstraint("short_url", "bucket_start"),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table("visitor_sketches")
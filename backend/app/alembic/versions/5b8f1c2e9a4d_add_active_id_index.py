@@ -0,0 +1,37 @@
+"""Add partial index for keyset pagination of active urls
+
+Revision ID: 5b8f1c2e9a4d
+Revises: d42e09372543
+Create Date: 2026-10-18 10:12:41.118342
+
+"""
+
+from collections.abc import Sequence
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "5b8f1c2e9a4d"
+down_revision: str | None = "d42e09372543"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "ix_urls_active_id",
+            "urls",
+            ["id"],
+            unique=False,
+            postgresql_where=sa.text("is_active"),
+            postgresql_concurrently=True,
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.drop_index("ix_urls_active_id", table_name="urls", postgresql_concurrently=True)
@@ -0,0 +1,33 @@
+"""Record each claimed code's created_at in url_codes
+
+Revision ID: 6d0b3e8f1a57
+Revises: f3a91c5d7e28
+Create Date: 2026-10-18 14:32:47.905118
+
+"""
+
+from collections.abc import Sequence
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "6d0b3e8f1a57"
+down_revision: str | None = "f3a91c5d7e28"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Lookups by code match urls.created_at against this column, so the planner only reads the one partition.
+    op.add_column("url_codes", sa.Column("created_at", sa.DateTime(timezone=True), nullable=True))
+    op.execute("UPDATE url_codes SET created_at = urls.created_at FROM urls WHERE urls.short_url = url_codes.short_url")
+    # Codes kept reserved by detached partitions have no link left to match.
+    op.execute("UPDATE url_codes SET created_at = now() WHERE created_at IS NULL")
+    op.alter_column("url_codes", "created_at", nullable=False, server_default=sa.func.now())
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column("url_codes", "created_at")
@@ -0,0 +1,37 @@
+"""Add partial index on expires_at for the expiry sweeper
+
+Revision ID: 9e3a7d41c6b2
+Revises: 5b8f1c2e9a4d
+Create Date: 2026-10-18 11:04:19.562903
+
+"""
+
+from collections.abc import Sequence
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "9e3a7d41c6b2"
+down_revision: str | None = "5b8f1c2e9a4d"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "ix_urls_active_expires_at",
+            "urls",
+            ["expires_at"],
+            unique=False,
+            postgresql_where=sa.text("is_active"),
+            postgresql_concurrently=True,
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.drop_index("ix_urls_active_expires_at", table_name="urls", postgresql_concurrently=True)
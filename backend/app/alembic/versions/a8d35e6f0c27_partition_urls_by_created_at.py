@@ -0,0 +1,107 @@
+"""Partition urls by month of created_at and claim short codes in url_codes
+
+Revision ID: a8d35e6f0c27
+Revises: 3f6c8d2a91b4
+Create Date: 2026-10-18 16:48:30.271905
+
+Rewrites the urls table, so run it in a maintenance window on large databases. The
+partition maintenance job creates later months and releases fully expired ones.
+
+"""
+
+from collections.abc import Sequence
+from datetime import UTC, datetime
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "a8d35e6f0c27"
+down_revision: str | None = "3f6c8d2a91b4"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+MONTHS_AHEAD = 3
+URL_COLUMNS = "id, original_url, short_url, created_at, expires_at, is_active, click_count, is_custom_alias"
+
+
+def url_columns() -> list[sa.Column]:
+    return [
+        sa.Column("id", sa.Integer(), server_default=sa.text("nextval('urls_id_seq'::regclass)"), nullable=False),
+        sa.Column("original_url", sa.String(), nullable=False),
+        sa.Column("short_url", sa.String(length=20), nullable=False),
+        sa.Column("created_at", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("expires_at", sa.DateTime(timezone=True), nullable=True),
+        sa.Column("is_active", sa.Boolean(), nullable=False),
+        sa.Column("click_count", sa.Integer(), nullable=False),
+        sa.Column("is_custom_alias", sa.Boolean(), nullable=False),
+    ]
+
+
+def create_active_indexes() -> None:
+    op.create_index("ix_urls_active_id", "urls", ["id"], unique=False, postgresql_where=sa.text("is_active"))
+    op.create_index(
+        "ix_urls_active_expires_at", "urls", ["expires_at"], unique=False, postgresql_where=sa.text("is_active")
+    )
+
+
+def month_index(value: datetime) -> int:
+    value = value.astimezone(UTC)
+    return value.year * 12 + value.month - 1
+
+
+def month_start(index: int) -> datetime:
+    return datetime(index // 12, index % 12 + 1, 1, tzinfo=UTC)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.execute("ALTER TABLE urls RENAME TO urls_unpartitioned")
+    op.execute("ALTER INDEX urls_pkey RENAME TO urls_unpartitioned_pkey")
+    op.execute("ALTER INDEX ix_urls_active_id RENAME TO ix_urls_unpartitioned_active_id")
+    op.execute("ALTER INDEX ix_urls_active_expires_at RENAME TO ix_urls_unpartitioned_active_expires_at")
+
+    op.create_table(
+        "url_codes", sa.Column("short_url", sa.String(length=20), nullable=False), sa.PrimaryKeyConstraint("short_url")
+    )
+    op.execute("INSERT INTO url_codes (short_url) SELECT short_url FROM urls_unpartitioned")
+
+    op.create_table(
+        "urls",
+        *url_columns(),
+        sa.PrimaryKeyConstraint("id", "created_at"),
+        postgresql_partition_by="RANGE (created_at)",
+    )
+    op.execute("ALTER SEQUENCE urls_id_seq OWNED BY urls.id")
+    op.create_index("ix_urls_short_url", "urls", ["short_url"], unique=False)
+    create_active_indexes()
+
+    oldest = op.get_bind().scalar(sa.text("SELECT min(created_at) FROM urls_unpartitioned"))
+    now = datetime.now(UTC)
+    for index in range(month_index(oldest or now), month_index(now) + MONTHS_AHEAD + 1):
+        lower_bound, upper_bound = month_start(index), month_start(index + 1)
+        op.execute(
+            f"CREATE TABLE urls_p{lower_bound:%Y%m} PARTITION OF urls "
+            f"FOR VALUES FROM ('{lower_bound.isoformat()}') TO ('{upper_bound.isoformat()}')"
+        )
+
+    op.execute(f"INSERT INTO urls ({URL_COLUMNS}) SELECT {URL_COLUMNS} FROM urls_unpartitioned")
+    op.drop_table("urls_unpartitioned")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    # Partitions detached by the maintenance job are not part of urls anymore and are not copied back.
+    op.execute("ALTER TABLE urls RENAME TO urls_partitioned")
+    op.execute("ALTER INDEX urls_pkey RENAME TO urls_partitioned_pkey")
+    op.execute("ALTER INDEX ix_urls_short_url RENAME TO ix_urls_partitioned_short_url")
+    op.execute("ALTER INDEX ix_urls_active_id RENAME TO ix_urls_partitioned_active_id")
+    op.execute("ALTER INDEX ix_urls_active_expires_at RENAME TO ix_urls_partitioned_active_expires_at")
+
+    op.create_table("urls", *url_columns(), sa.PrimaryKeyConstraint("id"), sa.UniqueConstraint("short_url"))
+    op.execute("ALTER SEQUENCE urls_id_seq OWNED BY urls.id")
+    op.execute(f"INSERT INTO urls ({URL_COLUMNS}) SELECT {URL_COLUMNS} FROM urls_partitioned")
+    create_active_indexes()
+
+    op.drop_table("urls_partitioned")
+    op.drop_table("url_codes")
@@ -0,0 +1,80 @@
+"""Add dedup_key hash of the expiry option and original_url, backfilled in batches
+
+Revision ID: b6e2f49d0a13
+Revises: a8d35e6f0c27
+Create Date: 2026-10-18 19:42:37.218604
+
+"""
+
+from collections.abc import Sequence
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "b6e2f49d0a13"
+down_revision: str | None = "a8d35e6f0c27"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+BATCH_SIZE = 10_000
+
+# The expiry option isn't stored, so it is recovered from expires_at - created_at, which is the
+# option's duration to within the time between computing expires_at and inserting the row.
+EXPIRATION_OPTIONS = {
+    "1h": "1 hour",
+    "6h": "6 hours",
+    "24h": "1 day",
+    "7d": "7 days",
+    "30d": "30 days",
+    "365d": "365 days",
+}
+EXPIRATION_OPTION_SQL = (
+    "CASE WHEN expires_at IS NULL THEN 'never' "
+    + " ".join(
+        f"WHEN expires_at - created_at BETWEEN interval '{duration}' - interval '1 minute' "
+        f"AND interval '{duration}' + interval '1 minute' THEN '{option}'"
+        for option, duration in EXPIRATION_OPTIONS.items()
+    )
+    + " END"
+)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column("urls", sa.Column("dedup_key", sa.LargeBinary(length=32), nullable=True))
+
+    # Each batch commits on its own so the backfill never holds row locks on the whole table.
+    bind = op.get_bind()
+    with op.get_context().autocommit_block():
+        after_id = 0
+        while True:
+            last_id = bind.scalar(
+                sa.text(
+                    "SELECT max(id) FROM (SELECT id FROM urls WHERE id > :after_id ORDER BY id LIMIT :limit) AS batch"
+                ),
+                {"after_id": after_id, "limit": BATCH_SIZE},
+            )
+            if last_id is None:
+                break
+
+            # Rows whose option can't be recovered keep a NULL key and are never reused.
+            bind.execute(
+                sa.text(
+                    "UPDATE urls SET dedup_key = "
+                    f"sha256(convert_to(({EXPIRATION_OPTION_SQL}) || E'\\n' || original_url, 'UTF8')) "
+                    "WHERE id > :after_id AND id <= :last_id AND NOT is_custom_alias"
+                ),
+                {"after_id": after_id, "last_id": last_id},
+            )
+            after_id = last_id
+
+    op.create_index(
+        "ix_urls_active_dedup_key", "urls", ["dedup_key"], unique=False, postgresql_where=sa.text("is_active")
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("ix_urls_active_dedup_key", table_name="urls")
+    op.drop_column("urls", "dedup_key")
@@ -0,0 +1,28 @@
+"""Add sequence for sequential short url generation
+
+Revision ID: c71d2f8b5e03
+Revises: 9e3a7d41c6b2
+Create Date: 2026-10-18 12:21:07.734510
+
+"""
+
+from collections.abc import Sequence
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "c71d2f8b5e03"
+down_revision: str | None = "9e3a7d41c6b2"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.execute(sa.schema.CreateSequence(sa.Sequence("short_url_id_seq")))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute(sa.schema.DropSequence(sa.Sequence("short_url_id_seq")))
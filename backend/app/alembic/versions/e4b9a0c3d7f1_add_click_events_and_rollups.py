@@ -0,0 +1,61 @@
+"""Add click events and hourly/daily rollup tables
+
+Revision ID: e4b9a0c3d7f1
+Revises: c71d2f8b5e03
+Create Date: 2026-10-18 14:02:55.417208
+
+"""
+
+from collections.abc import Sequence
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "e4b9a0c3d7f1"
+down_revision: str | None = "c71d2f8b5e03"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        "click_events",
+        sa.Column("id", sa.BigInteger(), sa.Identity(), nullable=False),
+        sa.Column("short_url", sa.String(length=20), nullable=False),
+        sa.Column("occurred_at", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("referrer_host", sa.String(length=255), nullable=True),
+        sa.Column("user_agent_class", sa.String(length=16), nullable=False),
+        sa.Column("ingested_at", sa.DateTime(timezone=True), server_default=sa.text("now()"), nullable=False),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_table(
+        "click_rollups_hourly",
+        sa.Column("short_url", sa.String(length=20), nullable=False),
+        sa.Column("bucket_start", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("clicks", sa.BigInteger(), nullable=False),
+        sa.PrimaryKeyConstraint("short_url", "bucket_start"),
+    )
+    op.create_table(
+        "click_rollups_daily",
+        sa.Column("short_url", sa.String(length=20), nullable=False),
+        sa.Column("bucket_start", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("clicks", sa.BigInteger(), nullable=False),
+        sa.PrimaryKeyConstraint("short_url", "bucket_start"),
+    )
+    op.create_table(
+        "click_rollup_state",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("last_event_id", sa.BigInteger(), nullable=False),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.execute("INSERT INTO click_rollup_state (id, last_event_id) VALUES (1, 0)")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table("click_rollup_state")
+    op.drop_table("click_rollups_daily")
+    op.drop_table("click_rollups_hourly")
+    op.drop_table("click_events")
@@ -0,0 +1,31 @@
+"""Add per-link redirect_status
+
+Revision ID: f3a91c5d7e28
+Revises: b6e2f49d0a13
+Create Date: 2026-10-18 23:05:12.481307
+
+"""
+
+from collections.abc import Sequence
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "f3a91c5d7e28"
+down_revision: str | None = "b6e2f49d0a13"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # A constant default is stored in the catalog, so existing rows aren't rewritten and keep redirecting with 307.
+    op.add_column(
+        "urls", sa.Column("redirect_status", sa.SmallInteger(), server_default=sa.text("307"), nullable=False)
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column("urls", "redirect_status")
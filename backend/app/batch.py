@@ -0,0 +1,178 @@
+import json
+import tempfile
+from collections.abc import AsyncIterable, AsyncIterator, Iterable
+from typing import IO
+
+from pydantic import HttpUrl, ValidationError
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.config import settings
+from app.constants import MAX_ATTEMPTS
+from app.crud import create_db_urls, get_db_duplicate_urls
+from app.enums import RedirectStatus
+from app.generators import short_url_generator
+from app.schemas import URLBatchResult, URLCreate, URLResponse
+from app.utils import generate_short_url
+
+
+async def spool_request_body(chunks: AsyncIterable[bytes]) -> IO[bytes]:
+    # The body is read up front because Starlette consumes request messages once a streaming
+    # response starts; large bodies spill to disk instead of growing memory.
+    body = tempfile.SpooledTemporaryFile(max_size=settings.batch_spool_max_size)  # noqa: SIM115
+    async for chunk in chunks:
+        body.write(chunk)
+
+    body.seek(0)
+    return body
+
+
+async def iter_ndjson(body: IO[bytes]) -> AsyncIterator[object]:
+    with body:
+        for line in body:
+            if line.strip():
+                yield parse_batch_item(line)
+
+
+async def iter_items(items: Iterable[object]) -> AsyncIterator[object]:
+    for item in items:
+        yield item
+
+
+def parse_batch_item(line: bytes) -> object:
+    try:
+        return json.loads(line)
+    except ValueError:
+        return line.decode(errors="replace").strip()
+
+
+async def next_generated_short_url(db: AsyncSession) -> str:
+    if settings.short_url_generator == "sequence":
+        return await short_url_generator.next_short_url(db)
+
+    return generate_short_url()
+
+
+def format_validation_error(error: ValidationError) -> str:
+    return "; ".join(f"{'.'.join(map(str, e['loc'])) or 'item'}: {e['msg']}" for e in error.errors())
+
+
+async def find_duplicate_urls(urls: dict[int, URLCreate], db: AsyncSession) -> dict[int, URLResponse]:
+    if not settings.url_dedup_enabled:
+        return {}
+
+    generated = {
+        index: url
+        for index, url in urls.items()
+        if not url.custom_alias and url.redirect_status == RedirectStatus.temporary_redirect
+    }
+    duplicates = await get_db_duplicate_urls(
+        [(str(url.original_url), url.expires_in) for url in generated.values()], db
+    )
+
+    results = {}
+    for index, url in generated.items():
+        existing_url = duplicates.get((str(url.original_url), url.expires_in))
+        if existing_url is not None:
+            results[index] = URLResponse(
+                original_url=HttpUrl(existing_url.original_url),
+                short_url=existing_url.short_url,
+                is_active=existing_url.is_active,
+                expires_at=existing_url.expires_at,
+            )
+
+    return results
+
+
+async def create_batch_urls(urls: dict[int, URLCreate], db: AsyncSession) -> dict[int, URLResponse | str]:
+    results: dict[int, URLResponse | str] = dict(await find_duplicate_urls(urls, db))
+    pending = {index: url for index, url in urls.items() if index not in results}
+
+    # Only generated codes that collided are retried; custom aliases are settled in the first round.
+    for _ in range(MAX_ATTEMPTS):
+        if not pending:
+            break
+
+        chunk: dict[str, tuple[int, URLCreate]] = {}
+        for index, url in pending.items():
+            if url.custom_alias:
+                short_url = url.custom_alias
+                if short_url in chunk:
+                    results[index] = f"Alias {short_url} is already taken."
+                    continue
+            else:
+                short_url = await next_generated_short_url(db)
+                while short_url in chunk:
+                    short_url = await next_generated_short_url(db)
+
+            chunk[short_url] = (index, url)
+
+        created = await create_db_urls(
+            [
+                (short_url, str(url.original_url), url.expires_in, bool(url.custom_alias), url.redirect_status)
+                for short_url, (_, url) in chunk.items()
+            ],
+            db,
+        )
+
+        pending = {}
+        for short_url, (index, url) in chunk.items():
+            if short_url in created:
+                new_url = created[short_url]
+                results[index] = URLResponse(
+                    original_url=HttpUrl(new_url.original_url),
+                    short_url=short_url,
+                    is_active=new_url.is_active,
+                    expires_at=new_url.expires_at,
+                )
+            elif url.custom_alias:
+                results[index] = f"Alias {short_url} is already taken."
+            else:
+                pending[index] = url
+
+    for index in pending:
+        results[index] = "Failed to generate a unique short code."
+
+    return results
+
+
+async def process_batch_chunk(items: list[tuple[int, object]], db: AsyncSession) -> list[URLBatchResult]:
+    results: dict[int, URLResponse | str] = {}
+    urls: dict[int, URLCreate] = {}
+
+    for index, item in items:
+        try:
+            urls[index] = URLCreate.model_validate(item)
+        except ValidationError as e:
+            results[index] = format_validation_error(e)
+
+    if urls:
+        results.update(await create_batch_urls(urls, db))
+
+    return [
+        URLBatchResult(index=index, url=result)
+        if isinstance(result, URLResponse)
+        else URLBatchResult(index=index, error=result)
+        for index, result in sorted(results.items())
+    ]
+
+
+async def stream_batch_results(
+    items: AsyncIterator[object], session_maker: async_sessionmaker[AsyncSession]
+) -> AsyncIterator[str]:
+    # The session lives inside the generator so it stays open while the response streams.
+    async with session_maker() as session:
+        chunk: list[tuple[int, object]] = []
+        index = 0
+
+        async for item in items:
+            chunk.append((index, item))
+            index += 1
+
+            if len(chunk) >= settings.batch_chunk_size:
+                for result in await process_batch_chunk(chunk, session):
+                    yield result.model_dump_json() + "\n"
+                chunk = []
+
+        if chunk:
+            for result in await process_batch_chunk(chunk, session):
+                yield result.model_dump_json() + "\n"
@@ -0,0 +1,103 @@
+import hashlib
+import math
+from collections.abc import AsyncIterable, Iterator, Sequence
+
+from app.config import settings
+
+
+class BloomFilter:
+    def __init__(self, capacity: int, error_rate: float) -> None:
+        # Optimal sizing for capacity items: -n ln p / (ln 2)^2 bits and (bits / n) ln 2 hash functions.
+        capacity = max(1, capacity)
+        self.size = max(8, math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hash_count = max(1, round(self.size / capacity * math.log(2)))
+        self.count = 0
+        self._bits = bytearray((self.size + 7) // 8)
+
+    def __contains__(self, key: str) -> bool:
+        return all(self._bits[position >> 3] & (1 << (position & 7)) for position in self._positions(key))
+
+    @property
+    def memory_bytes(self) -> int:
+        return len(self._bits)
+
+    @property
+    def false_positive_rate(self) -> float:
+        return (1 - math.exp(-self.hash_count * self.count / self.size)) ** self.hash_count
+
+    def add(self, key: str) -> None:
+        for position in self._positions(key):
+            self._bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def _positions(self, key: str) -> Iterator[int]:
+        # Double hashing: k positions from two halves of a single digest.
+        digest = hashlib.blake2b(key.encode(), digest_size=16).digest()
+        first = int.from_bytes(digest[:8], "little")
+        second = int.from_bytes(digest[8:], "little") | 1
+        for i in range(self.hash_count):
+            yield (first + i * second) % self.size
+
+
+class ShortURLFilter:
+    # Answers "definitely not a code" for most probes of random paths. Deactivated codes can't be
+    # removed from a Bloom filter, so they stay "maybe" until the next rebuild and cost a lookup as before.
+    def __init__(self, capacity: int, error_rate: float) -> None:
+        self.capacity = capacity
+        self.error_rate = error_rate
+        # None until the first build, and again whenever additions may have been missed.
+        self.bloom: BloomFilter | None = None
+        self._building: BloomFilter | None = None
+        self._generation = 0
+        self.rejections = 0
+        self.rebuilds = 0
+
+    def might_exist(self, short_url: str) -> bool:
+        if self.bloom is None or short_url in self.bloom:
+            return True
+
+        self.rejections += 1
+        return False
+
+    def add(self, short_url: str) -> None:
+        # Codes created while a rebuild is reading the table may be missing from its snapshot.
+        for bloom in (self.bloom, self._building):
+            if bloom is not None:
+                bloom.add(short_url)
+
+    def reset(self) -> None:
+        self.bloom = None
+        self._generation += 1
+
+    async def rebuild(self, batches: AsyncIterable[Sequence[str]], expected: int) -> bool:
+        # Sized for twice the current count so the false positive rate holds as codes are added until the next one.
+        generation = self._generation
+        bloom = BloomFilter(max(self.capacity, 2 * expected), self.error_rate)
+        self._building = bloom
+        try:
+            async for short_urls in batches:
+                for short_url in short_urls:
+                    bloom.add(short_url)
+        finally:
+            self._building = None
+
+        if generation != self._generation:
+            return False
+
+        self.bloom = bloom
+        self.rebuilds += 1
+        return True
+
+    def stats(self) -> dict[str, float]:
+        bloom = self.bloom
+        return {
+            "filter_ready": bloom is not None,
+            "filter_items": bloom.count if bloom else 0,
+            "filter_memory_bytes": bloom.memory_bytes if bloom else 0,
+            "filter_false_positive_rate": bloom.false_positive_rate if bloom else 0.0,
+            "filter_rejections": self.rejections,
+            "filter_rebuilds": self.rebuilds,
+        }
+
+
+short_url_filter = ShortURLFilter(settings.url_filter_capacity, settings.url_filter_error_rate)
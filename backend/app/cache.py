@@ -0,0 +1,179 @@
+import time
+from collections import OrderedDict
+from collections.abc import Callable
+from datetime import UTC, datetime
+from typing import NamedTuple
+
+from app.config import settings
+from app.enums import RedirectStatus
+
+
+class CachedURL(NamedTuple):
+    original_url: str
+    expires_at: datetime | None
+    is_active: bool
+    redirect_status: int = RedirectStatus.temporary_redirect.value
+
+
+# Stored for short codes that are known not to resolve, so repeated probes skip the database.
+MISSING_URL = CachedURL(original_url="", expires_at=None, is_active=False)
+
+
+class URLCache:
+    def __init__(
+        self,
+        max_size: int,
+        ttl: float,
+        negative_ttl: float,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.max_size = max_size
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self._clock = clock
+        self._entries: OrderedDict[str, tuple[float, CachedURL]] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, short_url: str) -> CachedURL | None:
+        entry = self._entries.get(short_url)
+        if entry is None:
+            self.misses += 1
+            return None
+
+        deadline, cached_url = entry
+        if deadline <= self._clock():
+            del self._entries[short_url]
+            self.misses += 1
+            return None
+
+        self._entries.move_to_end(short_url)
+        self.hits += 1
+        return cached_url
+
+    def set(self, short_url: str, cached_url: CachedURL) -> None:
+        ttl = self.ttl
+        if cached_url.expires_at is not None:
+            ttl = min(ttl, (cached_url.expires_at - datetime.now(UTC)).total_seconds())
+
+        if ttl > 0:
+            self._store(short_url, cached_url, ttl)
+
+    def set_missing(self, short_url: str) -> None:
+        if self.negative_ttl > 0:
+            self._store(short_url, MISSING_URL, self.negative_ttl)
+
+    def invalidate(self, short_url: str) -> None:
+        self._entries.pop(short_url, None)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def stats(self) -> dict[str, int]:
+        return {
+            "size": len(self._entries),
+            "max_size": self.max_size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
+
+    def _store(self, short_url: str, cached_url: CachedURL, ttl: float) -> None:
+        if self.max_size <= 0:
+            return
+
+        self._entries[short_url] = (self._clock() + ttl, cached_url)
+        self._entries.move_to_end(short_url)
+
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+
+class BytesLRUCache:
+    def __init__(self, max_bytes: int) -> None:
+        self.max_bytes = max_bytes
+        self._entries: OrderedDict[str, bytes] = OrderedDict()
+        self.size_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: str) -> bytes | None:
+        value = self._entries.get(key)
+        if value is None:
+            self.misses += 1
+            return None
+
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def set(self, key: str, value: bytes) -> None:
+        if len(value) > self.max_bytes:
+            return
+
+        previous = self._entries.pop(key, None)
+        if previous is not None:
+            self.size_bytes -= len(previous)
+
+        self._entries[key] = value
+        self.size_bytes += len(value)
+
+        while self.size_bytes > self.max_bytes:
+            _, evicted = self._entries.popitem(last=False)
+            self.size_bytes -= len(evicted)
+            self.evictions += 1
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self.size_bytes = 0
+
+    def stats(self) -> dict[str, int]:
+        return {
+            "size": len(self._entries),
+            "size_bytes": self.size_bytes,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
+
+
+class CachedCount:
+    def __init__(self, ttl: float, clock: Callable[[], float] = time.monotonic) -> None:
+        self.ttl = ttl
+        self._clock = clock
+        self._value: int | None = None
+        self._deadline = 0.0
+
+    def get(self) -> int | None:
+        if self._value is None or self._deadline <= self._clock():
+            return None
+
+        return self._value
+
+    def set(self, value: int) -> None:
+        self._value = value
+        self._deadline = self._clock() + self.ttl
+
+    def clear(self) -> None:
+        self._value = None
+
+
+url_cache = URLCache(
+    max_size=settings.url_cache_size,
+    ttl=settings.url_cache_ttl,
+    negative_ttl=settings.url_cache_negative_ttl,
+)
+
+active_urls_count = CachedCount(ttl=settings.urls_count_cache_ttl)
+
+qr_code_cache = BytesLRUCache(max_bytes=settings.qr_cache_max_bytes)
@@ -0,0 +1,55 @@
+import asyncio
+import logging
+from collections import Counter
+
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.config import settings
+from app.crud import increment_db_url_click_counts
+from app.database import async_session_maker
+
+logger = logging.getLogger(__name__)
+
+
+class ClickAggregator:
+    def __init__(self, session_maker: async_sessionmaker[AsyncSession], max_pending: int) -> None:
+        self.session_maker = session_maker
+        self.max_pending = max_pending
+        self._pending: Counter[str] = Counter()
+        self._flush_lock = asyncio.Lock()
+        self._flush_task: asyncio.Task[None] | None = None
+
+    @property
+    def pending(self) -> int:
+        return sum(self._pending.values())
+
+    def record(self, short_url: str) -> None:
+        self._pending[short_url] += 1
+
+        if len(self._pending) >= self.max_pending and (self._flush_task is None or self._flush_task.done()):
+            self._flush_task = asyncio.create_task(self._flush_in_background())
+
+    async def flush(self) -> int:
+        async with self._flush_lock:
+            if not self._pending:
+                return 0
+
+            # Swap before awaiting so clicks recorded during the flush land in the next batch.
+            pending, self._pending = self._pending, Counter()
+            try:
+                async with self.session_maker() as session:
+                    await increment_db_url_click_counts(pending, session)
+            except Exception:
+                self._pending.update(pending)
+                raise
+
+            return sum(pending.values())
+
+    async def _flush_in_background(self) -> None:
+        try:
+            await self.flush()
+        except Exception:
+            logger.exception("Failed to flush click counts")
+
+
+click_aggregator = ClickAggregator(async_session_maker, settings.click_max_pending)
@@ -1,7 +1,30 @@
-from pydantic import AliasChoices, Field
+from typing import Literal, Self
+
+from pydantic import AliasChoices, BaseModel, Field, model_validator
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 
+class RateLimitRule(BaseModel):
+    # Tokens per second and bucket size, per client address and for the route as a whole.
+    client_rate: float
+    client_burst: float
+    global_rate: float
+    global_burst: float
+
+
+# Which routes an app serves: "redirect" is only GET /{short_url} and /check (plus the operational endpoints),
+# "api" is everything else, "full" is both.
+AppProfile = Literal["full", "api", "redirect"]
+
+# Sequential codes are only as hard to enumerate as the secret that permutes them is to guess.
+SHORT_URL_SECRET_MIN_LENGTH = 16
+
+DEFAULT_RATE_LIMITS = {
+    "POST /shorten": RateLimitRule(client_rate=2, client_burst=20, global_rate=200, global_burst=400),
+    "POST /shorten/batch": RateLimitRule(client_rate=0.2, client_burst=5, global_rate=20, global_burst=40),
+}
+
+
 class Settings(BaseSettings):
     model_config = SettingsConfigDict(
         env_file=".env",
@@ -15,6 +38,163 @@ class Settings(BaseSettings):
     postgres_port: int = Field(default=5432, validation_alias=AliasChoices("PGPORT", "POSTGRES_PORT"))
     base_url: str = Field(default="", validation_alias=AliasChoices("BASE_URL"))
 
+    db_pool_size: int = Field(default=10, validation_alias=AliasChoices("DB_POOL_SIZE"))
+    db_max_overflow: int = Field(default=10, validation_alias=AliasChoices("DB_MAX_OVERFLOW"))
+    db_pool_timeout: float = Field(default=30.0, validation_alias=AliasChoices("DB_POOL_TIMEOUT"))
+    db_pool_recycle: float = Field(default=1800.0, validation_alias=AliasChoices("DB_POOL_RECYCLE"))
+    db_pool_pre_ping: bool = Field(default=True, validation_alias=AliasChoices("DB_POOL_PRE_PING"))
+    db_statement_cache_size: int = Field(default=100, validation_alias=AliasChoices("DB_STATEMENT_CACHE_SIZE"))
+    db_prepared_statement_cache_size: int = Field(
+        default=100, validation_alias=AliasChoices("DB_PREPARED_STATEMENT_CACHE_SIZE")
+    )
+    db_command_timeout: float | None = Field(default=None, validation_alias=AliasChoices("DB_COMMAND_TIMEOUT"))
+    db_fast_path_enabled: bool = Field(default=True, validation_alias=AliasChoices("DB_FAST_PATH_ENABLED"))
+    db_read_replica_urls: str = Field(default="", validation_alias=AliasChoices("DB_READ_REPLICA_URLS"))
+
+    app_profile: AppProfile = Field(default="full", validation_alias=AliasChoices("APP_PROFILE"))
+    short_url_generator: Literal["random", "sequence"] = Field(
+        default="random", validation_alias=AliasChoices("SHORT_URL_GENERATOR")
+    )
+    short_url_secret: str = Field(default="", validation_alias=AliasChoices("SHORT_URL_SECRET"))
+    short_url_id_block_size: int = Field(default=100, validation_alias=AliasChoices("SHORT_URL_ID_BLOCK_SIZE"))
+    url_dedup_enabled: bool = Field(default=False, validation_alias=AliasChoices("URL_DEDUP_ENABLED"))
+    batch_chunk_size: int = Field(default=500, validation_alias=AliasChoices("BATCH_CHUNK_SIZE"))
+    batch_spool_max_size: int = Field(default=1024 * 1024, validation_alias=AliasChoices("BATCH_SPOOL_MAX_SIZE"))
+    import_chunk_size: int = Field(default=10_000, validation_alias=AliasChoices("IMPORT_CHUNK_SIZE"))
+    export_fetch_size: int = Field(default=1_000, validation_alias=AliasChoices("EXPORT_FETCH_SIZE"))
+
+    url_cache_size: int = Field(default=10_000, validation_alias=AliasChoices("URL_CACHE_SIZE"))
+    url_cache_ttl: float = Field(default=300.0, validation_alias=AliasChoices("URL_CACHE_TTL"))
+    url_cache_negative_ttl: float = Field(default=5.0, validation_alias=AliasChoices("URL_CACHE_NEGATIVE_TTL"))
+    url_cache_warmup_size: int = Field(default=0, validation_alias=AliasChoices("URL_CACHE_WARMUP_SIZE"))
+    shared_cache_url: str = Field(default="", validation_alias=AliasChoices("SHARED_CACHE_URL"))
+    shared_cache_ttl: float = Field(default=300.0, validation_alias=AliasChoices("SHARED_CACHE_TTL"))
+    shared_cache_timeout: float = Field(default=0.05, validation_alias=AliasChoices("SHARED_CACHE_TIMEOUT"))
+    shared_cache_pool_size: int = Field(default=8, validation_alias=AliasChoices("SHARED_CACHE_POOL_SIZE"))
+    # Invalidated keys hold a tombstone this long, which cache fills can't overwrite; it has to outlast a lookup.
+    shared_cache_invalidation_ttl: float = Field(
+        default=5.0, validation_alias=AliasChoices("SHARED_CACHE_INVALIDATION_TTL")
+    )
+    shared_cache_retry_interval: float = Field(
+        default=5.0, validation_alias=AliasChoices("SHARED_CACHE_RETRY_INTERVAL")
+    )
+    # Every worker must see every new code for the filter to be safe, so with more than one worker
+    # (or the bulk importer) it needs SHARED_CACHE_URL, whose invalidations also announce new codes.
+    url_filter_enabled: bool = Field(default=False, validation_alias=AliasChoices("URL_FILTER_ENABLED"))
+    url_filter_capacity: int = Field(default=1_000_000, validation_alias=AliasChoices("URL_FILTER_CAPACITY"))
+    url_filter_error_rate: float = Field(default=0.01, validation_alias=AliasChoices("URL_FILTER_ERROR_RATE"))
+    url_filter_rebuild_interval: float = Field(
+        default=900.0, validation_alias=AliasChoices("URL_FILTER_REBUILD_INTERVAL")
+    )
+    url_filter_fetch_size: int = Field(default=10_000, validation_alias=AliasChoices("URL_FILTER_FETCH_SIZE"))
+    urls_count_cache_ttl: float = Field(default=30.0, validation_alias=AliasChoices("URLS_COUNT_CACHE_TTL"))
+    qr_cache_max_bytes: int = Field(default=32 * 1024 * 1024, validation_alias=AliasChoices("QR_CACHE_MAX_BYTES"))
+    # Upper bound on how long browsers and CDNs may cache a permanent redirect; it is also capped at the link's expiry.
+    redirect_cache_max_age: int = Field(default=60 * 60, validation_alias=AliasChoices("REDIRECT_CACHE_MAX_AGE"))
+    redirect_surrogate_keys_enabled: bool = Field(
+        default=False, validation_alias=AliasChoices("REDIRECT_SURROGATE_KEYS_ENABLED")
+    )
+    qr_cache_max_age: int = Field(default=30 * 24 * 60 * 60, validation_alias=AliasChoices("QR_CACHE_MAX_AGE"))
+    qr_render_executor: Literal["process", "thread"] = Field(
+        default="process", validation_alias=AliasChoices("QR_RENDER_EXECUTOR")
+    )
+    qr_render_workers: int = Field(default=2, validation_alias=AliasChoices("QR_RENDER_WORKERS"))
+    qr_render_max_pending: int = Field(default=64, validation_alias=AliasChoices("QR_RENDER_MAX_PENDING"))
+    qr_batch_max_items: int = Field(default=100, validation_alias=AliasChoices("QR_BATCH_MAX_ITEMS"))
+
+    click_flush_interval: float = Field(default=5.0, validation_alias=AliasChoices("CLICK_FLUSH_INTERVAL"))
+    click_max_pending: int = Field(default=1_000, validation_alias=AliasChoices("CLICK_MAX_PENDING"))
+
+    click_events_enabled: bool = Field(default=True, validation_alias=AliasChoices("CLICK_EVENTS_ENABLED"))
+    click_events_buffer_size: int = Field(default=100_000, validation_alias=AliasChoices("CLICK_EVENTS_BUFFER_SIZE"))
+    click_events_batch_size: int = Field(default=5_000, validation_alias=AliasChoices("CLICK_EVENTS_BATCH_SIZE"))
+    click_events_flush_interval: float = Field(
+        default=2.0, validation_alias=AliasChoices("CLICK_EVENTS_FLUSH_INTERVAL")
+    )
+    click_rollup_interval: float = Field(default=60.0, validation_alias=AliasChoices("CLICK_ROLLUP_INTERVAL"))
+    click_rollup_lag: float = Field(default=60.0, validation_alias=AliasChoices("CLICK_ROLLUP_LAG"))
+    click_rollup_lock_id: int = Field(default=724_002, validation_alias=AliasChoices("CLICK_ROLLUP_LOCK_ID"))
+    click_events_retention_days: float = Field(
+        default=7.0, validation_alias=AliasChoices("CLICK_EVENTS_RETENTION_DAYS")
+    )
+    click_events_prune_interval: float = Field(
+        default=3600.0, validation_alias=AliasChoices("CLICK_EVENTS_PRUNE_INTERVAL")
+    )
+    click_events_prune_batch_size: int = Field(
+        default=10_000, validation_alias=AliasChoices("CLICK_EVENTS_PRUNE_BATCH_SIZE")
+    )
+    click_events_prune_lock_id: int = Field(
+        default=724_005, validation_alias=AliasChoices("CLICK_EVENTS_PRUNE_LOCK_ID")
+    )
+
+    unique_visitors_enabled: bool = Field(default=True, validation_alias=AliasChoices("UNIQUE_VISITORS_ENABLED"))
+    unique_visitors_precision: int = Field(default=12, validation_alias=AliasChoices("UNIQUE_VISITORS_PRECISION"))
+    unique_visitors_flush_interval: float = Field(
+        default=30.0, validation_alias=AliasChoices("UNIQUE_VISITORS_FLUSH_INTERVAL")
+    )
+    unique_visitors_max_pending: int = Field(
+        default=1_000, validation_alias=AliasChoices("UNIQUE_VISITORS_MAX_PENDING")
+    )
+    unique_visitors_retention_days: int = Field(
+        default=30, validation_alias=AliasChoices("UNIQUE_VISITORS_RETENTION_DAYS")
+    )
+    unique_visitors_rollup_interval: float = Field(
+        default=3600.0, validation_alias=AliasChoices("UNIQUE_VISITORS_ROLLUP_INTERVAL")
+    )
+    unique_visitors_rollup_batch_size: int = Field(
+        default=1_000, validation_alias=AliasChoices("UNIQUE_VISITORS_ROLLUP_BATCH_SIZE")
+    )
+    unique_visitors_rollup_lock_id: int = Field(
+        default=724_004, validation_alias=AliasChoices("UNIQUE_VISITORS_ROLLUP_LOCK_ID")
+    )
+
+    url_partitions_enabled: bool = Field(default=True, validation_alias=AliasChoices("URL_PARTITIONS_ENABLED"))
+    url_partitions_interval: float = Field(default=3600.0, validation_alias=AliasChoices("URL_PARTITIONS_INTERVAL"))
+    url_partitions_months_ahead: int = Field(default=3, validation_alias=AliasChoices("URL_PARTITIONS_MONTHS_AHEAD"))
+    url_partitions_retention_days: float = Field(
+        default=30.0, validation_alias=AliasChoices("URL_PARTITIONS_RETENTION_DAYS")
+    )
+    url_partitions_retention_action: Literal["detach", "drop"] = Field(
+        default="detach", validation_alias=AliasChoices("URL_PARTITIONS_RETENTION_ACTION")
+    )
+    url_partitions_lock_id: int = Field(default=724_003, validation_alias=AliasChoices("URL_PARTITIONS_LOCK_ID"))
+
+    rate_limit_enabled: bool = Field(default=True, validation_alias=AliasChoices("RATE_LIMIT_ENABLED"))
+    # JSON object of "METHOD /path" to rule, e.g. {"POST /shorten": {"client_rate": 5, ...}}.
+    rate_limits: dict[str, RateLimitRule] = Field(
+        default=DEFAULT_RATE_LIMITS, validation_alias=AliasChoices("RATE_LIMITS")
+    )
+    rate_limit_max_clients: int = Field(default=100_000, validation_alias=AliasChoices("RATE_LIMIT_MAX_CLIENTS"))
+    write_concurrency_limit: int = Field(default=8, validation_alias=AliasChoices("WRITE_CONCURRENCY_LIMIT"))
+    write_concurrency_max_wait: float = Field(default=0.05, validation_alias=AliasChoices("WRITE_CONCURRENCY_MAX_WAIT"))
+
+    metrics_enabled: bool = Field(default=True, validation_alias=AliasChoices("METRICS_ENABLED"))
+    metrics_loop_lag_interval: float = Field(default=1.0, validation_alias=AliasChoices("METRICS_LOOP_LAG_INTERVAL"))
+
+    sweeper_enabled: bool = Field(default=True, validation_alias=AliasChoices("SWEEPER_ENABLED"))
+    sweeper_interval: float = Field(default=60.0, validation_alias=AliasChoices("SWEEPER_INTERVAL"))
+    sweeper_batch_size: int = Field(default=1_000, validation_alias=AliasChoices("SWEEPER_BATCH_SIZE"))
+    sweeper_lock_id: int = Field(default=724_001, validation_alias=AliasChoices("SWEEPER_LOCK_ID"))
+
+    @model_validator(mode="after")
+    def check_short_url_secret(self) -> Self:
+        if self.short_url_generator == "sequence" and len(self.short_url_secret) < SHORT_URL_SECRET_MIN_LENGTH:
+            raise ValueError(
+                f"SHORT_URL_SECRET must be at least {SHORT_URL_SECRET_MIN_LENGTH} characters "
+                "with SHORT_URL_GENERATOR=sequence."
+            )
+
+        return self
+
+    @model_validator(mode="after")
+    def check_url_filter(self) -> Self:
+        # Without the shared cache, codes created by other workers or the importer never reach this worker's filter
+        # and it would answer 404 for them until the next rebuild.
+        if self.url_filter_enabled and not self.shared_cache_url:
+            raise ValueError("URL_FILTER_ENABLED requires SHARED_CACHE_URL.")
+
+        return self
+
     @property
     def db_url(self) -> str:
         return (
@@ -22,6 +202,10 @@ class Settings(BaseSettings):
             f"@{self.postgres_host}:{self.postgres_port}/{self.postgres_db}"
         )
 
+    @property
+    def read_replica_urls(self) -> list[str]:
+        return [url.strip() for url in self.db_read_replica_urls.split(",") if url.strip()]
+
     @property
     def db_url_sync(self) -> str:
         return (
@@ -1 +1,77 @@
+from datetime import UTC, datetime, timedelta
+
+from app.enums import ExpirationOption, TimeseriesGranularity
+
 MAX_ATTEMPTS = 10
+
+EXPIRATION_DELTAS = {
+    ExpirationOption.one_hour: timedelta(hours=1),
+    ExpirationOption.six_hours: timedelta(hours=6),
+    ExpirationOption.one_day: timedelta(days=1),
+    ExpirationOption.one_week: timedelta(weeks=1),
+    ExpirationOption.one_month: timedelta(days=30),
+    ExpirationOption.one_year: timedelta(days=365),
+}
+
+# Codes that would shadow the service's own routes.
+RESERVED_SHORT_URLS = frozenset({"shorten", "stats", "urls", "metrics"})
+
+# urls.id is an int4; keyset cursors beyond it would overflow the query parameter.
+MAX_URL_ID = 2**31 - 1
+
+# Sequence ids are permuted within 56 bits, which always fits in 10 base62 characters.
+PERMUTATION_HALF_BITS = 28
+PERMUTATION_ROUNDS = 4
+
+QR_CODE_VERSION = 1
+QR_CODE_BOX_SIZE = 10
+QR_CODE_BORDER = 5
+
+USER_AGENT_BOT_MARKERS = ("bot", "crawl", "spider", "slurp", "curl", "wget", "python", "http-client", "preview")
+USER_AGENT_MOBILE_MARKERS = ("mobi", "android", "iphone", "ipad")
+
+TIMESERIES_DEFAULT_WINDOWS = {
+    TimeseriesGranularity.hour: timedelta(days=7),
+    TimeseriesGranularity.day: timedelta(days=90),
+}
+
+# One byte per register, so precision 14 is a 16 KB sketch with ~0.8% standard error.
+HLL_MIN_PRECISION = 4
+HLL_MAX_PRECISION = 16
+# The bias correction 0.7213 / (1 + 1.079 / m) only holds from 128 registers; smaller sketches use the
+# constants from the HyperLogLog paper.
+HLL_SMALL_ALPHAS = {16: 0.673, 32: 0.697, 64: 0.709}
+# Daily visitor sketches past their retention are merged into one bucket per link stored at this start.
+VISITOR_SKETCH_ROLLUP_BUCKET = datetime(1970, 1, 1, tzinfo=UTC)
+
+# Seconds; spans cache hits (sub-millisecond) through slow QR renders and database timeouts.
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+UNMATCHED_ROUTE = "<unmatched>"
+
+# Monthly urls partitions are named urls_pYYYYMM after the month of created_at they hold.
+URL_PARTITION_PREFIX = "urls_p"
+# Rows keyed by short_url that are deleted when a dropped partition frees its codes for reuse.
+RELEASED_CODE_TABLES = ("url_codes", "click_rollups_hourly", "click_rollups_daily", "visitor_sketches")
+
+URL_EXPORT_COLUMNS = (
+    "id",
+    "short_url",
+    "original_url",
+    "created_at",
+    "expires_at",
+    "is_active",
+    "click_count",
+    "is_custom_alias",
+)
+
+SHARED_CACHE_KEY_PREFIX = "url:"
+SHARED_CACHE_INVALIDATION_CHANNEL = "url-invalidations"
+# Written over invalidated keys; read as a miss.
+SHARED_CACHE_TOMBSTONE = b""
+# Sent instead of a list of codes when too many invalidations went undelivered; receivers drop everything local.
+SHARED_CACHE_INVALIDATE_ALL = "*"
+SHARED_CACHE_MAX_UNSENT_INVALIDATIONS = 100_000
+
+# Surrogate keys on cacheable redirects: one per link, and one shared by all of them for a full purge.
+REDIRECT_SURROGATE_KEY = "redirects"
+REDIRECT_SURROGATE_KEY_PREFIX = "url-"
@@ -1,32 +1,221 @@
-from sqlalchemy import func, select
+from collections.abc import AsyncGenerator, Mapping, Sequence
+from datetime import UTC, datetime, timedelta
+
+from sqlalchemy import (
+    Integer,
+    String,
+    and_,
+    case,
+    column,
+    delete,
+    func,
+    not_,
+    or_,
+    select,
+    table,
+    text,
+    true,
+    tuple_,
+    update,
+    values,
+)
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.engine import Row
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.sql.elements import ColumnElement
 
-from app.enums import ExpirationOption
-from app.models import URL
-from app.utils import get_expiration_datetime
+from app.cache import CachedURL, active_urls_count, url_cache
+from app.config import settings
+from app.constants import EXPIRATION_DELTAS, RELEASED_CODE_TABLES, URL_EXPORT_COLUMNS, VISITOR_SKETCH_ROLLUP_BUCKET
+from app.database import get_driver_connection
+from app.enums import ExpirationOption, RedirectStatus, TimeseriesGranularity
+from app.fastpath import fetch_redirect_url, fetch_url
+from app.hll import HyperLogLog
+from app.models import (
+    URL,
+    ClickEvent,
+    ClickEventRecord,
+    ClickRollupDaily,
+    ClickRollupHourly,
+    ClickRollupState,
+    URLCode,
+    URLImportRecord,
+    VisitorSketch,
+    short_url_id_seq,
+)
+from app.shared_cache import shared_url_cache
+from app.utils import (
+    add_months,
+    get_expiration_datetime,
+    get_month_start,
+    get_url_dedup_key,
+    get_url_partition_name,
+    parse_url_partition_name,
+)
 
 
 async def get_db_urls(skip: int, limit: int, db: AsyncSession) -> tuple[list[URL], int]:
-    stmt = select(URL, func.count().over().label("total_count")).filter(URL.is_active).offset(skip).limit(limit)
-    result = await db.execute(stmt)
-    rows = result.all()
+    stmt = select(URL).filter(URL.is_active).order_by(URL.id).offset(skip).limit(limit)
+    result = await db.scalars(stmt)
+    urls = list(result.all())
+
+    if not urls:
+        return [], 0
+
+    return urls, await count_db_urls(db)
+
+
+async def get_db_urls_after(after_id: int, limit: int, db: AsyncSession) -> tuple[list[URL], int]:
+    stmt = select(URL).filter(URL.is_active, URL.id > after_id).order_by(URL.id).limit(limit)
+    result = await db.scalars(stmt)
+    urls = list(result.all())
 
-    if not rows:
+    if not urls:
         return [], 0
 
-    urls = [row.URL for row in rows]
-    total = rows[0].total_count
-    return urls, total
+    return urls, await count_db_urls(db)
+
+
+async def stream_db_urls(
+    active: bool | None, created_since: datetime | None, expired: bool | None, fetch_size: int, db: AsyncSession
+) -> AsyncGenerator[Sequence[Row]]:
+    # Rows come from a server-side cursor, fetch_size at a time, and are plain rows rather than ORM
+    # objects so nothing accumulates in the session. There is no ORDER BY: sorting would have to read
+    # the whole table before the first row could be sent.
+    stmt = select(*(URL.__table__.c[name] for name in URL_EXPORT_COLUMNS)).execution_options(yield_per=fetch_size)
+
+    if active is not None:
+        stmt = stmt.filter(URL.is_active == active)
+    if created_since is not None:
+        stmt = stmt.filter(URL.created_at >= created_since)
+    if expired is not None:
+        is_expired = and_(URL.expires_at.is_not(None), URL.expires_at <= func.now())
+        stmt = stmt.filter(is_expired if expired else not_(is_expired))
+
+    result = await db.stream(stmt)
+    try:
+        async for rows in result.partitions():
+            yield rows
+    finally:
+        await result.close()
+
+
+async def stream_db_active_short_urls(fetch_size: int, db: AsyncSession) -> AsyncGenerator[Sequence[str]]:
+    stmt = select(URL.short_url).filter(URL.is_active).execution_options(yield_per=fetch_size)
+
+    result = await db.stream_scalars(stmt)
+    try:
+        async for short_urls in result.partitions():
+            yield short_urls
+    finally:
+        await result.close()
+
+
+async def count_db_urls(db: AsyncSession) -> int:
+    total = active_urls_count.get()
+    if total is None:
+        total = await db.scalar(select(func.count()).select_from(URL).filter(URL.is_active)) or 0
+        active_urls_count.set(total)
+
+    return total
+
+
+def is_claimed_url(short_url: str) -> ColumnElement[bool]:
+    # short_url isn't the partition key, so filtering on it alone reads every partition. Matching created_at
+    # against the code's claim as well lets Postgres prune the lookup to the one partition that holds the link.
+    claimed_at = select(URLCode.created_at).filter(URLCode.short_url == short_url).scalar_subquery()
+    return and_(URL.short_url == short_url, URL.created_at == claimed_at)
 
 
 async def get_db_url(short_url: str, db: AsyncSession) -> URL | None:
-    stmt = select(URL).filter(URL.short_url == short_url, URL.is_active)
+    stmt = select(URL).filter(is_claimed_url(short_url), URL.is_active)
     result = await db.scalars(stmt)
     return result.first()
 
 
+async def get_cached_db_url(short_url: str, db: AsyncSession) -> CachedURL | None:
+    # Concurrent misses for one code share a single lookup.
+    cached_url = await shared_url_cache.get_or_load(short_url, lambda: lookup_db_url(short_url, db))
+    return cached_url if cached_url is not None and cached_url.is_active else None
+
+
+async def lookup_db_url(short_url: str, db: AsyncSession) -> CachedURL | None:
+    if settings.db_fast_path_enabled:
+        return await fetch_url(short_url, db)
+
+    stmt = select(URL.original_url, URL.expires_at, URL.is_active, URL.redirect_status).filter(
+        is_claimed_url(short_url), URL.is_active
+    )
+    result = await db.execute(stmt)
+    row = result.first()
+    return CachedURL(row.original_url, row.expires_at, row.is_active, row.redirect_status) if row else None
+
+
+async def redirect_db_url(short_url: str, db: AsyncSession) -> CachedURL | None:
+    # Resolves the link, counts the click and deactivates it if expired in a single statement.
+    if settings.db_fast_path_enabled:
+        cached_url = await fetch_redirect_url(short_url, db)
+    else:
+        is_expired = and_(URL.expires_at.is_not(None), URL.expires_at <= func.now())
+        stmt = (
+            update(URL)
+            .filter(is_claimed_url(short_url), URL.is_active)
+            .values(click_count=URL.click_count + case((is_expired, 0), else_=1), is_active=not_(is_expired))
+            .returning(URL.original_url, URL.expires_at, URL.is_active, URL.redirect_status)
+            .execution_options(synchronize_session=False)
+        )
+        result = await db.execute(stmt)
+        row = result.first()
+        cached_url = CachedURL(row.original_url, row.expires_at, row.is_active, row.redirect_status) if row else None
+    await db.commit()
+
+    if cached_url is None:
+        await shared_url_cache.set_missing(short_url)
+        return None
+
+    if cached_url.is_active:
+        await shared_url_cache.set(short_url, cached_url)
+    else:
+        await shared_url_cache.invalidate([short_url])
+
+    return cached_url
+
+
+async def warm_up_url_cache(limit: int, db: AsyncSession) -> int:
+    stmt = (
+        select(URL.short_url, URL.original_url, URL.expires_at, URL.is_active, URL.redirect_status)
+        .filter(URL.is_active, or_(URL.expires_at.is_(None), URL.expires_at > datetime.now(UTC)))
+        .order_by(URL.click_count.desc())
+        .limit(limit)
+    )
+    result = await db.execute(stmt)
+    rows = result.all()
+
+    # Insert the least clicked first so the hottest links end up most recently used.
+    for row in reversed(rows):
+        url_cache.set(row.short_url, CachedURL(row.original_url, row.expires_at, row.is_active, row.redirect_status))
+
+    return len(rows)
+
+
+async def get_db_active_short_urls(short_urls: list[str], db: AsyncSession) -> set[str]:
+    stmt = select(URL.short_url).filter(
+        URL.short_url.in_(short_urls),
+        URL.is_active,
+        or_(URL.expires_at.is_(None), URL.expires_at > func.now()),
+    )
+    result = await db.scalars(stmt)
+    return set(result.all())
+
+
 async def check_db_url_exists(short_url: str, db: AsyncSession) -> bool:
-    return await get_db_url(short_url, db) is not None
+    return await lookup_db_url(short_url, db) is not None
+
+
+async def allocate_db_short_url_ids(count: int, db: AsyncSession) -> list[int]:
+    stmt = select(short_url_id_seq.next_value()).select_from(func.generate_series(1, count))
+    result = await db.scalars(stmt)
+    return list(result.all())
 
 
 async def create_db_url(
@@ -35,29 +224,454 @@ async def create_db_url(
     expires_in: ExpirationOption,
     db: AsyncSession,
     is_custom_alias: bool = False,
+    *,
+    redirect_status: RedirectStatus = RedirectStatus.temporary_redirect,
 ) -> URL:
+    created_at = datetime.now(UTC)
     new_url = URL(
         short_url=short_url,
+        created_at=created_at,
         original_url=original_url,
         expires_at=get_expiration_datetime(expires_in),
         is_custom_alias=is_custom_alias,
+        dedup_key=None if is_custom_alias else get_url_dedup_key(original_url, expires_in),
+        redirect_status=redirect_status.value,
     )
 
+    # Raises IntegrityError when the code is already claimed, like the unique constraint used to.
+    await db.execute(insert(URLCode).values(short_url=short_url, created_at=created_at))
     db.add(new_url)
     await db.commit()
     await db.refresh(new_url)
+    await shared_url_cache.invalidate([short_url])
     return new_url
 
 
-async def update_db_url_click_count(db_url: URL, db: AsyncSession) -> URL:
-    db_url.click_count += 1
+async def get_db_duplicate_urls(
+    new_urls: Sequence[tuple[str, ExpirationOption]], db: AsyncSession
+) -> dict[tuple[str, ExpirationOption], URL]:
+    # Best effort: two concurrent requests for the same URL can still both create a link. Only links with
+    # the default redirect status are reused, so a request never gets back a link that redirects differently.
+    if not new_urls:
+        return {}
+
+    keys = {
+        get_url_dedup_key(original_url, expires_in): (original_url, expires_in) for original_url, expires_in in new_urls
+    }
+    stmt = (
+        select(URL)
+        .filter(URL.dedup_key.in_(keys), URL.is_active, URL.redirect_status == RedirectStatus.temporary_redirect.value)
+        .order_by(URL.id)
+    )
+    now = datetime.now(UTC)
+
+    duplicates = {}
+    for db_url in await db.scalars(stmt):
+        # The URL itself is compared too, so a hash collision can't hand out another link.
+        if db_url.dedup_key is None or keys[db_url.dedup_key][0] != db_url.original_url:
+            continue
+
+        original_url, expires_in = keys[db_url.dedup_key]
+
+        # A link is only reused while at least half of its lifetime is left.
+        delta = EXPIRATION_DELTAS.get(expires_in)
+        if delta is None or (db_url.expires_at is not None and db_url.expires_at - now >= delta / 2):
+            duplicates[original_url, expires_in] = db_url
+
+    return duplicates
+
+
+async def deactivate_expired_db_urls(batch_size: int, lock_id: int, db: AsyncSession) -> list[str] | None:
+    # Returns None when another worker holds the sweeper lock.
+    if not await db.scalar(select(func.pg_try_advisory_xact_lock(lock_id))):
+        await db.rollback()
+        return None
+
+    expired_ids = (
+        select(URL.id)
+        .filter(URL.is_active, URL.expires_at <= func.now())
+        .order_by(URL.expires_at)
+        .limit(batch_size)
+        .with_for_update(skip_locked=True)
+        .scalar_subquery()
+    )
+    stmt = (
+        update(URL)
+        .filter(URL.id.in_(expired_ids))
+        .values(is_active=False)
+        .returning(URL.short_url)
+        .execution_options(synchronize_session=False)
+    )
+    result = await db.scalars(stmt)
+    short_urls = list(result.all())
+    await db.commit()
+
+    await shared_url_cache.invalidate(short_urls)
+    return short_urls
+
+
+async def create_db_urls(
+    new_urls: list[tuple[str, str, ExpirationOption, bool, RedirectStatus]], db: AsyncSession
+) -> dict[str, CachedURL]:
+    # Returns only the rows that were inserted, keyed by short code; the rest hit an existing code.
+    created_at = datetime.now(UTC)
+    codes_stmt = (
+        insert(URLCode)
+        .values([{"short_url": short_url, "created_at": created_at} for short_url, *_ in new_urls])
+        .on_conflict_do_nothing(index_elements=[URLCode.short_url])
+        .returning(URLCode.short_url)
+    )
+    claimed = set(await db.scalars(codes_stmt))
+    if not claimed:
+        await db.rollback()
+        return {}
+
+    stmt = (
+        insert(URL)
+        .values(
+            [
+                {
+                    "short_url": short_url,
+                    "created_at": created_at,
+                    "original_url": original_url,
+                    "expires_at": get_expiration_datetime(expires_in),
+                    "is_custom_alias": is_custom_alias,
+                    "dedup_key": None if is_custom_alias else get_url_dedup_key(original_url, expires_in),
+                    "redirect_status": redirect_status.value,
+                }
+                for short_url, original_url, expires_in, is_custom_alias, redirect_status in new_urls
+                if short_url in claimed
+            ]
+        )
+        .returning(URL.short_url, URL.original_url, URL.expires_at, URL.is_active, URL.redirect_status)
+    )
+    result = await db.execute(stmt)
+    rows = result.all()
+    await db.commit()
+
+    await shared_url_cache.invalidate(row.short_url for row in rows)
+
+    return {
+        row.short_url: CachedURL(row.original_url, row.expires_at, row.is_active, row.redirect_status) for row in rows
+    }
+
+
+async def import_db_urls(records: Sequence[URLImportRecord], db: AsyncSession) -> set[str]:
+    # Returns the imported short codes; the rest were already claimed by an existing link.
+    await db.execute(
+        text(
+            "CREATE TEMPORARY TABLE IF NOT EXISTS url_imports "
+            "(short_url varchar(20) NOT NULL, original_url varchar NOT NULL, "
+            "expires_at timestamptz, click_count integer NOT NULL) ON COMMIT DELETE ROWS"
+        )
+    )
+    driver_connection = await get_driver_connection(db)
+    await driver_connection.copy_records_to_table("url_imports", records=records, columns=list(URLImportRecord._fields))
+
+    url_imports = table("url_imports", *(column(name) for name in URLImportRecord._fields))
+    claimed = (
+        insert(URLCode)
+        .from_select(["short_url"], select(url_imports.c.short_url))
+        .on_conflict_do_nothing(index_elements=[URLCode.short_url])
+        .returning(URLCode.short_url)
+        .cte("claimed")
+    )
+    stmt = (
+        insert(URL)
+        .from_select(
+            ["short_url", "original_url", "expires_at", "is_active", "click_count", "is_custom_alias", "created_at"],
+            select(
+                url_imports.c.short_url,
+                url_imports.c.original_url,
+                url_imports.c.expires_at,
+                or_(url_imports.c.expires_at.is_(None), url_imports.c.expires_at > func.now()),
+                url_imports.c.click_count,
+                # Imported codes were not drawn from this service's generators.
+                true(),
+                # The transaction's start time, which is also what the claims in url_codes default to.
+                func.now(),
+            ).join(claimed, claimed.c.short_url == url_imports.c.short_url),
+        )
+        .returning(URL.short_url)
+    )
+    imported = set(await db.scalars(stmt))
+    await db.commit()
+
+    await shared_url_cache.invalidate(imported)
+    return imported
+
+
+async def increment_db_url_click_counts(click_counts: Mapping[str, int], db: AsyncSession) -> None:
+    # Sorted so concurrent flushes from different workers lock rows in the same order.
+    counts = values(column("short_url", String), column("clicks", Integer), name="click_counts").data(
+        sorted(click_counts.items())
+    )
+    stmt = update(URL).filter(URL.short_url == counts.c.short_url).values(click_count=URL.click_count + counts.c.clicks)
+    await db.execute(stmt)
     await db.commit()
-    await db.refresh(db_url)
-    return db_url
 
 
 async def update_db_url_is_active(db_url: URL, db: AsyncSession) -> URL:
     db_url.is_active = False
     await db.commit()
     await db.refresh(db_url)
+    await shared_url_cache.invalidate([db_url.short_url])
     return db_url
+
+
+async def copy_db_click_events(events: Sequence[ClickEventRecord], db: AsyncSession) -> None:
+    driver_connection = await get_driver_connection(db)
+    await driver_connection.copy_records_to_table(
+        ClickEvent.__tablename__, records=events, columns=list(ClickEventRecord._fields)
+    )
+    await db.commit()
+
+
+async def rollup_db_click_events(lag: float, lock_id: int, db: AsyncSession) -> int | None:
+    # Returns None when another worker holds the rollup lock, otherwise the number of events rolled up.
+    if not await db.scalar(select(func.pg_try_advisory_xact_lock(lock_id))):
+        await db.rollback()
+        return None
+
+    state = await db.get(ClickRollupState, 1, with_for_update=True)
+    if state is None:
+        state = ClickRollupState(id=1, last_event_id=0)
+        db.add(state)
+
+    # Events copied less than `lag` ago are left for the next run, so ids from COPY transactions
+    # that were still in flight are not skipped past.
+    stmt = select(func.max(ClickEvent.id)).filter(
+        ClickEvent.id > state.last_event_id,
+        ClickEvent.ingested_at < func.now() - timedelta(seconds=lag),
+    )
+    last_event_id = await db.scalar(stmt)
+    if last_event_id is None:
+        await db.rollback()
+        return 0
+
+    rolled_up = await db.scalar(
+        select(func.count()).filter(ClickEvent.id > state.last_event_id, ClickEvent.id <= last_event_id)
+    )
+    for rollup, unit in ((ClickRollupHourly, "hour"), (ClickRollupDaily, "day")):
+        bucket_start = func.date_trunc(unit, ClickEvent.occurred_at, "UTC")
+        events = (
+            select(ClickEvent.short_url, bucket_start, func.count())
+            .filter(ClickEvent.id > state.last_event_id, ClickEvent.id <= last_event_id)
+            .group_by(ClickEvent.short_url, bucket_start)
+        )
+        insert_stmt = insert(rollup).from_select(["short_url", "bucket_start", "clicks"], events)
+        upsert_stmt = insert_stmt.on_conflict_do_update(
+            index_elements=[rollup.short_url, rollup.bucket_start],
+            set_={"clicks": rollup.clicks + insert_stmt.excluded.clicks},
+        )
+        await db.execute(upsert_stmt)
+
+    state.last_event_id = last_event_id
+    await db.commit()
+    return rolled_up or 0
+
+
+async def prune_db_click_events(retention: timedelta, batch_size: int, lock_id: int, db: AsyncSession) -> int | None:
+    # Returns None when another worker holds the prune lock, otherwise the number of events deleted.
+    # Only events the rollup has already counted are deleted; the timeseries is served from the rollups.
+    if not await db.scalar(select(func.pg_try_advisory_xact_lock(lock_id))):
+        await db.rollback()
+        return None
+
+    rolled_up_id = select(ClickRollupState.last_event_id).filter(ClickRollupState.id == 1).scalar_subquery()
+    expired_ids = (
+        select(ClickEvent.id)
+        .filter(ClickEvent.id <= rolled_up_id, ClickEvent.occurred_at < func.now() - retention)
+        .order_by(ClickEvent.id)
+        .limit(batch_size)
+    )
+    pruned = list(await db.scalars(delete(ClickEvent).filter(ClickEvent.id.in_(expired_ids)).returning(ClickEvent.id)))
+    await db.commit()
+    return len(pruned)
+
+
+async def get_db_click_timeseries(
+    short_url: str,
+    granularity: TimeseriesGranularity,
+    since: datetime,
+    until: datetime,
+    db: AsyncSession,
+) -> list[tuple[datetime, int]]:
+    rollup = ClickRollupHourly if granularity == TimeseriesGranularity.hour else ClickRollupDaily
+    stmt = (
+        select(rollup.bucket_start, rollup.clicks)
+        .filter(rollup.short_url == short_url, rollup.bucket_start >= since, rollup.bucket_start < until)
+        .order_by(rollup.bucket_start)
+    )
+    result = await db.execute(stmt)
+    return [(row.bucket_start, row.clicks) for row in result]
+
+
+async def merge_db_visitor_sketches(sketches: Mapping[tuple[str, datetime], HyperLogLog], db: AsyncSession) -> None:
+    # New buckets are inserted as-is; buckets that already exist are locked in key order so
+    # concurrent flushes from different workers merge into them one at a time.
+    keys = sorted(sketches)
+    insert_stmt = (
+        insert(VisitorSketch)
+        .values(
+            [
+                {
+                    "short_url": short_url,
+                    "bucket_start": bucket_start,
+                    "registers": sketches[short_url, bucket_start].to_bytes(),
+                }
+                for short_url, bucket_start in keys
+            ]
+        )
+        .on_conflict_do_nothing(index_elements=[VisitorSketch.short_url, VisitorSketch.bucket_start])
+        .returning(VisitorSketch.short_url, VisitorSketch.bucket_start)
+    )
+    inserted = {(row.short_url, row.bucket_start) for row in await db.execute(insert_stmt)}
+
+    existing_keys = [key for key in keys if key not in inserted]
+    if existing_keys:
+        stmt = (
+            select(VisitorSketch)
+            .filter(tuple_(VisitorSketch.short_url, VisitorSketch.bucket_start).in_(existing_keys))
+            .order_by(VisitorSketch.short_url, VisitorSketch.bucket_start)
+            .with_for_update()
+        )
+        for row in await db.scalars(stmt):
+            sketch = HyperLogLog.from_bytes(row.registers)
+            sketch.merge(sketches[row.short_url, row.bucket_start])
+            row.registers = sketch.to_bytes()
+
+    await db.commit()
+
+
+async def roll_up_db_visitor_sketches(
+    retention: timedelta, batch_size: int, lock_id: int, db: AsyncSession
+) -> int | None:
+    # Returns None when another worker holds the rollup lock, otherwise the number of links rolled up.
+    # Daily buckets older than `retention` are merged into the link's rollup bucket and deleted, so a link keeps
+    # at most one row per retained day plus one.
+    if not await db.scalar(select(func.pg_try_advisory_xact_lock(lock_id))):
+        await db.rollback()
+        return None
+
+    cutoff = func.date_trunc("day", func.now(), "UTC") - retention
+    expired = (VisitorSketch.bucket_start > VISITOR_SKETCH_ROLLUP_BUCKET, VisitorSketch.bucket_start < cutoff)
+    short_urls = select(VisitorSketch.short_url).filter(*expired).distinct().limit(batch_size)
+    stmt = (
+        delete(VisitorSketch)
+        .filter(VisitorSketch.short_url.in_(short_urls), *expired)
+        .returning(VisitorSketch.short_url, VisitorSketch.registers)
+    )
+
+    rollups: dict[tuple[str, datetime], HyperLogLog] = {}
+    for row in await db.execute(stmt):
+        sketch = HyperLogLog.from_bytes(row.registers)
+        key = (row.short_url, VISITOR_SKETCH_ROLLUP_BUCKET)
+        if key in rollups:
+            rollups[key].merge(sketch)
+        else:
+            rollups[key] = sketch
+
+    if not rollups:
+        await db.rollback()
+        return 0
+
+    # Commits the deletes together with the merged rollups.
+    await merge_db_visitor_sketches(rollups, db)
+    return len(rollups)
+
+
+async def get_db_visitor_sketch(short_url: str, db: AsyncSession) -> HyperLogLog | None:
+    # Buckets are unions of disjoint time ranges (the rollup bucket holds every day before the retained ones),
+    # so merging all of them estimates all-time uniques.
+    result = await db.scalars(select(VisitorSketch.registers).filter(VisitorSketch.short_url == short_url))
+
+    sketch = None
+    for registers in result:
+        bucket_sketch = HyperLogLog.from_bytes(registers)
+        if sketch is None:
+            sketch = bucket_sketch
+        else:
+            sketch.merge(bucket_sketch)
+
+    return sketch
+
+
+async def get_db_url_partitions(db: AsyncSession) -> dict[str, datetime]:
+    stmt = text(
+        "SELECT child.relname FROM pg_inherits "
+        "JOIN pg_class child ON child.oid = pg_inherits.inhrelid "
+        "WHERE pg_inherits.inhparent = 'urls'::regclass"
+    )
+    partitions = {}
+    for name in await db.scalars(stmt):
+        month_start = parse_url_partition_name(name)
+        if month_start is not None:
+            partitions[name] = month_start
+
+    return partitions
+
+
+async def create_db_url_partition(month_start: datetime, db: AsyncSession) -> str:
+    name = get_url_partition_name(month_start)
+    upper_bound = add_months(month_start, 1)
+    await db.execute(
+        text(
+            f"CREATE TABLE IF NOT EXISTS {name} PARTITION OF urls "
+            f"FOR VALUES FROM ('{month_start.isoformat()}') TO ('{upper_bound.isoformat()}')"
+        )
+    )
+    return name
+
+
+async def release_db_url_partition(name: str, retention: timedelta, drop: bool, db: AsyncSession) -> bool:
+    # A partition is released once none of its links can still resolve: every row expired more than
+    # `retention` ago. Links that never expire keep their partition.
+    is_retained = await db.scalar(
+        text(
+            f"SELECT EXISTS (SELECT 1 FROM {name} WHERE expires_at IS NULL OR expires_at > now() - :retention)"
+        ).bindparams(retention=retention)
+    )
+    if is_retained:
+        return False
+
+    # A detached partition can be attached again, so its codes stay reserved in url_codes. Dropped codes are freed
+    # for reuse, together with their click and visitor history so a new link with the same code starts from zero.
+    if drop:
+        for table in RELEASED_CODE_TABLES:
+            await db.execute(text(f"DELETE FROM {table} USING {name} WHERE {table}.short_url = {name}.short_url"))
+
+    await db.execute(text(f"ALTER TABLE urls DETACH PARTITION {name}"))
+    if drop:
+        await db.execute(text(f"DROP TABLE {name}"))
+
+    return True
+
+
+async def maintain_db_url_partitions(
+    months_ahead: int, retention: timedelta, drop: bool, lock_id: int, db: AsyncSession
+) -> tuple[list[str], list[str]] | None:
+    # Returns None when another worker holds the maintenance lock, otherwise the created and released partitions.
+    if not await db.scalar(select(func.pg_try_advisory_xact_lock(lock_id))):
+        await db.rollback()
+        return None
+
+    # Attaching and detaching briefly lock the parent table; give up rather than queue behind long queries.
+    await db.execute(text("SET LOCAL lock_timeout = '5s'"))
+
+    partitions = await get_db_url_partitions(db)
+    current_month = get_month_start(datetime.now(UTC))
+
+    created = []
+    for offset in range(months_ahead + 1):
+        month_start = add_months(current_month, offset)
+        if get_url_partition_name(month_start) not in partitions:
+            created.append(await create_db_url_partition(month_start, db))
+
+    released = []
+    for name, month_start in sorted(partitions.items(), key=lambda partition: partition[1]):
+        if add_months(month_start, 1) <= current_month and await release_db_url_partition(name, retention, drop, db):
+            released.append(name)
+
+    await db.commit()
+    return created, released
@@ -1,12 +1,147 @@
+import itertools
+import logging
+import time
 from collections.abc import AsyncGenerator
+from typing import Any
 
-from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+import asyncpg
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.orm import Session
+from sqlalchemy.pool import AsyncAdaptedQueuePool, ConnectionPoolEntry
 
 from app.config import settings
+from app.metrics import db_pool_checkout_wait, instrument_engine
 from app.models import Base
 
-engine = create_async_engine(settings.db_url)
-async_session_maker = async_sessionmaker(engine, expire_on_commit=False)
+logger = logging.getLogger(__name__)
+
+
+class InstrumentedPool(AsyncAdaptedQueuePool):
+    def __init__(self, *args: object, **kwargs: object) -> None:
+        super().__init__(*args, **kwargs)  # type: ignore[arg-type]
+        self.checkouts = 0
+        self.checkout_timeouts = 0
+        self.checkout_wait_seconds = 0.0
+        self.max_checkout_wait_seconds = 0.0
+
+    def _do_get(self) -> ConnectionPoolEntry:
+        # Time spent here is time a request waited for a free connection, including opening a new one.
+        started_at = time.perf_counter()
+        try:
+            return super()._do_get()
+        except PoolTimeoutError:
+            self.checkout_timeouts += 1
+            raise
+        finally:
+            waited = time.perf_counter() - started_at
+            self.checkouts += 1
+            self.checkout_wait_seconds += waited
+            self.max_checkout_wait_seconds = max(self.max_checkout_wait_seconds, waited)
+            db_pool_checkout_wait.observe(waited)
+
+    def stats(self) -> dict[str, int | float]:
+        capacity = self.size() + max(self._max_overflow, 0)
+        return {
+            "size": self.size(),
+            "checked_out": self.checkedout(),
+            "overflow": self.overflow(),
+            "utilization": self.checkedout() / capacity if capacity else 0.0,
+            "checkouts": self.checkouts,
+            "checkout_timeouts": self.checkout_timeouts,
+            "checkout_wait_seconds": self.checkout_wait_seconds,
+            "max_checkout_wait_seconds": self.max_checkout_wait_seconds,
+        }
+
+
+def create_engine(url: str) -> AsyncEngine:
+    async_engine = create_async_engine(
+        url,
+        poolclass=InstrumentedPool,
+        pool_size=settings.db_pool_size,
+        max_overflow=settings.db_max_overflow,
+        pool_timeout=settings.db_pool_timeout,
+        pool_recycle=settings.db_pool_recycle,
+        pool_pre_ping=settings.db_pool_pre_ping,
+        connect_args={
+            "statement_cache_size": settings.db_statement_cache_size,
+            "prepared_statement_cache_size": settings.db_prepared_statement_cache_size,
+            "command_timeout": settings.db_command_timeout,
+        },
+    )
+    if settings.metrics_enabled:
+        instrument_engine(async_engine.sync_engine)
+
+    return async_engine
+
+
+class ReplicaSession(Session):
+    # Connects to the replica on its first statement, not when opened, so requests answered from the cache
+    # never check out a replica connection. If that connect fails, the session moves to the primary for good.
+    def get_bind(self, *args: Any, **kwargs: Any) -> Engine | Connection:
+        if not is_replica_session(self):
+            return get_engine().sync_engine
+
+        return super().get_bind(*args, **kwargs)
+
+    def _connection_for_bind(self, engine: Any, execution_options: Any = None, **kwargs: Any) -> Connection:
+        try:
+            return super()._connection_for_bind(engine, execution_options, **kwargs)
+        except (OSError, SQLAlchemyError):
+            if not is_replica_session(self):
+                raise
+
+            logger.warning("Read replica unavailable, falling back to the primary", exc_info=True)
+            self.info["replica"] = False
+            return super()._connection_for_bind(get_engine().sync_engine, execution_options, **kwargs)
+
+
+# Engines are created by init_engines in the app lifespan (or by a script), not at import time, so importing
+# the app stays cheap. The session makers exist from the start and are bound then, so they can be imported anywhere.
+engine: AsyncEngine | None = None
+async_session_maker = async_sessionmaker(expire_on_commit=False)
+
+replica_engines: list[AsyncEngine] = []
+replica_session_makers: list[async_sessionmaker[AsyncSession]] = []
+_replica_cycle = itertools.cycle(replica_session_makers)
+
+
+def init_engines() -> None:
+    global engine, _replica_cycle  # noqa: PLW0603
+
+    engine = create_engine(settings.db_url)
+    async_session_maker.configure(bind=engine)
+
+    replica_engines[:] = [create_engine(url) for url in settings.read_replica_urls]
+    replica_session_makers[:] = [
+        async_sessionmaker(
+            replica_engine, expire_on_commit=False, sync_session_class=ReplicaSession, info={"replica": True}
+        )
+        for replica_engine in replica_engines
+    ]
+    _replica_cycle = itertools.cycle(replica_session_makers)
+
+
+def get_engine() -> AsyncEngine:
+    if engine is None:
+        raise RuntimeError("Database engines are not initialized, call init_engines() first.")
+
+    return engine
+
+
+async def dispose_engines() -> None:
+    global engine  # noqa: PLW0603
+
+    for e in [engine, *replica_engines]:
+        if e is not None:
+            await e.dispose()
+
+    engine = None
+    async_session_maker.configure(bind=None)
+    replica_engines.clear()
+    replica_session_makers.clear()
 
 
 async def get_session() -> AsyncGenerator[AsyncSession]:
@@ -14,6 +149,36 @@ async def get_session() -> AsyncGenerator[AsyncSession]:
         yield session
 
 
+def open_read_session() -> AsyncSession:
+    # No I/O here: a replica session only connects when it runs its first statement, see ReplicaSession.
+    if replica_session_makers:
+        return next(_replica_cycle)()
+
+    return async_session_maker()
+
+
+async def get_read_session() -> AsyncGenerator[AsyncSession]:
+    async with open_read_session() as session:
+        yield session
+
+
+def is_replica_session(session: AsyncSession | Session) -> bool:
+    return bool(session.info.get("replica"))
+
+
+def get_pool_stats() -> dict[str, dict[str, int | float]]:
+    engines = {"primary": engine} | {f"replica-{index}": e for index, e in enumerate(replica_engines)}
+    return {
+        name: e.pool.stats() for name, e in engines.items() if e is not None and isinstance(e.pool, InstrumentedPool)
+    }
+
+
+async def get_driver_connection(session: AsyncSession) -> asyncpg.Connection:
+    connection = await session.connection()
+    raw_connection = await connection.get_raw_connection()
+    return raw_connection.driver_connection
+
+
 async def init_db() -> None:
-    async with engine.begin() as conn:
+    async with get_engine().begin() as conn:
         await conn.run_sync(Base.metadata.create_all)
@@ -1,4 +1,4 @@
-from enum import Enum
+from enum import Enum, IntEnum
 
 
 class ExpirationOption(str, Enum):
@@ -9,3 +9,32 @@ class ExpirationOption(str, Enum):
     one_month = "30d"
     one_year = "365d"
     indefinite = "never"
+
+
+class UserAgentClass(str, Enum):
+    desktop = "desktop"
+    mobile = "mobile"
+    bot = "bot"
+    other = "other"
+
+
+class TimeseriesGranularity(str, Enum):
+    hour = "hour"
+    day = "day"
+
+
+class ExportFormat(str, Enum):
+    ndjson = "ndjson"
+    csv = "csv"
+
+
+class RedirectStatus(IntEnum):
+    # 301/308 may be cached by browsers and CDNs; 302/307 reach the server on every visit, so each click is counted.
+    moved_permanently = 301
+    found = 302
+    temporary_redirect = 307
+    permanent_redirect = 308
+
+    @property
+    def is_permanent(self) -> bool:
+        return self in (RedirectStatus.moved_permanently, RedirectStatus.permanent_redirect)
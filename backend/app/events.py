@@ -0,0 +1,105 @@
+import asyncio
+import logging
+from collections import deque
+from datetime import UTC, datetime, timedelta
+
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.config import settings
+from app.crud import copy_db_click_events, prune_db_click_events, rollup_db_click_events
+from app.database import async_session_maker
+from app.models import ClickEventRecord
+from app.utils import classify_user_agent, get_referrer_host
+
+logger = logging.getLogger(__name__)
+
+
+class ClickEventBuffer:
+    def __init__(self, session_maker: async_sessionmaker[AsyncSession], max_size: int, batch_size: int) -> None:
+        self.session_maker = session_maker
+        self.max_size = max_size
+        self.batch_size = batch_size
+        self._events: deque[ClickEventRecord] = deque(maxlen=max_size)
+        self._flush_lock = asyncio.Lock()
+        self._flush_task: asyncio.Task[None] | None = None
+        self.dropped = 0
+
+    def __len__(self) -> int:
+        return len(self._events)
+
+    def record(self, short_url: str, referrer: str | None, user_agent: str | None) -> None:
+        # A full ring buffer overwrites the oldest event rather than growing without bound.
+        if len(self._events) == self.max_size:
+            self.dropped += 1
+
+        self._events.append(
+            ClickEventRecord(
+                short_url=short_url,
+                occurred_at=datetime.now(UTC),
+                referrer_host=get_referrer_host(referrer),
+                user_agent_class=classify_user_agent(user_agent).value,
+            )
+        )
+
+        if len(self._events) >= self.batch_size and (self._flush_task is None or self._flush_task.done()):
+            self._flush_task = asyncio.create_task(self._flush_in_background())
+
+    async def flush(self) -> int:
+        flushed = 0
+
+        async with self._flush_lock:
+            while self._events:
+                batch = [self._events.popleft() for _ in range(min(self.batch_size, len(self._events)))]
+                try:
+                    async with self.session_maker() as session:
+                        await copy_db_click_events(batch, session)
+                except Exception:
+                    # Put the batch back in front; if newer events filled the buffer meanwhile, the oldest are lost.
+                    for index, event in enumerate(reversed(batch)):
+                        if len(self._events) == self.max_size:
+                            self.dropped += len(batch) - index
+                            break
+                        self._events.appendleft(event)
+                    raise
+
+                flushed += len(batch)
+
+        return flushed
+
+    async def _flush_in_background(self) -> None:
+        try:
+            await self.flush()
+        except Exception:
+            logger.exception("Failed to flush click events")
+
+
+async def rollup_click_events() -> int | None:
+    async with async_session_maker() as session:
+        return await rollup_db_click_events(settings.click_rollup_lag, settings.click_rollup_lock_id, session)
+
+
+async def prune_click_events() -> int:
+    pruned = 0
+
+    while True:
+        async with async_session_maker() as session:
+            count = await prune_db_click_events(
+                timedelta(days=settings.click_events_retention_days),
+                settings.click_events_prune_batch_size,
+                settings.click_events_prune_lock_id,
+                session,
+            )
+
+        if count is None:
+            break
+
+        pruned += count
+        if count < settings.click_events_prune_batch_size:
+            break
+
+    return pruned
+
+
+click_events = ClickEventBuffer(
+    async_session_maker, settings.click_events_buffer_size, settings.click_events_batch_size
+)
@@ -0,0 +1,65 @@
+import csv
+import io
+from collections.abc import AsyncGenerator, Sequence
+from contextlib import aclosing
+from datetime import datetime
+
+import anyio
+from fastapi.responses import StreamingResponse
+from sqlalchemy.engine import Row
+from starlette.types import Send
+
+from app.config import settings
+from app.constants import URL_EXPORT_COLUMNS
+from app.crud import stream_db_urls
+from app.database import open_read_session
+from app.enums import ExportFormat
+from app.serialization import dumps
+
+EXPORT_MEDIA_TYPES = {
+    ExportFormat.ndjson: "application/x-ndjson",
+    ExportFormat.csv: "text/csv",
+}
+
+
+def format_ndjson_rows(rows: Sequence[Row]) -> bytes:
+    return b"".join(dumps(row._asdict()) + b"\n" for row in rows)
+
+
+def format_csv_value(value: object) -> object:
+    return value.isoformat() if isinstance(value, datetime) else value
+
+
+def format_csv_rows(rows: Sequence[Sequence[object]]) -> bytes:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, lineterminator="\n")
+    writer.writerows([format_csv_value(value) for value in row] for row in rows)
+    return buffer.getvalue().encode()
+
+
+async def stream_url_export(
+    export_format: ExportFormat, active: bool | None, created_since: datetime | None, expired: bool | None
+) -> AsyncGenerator[bytes]:
+    # The session lives inside the generator so it stays open while the response streams, and each
+    # chunk is one fetch from the cursor, so memory stays flat however large the table is.
+    async with open_read_session() as session:
+        if export_format == ExportFormat.csv:
+            yield format_csv_rows([URL_EXPORT_COLUMNS])
+
+        batches = stream_db_urls(active, created_since, expired, settings.export_fetch_size, session)
+        async with aclosing(batches):
+            async for rows in batches:
+                yield format_csv_rows(rows) if export_format == ExportFormat.csv else format_ndjson_rows(rows)
+
+
+class ExportResponse(StreamingResponse):
+    body_iterator: AsyncGenerator[bytes]
+
+    async def stream_response(self, send: Send) -> None:
+        try:
+            await super().stream_response(send)
+        finally:
+            # A client disconnect stops streaming while the generator is parked on a yield; closing it
+            # here ends the cursor and returns the connection now rather than when it is garbage collected.
+            with anyio.CancelScope(shield=True):
+                await self.body_iterator.aclose()
@@ -0,0 +1,41 @@
+import time
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.cache import CachedURL
+from app.database import get_driver_connection
+from app.metrics import db_statement_duration
+
+# asyncpg prepares each query text once per connection and keeps it in its statement cache,
+# so these run as server-side prepared statements without compiling anything per request.
+# Matching created_at against the code's claim prunes them to one partition, like crud.is_claimed_url.
+IS_CLAIMED_URL_SQL = "short_url = $1 AND created_at = (SELECT created_at FROM url_codes WHERE short_url = $1)"
+
+LOOKUP_URL_SQL = (
+    f"SELECT original_url, expires_at, is_active, redirect_status FROM urls WHERE {IS_CLAIMED_URL_SQL} AND is_active"
+)
+
+REDIRECT_URL_SQL = f"""
+UPDATE urls
+SET click_count = click_count + CASE WHEN expires_at IS NOT NULL AND expires_at <= now() THEN 0 ELSE 1 END,
+    is_active = NOT (expires_at IS NOT NULL AND expires_at <= now())
+WHERE {IS_CLAIMED_URL_SQL} AND is_active
+RETURNING original_url, expires_at, is_active, redirect_status
+"""
+
+
+async def fetch_url(short_url: str, db: AsyncSession) -> CachedURL | None:
+    driver_connection = await get_driver_connection(db)
+    started_at = time.perf_counter()
+    row = await driver_connection.fetchrow(LOOKUP_URL_SQL, short_url)
+    # Raw driver calls bypass the engine events, so they are timed here.
+    db_statement_duration.observe(time.perf_counter() - started_at, ("SELECT",))
+    return CachedURL(*row) if row else None
+
+
+async def fetch_redirect_url(short_url: str, db: AsyncSession) -> CachedURL | None:
+    driver_connection = await get_driver_connection(db)
+    started_at = time.perf_counter()
+    row = await driver_connection.fetchrow(REDIRECT_URL_SQL, short_url)
+    db_statement_duration.observe(time.perf_counter() - started_at, ("UPDATE",))
+    return CachedURL(*row) if row else None
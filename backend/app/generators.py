@@ -0,0 +1,26 @@
+import asyncio
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import settings
+from app.crud import allocate_db_short_url_ids
+from app.utils import generate_sequential_short_url
+
+
+class SequenceShortURLGenerator:
+    def __init__(self, secret: str, block_size: int) -> None:
+        self.secret = secret
+        self.block_size = block_size
+        self._ids: list[int] = []
+        self._lock = asyncio.Lock()
+
+    async def next_short_url(self, db: AsyncSession) -> str:
+        async with self._lock:
+            if not self._ids:
+                # Reversed so ids are handed out in ascending order with cheap pops.
+                self._ids = sorted(await allocate_db_short_url_ids(self.block_size, db), reverse=True)
+
+            return generate_sequential_short_url(self._ids.pop(), self.secret)
+
+
+short_url_generator = SequenceShortURLGenerator(settings.short_url_secret, settings.short_url_id_block_size)
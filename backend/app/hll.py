@@ -0,0 +1,58 @@
+import hashlib
+import math
+
+from app.constants import HLL_MAX_PRECISION, HLL_MIN_PRECISION, HLL_SMALL_ALPHAS
+
+
+class HyperLogLog:
+    def __init__(self, precision: int, registers: bytes | None = None) -> None:
+        if not HLL_MIN_PRECISION <= precision <= HLL_MAX_PRECISION:
+            raise ValueError(f"Precision must be between {HLL_MIN_PRECISION} and {HLL_MAX_PRECISION}.")
+
+        self.precision = precision
+        self.size = 1 << precision
+        if registers is not None and len(registers) != self.size:
+            raise ValueError(f"Expected {self.size} registers, got {len(registers)}.")
+
+        self._registers = bytearray(registers) if registers is not None else bytearray(self.size)
+
+    @classmethod
+    def from_bytes(cls, registers: bytes) -> "HyperLogLog":
+        # One byte per register, so the register count alone determines the precision.
+        precision = len(registers).bit_length() - 1
+        if len(registers) != 1 << precision:
+            raise ValueError(f"Register count {len(registers)} is not a power of two.")
+
+        return cls(precision, registers)
+
+    def to_bytes(self) -> bytes:
+        return bytes(self._registers)
+
+    @property
+    def relative_error(self) -> float:
+        return 1.04 / math.sqrt(self.size)
+
+    def add(self, value: str) -> None:
+        hashed = int.from_bytes(hashlib.blake2b(value.encode(), digest_size=8).digest())
+        remaining_bits = 64 - self.precision
+        index = hashed >> remaining_bits
+        rank = remaining_bits - (hashed & ((1 << remaining_bits) - 1)).bit_length() + 1
+        self._registers[index] = max(self._registers[index], rank)
+
+    def merge(self, other: "HyperLogLog") -> None:
+        if other.precision != self.precision:
+            raise ValueError(f"Cannot merge sketches with precision {self.precision} and {other.precision}.")
+
+        self._registers = bytearray(map(max, self._registers, other._registers))
+
+    def estimate(self) -> int:
+        alpha = HLL_SMALL_ALPHAS.get(self.size) or 0.7213 / (1 + 1.079 / self.size)
+        raw_estimate = alpha * self.size**2 / math.fsum(2.0**-register for register in self._registers)
+
+        # Linear counting is more accurate while many registers are still empty; a 64-bit hash
+        # makes the large-range correction unnecessary.
+        empty_registers = self._registers.count(0)
+        if raw_estimate <= 2.5 * self.size and empty_registers:
+            return round(self.size * math.log(self.size / empty_registers))
+
+        return round(raw_estimate)
@@ -0,0 +1,173 @@
+"""Bulk-load links exported from another shortener into urls.
+
+Rows are (short_url, original_url, expires_at, click_count) as CSV with a header or as NDJSON. Rows that
+fail validation or whose short code is already taken are written to a reject file:
+
+    uv run python -m app.importer links.csv --rejects links.rejects.ndjson
+"""
+
+import argparse
+import asyncio
+import csv
+import sys
+import time
+from collections.abc import Callable, Iterator
+from pathlib import Path
+from typing import IO
+
+from pydantic import ValidationError
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.batch import format_validation_error, parse_batch_item
+from app.config import settings
+from app.crud import import_db_urls
+from app.database import async_session_maker, dispose_engines, init_engines
+from app.enums import ExportFormat
+from app.models import URLImportRecord
+from app.schemas import URLImportRow
+from app.serialization import dumps
+from app.shared_cache import shared_url_cache
+
+
+class ImportStats:
+    def __init__(self, clock: Callable[[], float] = time.perf_counter) -> None:
+        self._clock = clock
+        self.started_at = clock()
+        self.read = 0
+        self.imported = 0
+        self.rejected = 0
+
+    @property
+    def rows_per_second(self) -> float:
+        elapsed = self._clock() - self.started_at
+        return self.read / elapsed if elapsed > 0 else 0.0
+
+    def __str__(self) -> str:
+        return (
+            f"{self.read:,} read, {self.imported:,} imported, {self.rejected:,} rejected "
+            f"({self.rows_per_second:,.0f} rows/s)"
+        )
+
+
+def read_csv_rows(file: IO[str]) -> Iterator[tuple[int, object]]:
+    reader = csv.DictReader(file)
+    for row in reader:
+        # Empty cells fall back to the column defaults.
+        yield reader.line_num, {key: value for key, value in row.items() if value not in {"", None}}
+
+
+def read_ndjson_rows(file: IO[bytes]) -> Iterator[tuple[int, object]]:
+    for line_number, line in enumerate(file, start=1):
+        if line.strip():
+            yield line_number, parse_batch_item(line)
+
+
+def write_reject(rejects: IO[bytes], line_number: int, row: object, error: str) -> None:
+    rejects.write(dumps({"line": line_number, "row": row, "error": error}) + b"\n")
+
+
+async def import_chunk(
+    rows: list[tuple[int, object]], rejects: IO[bytes], stats: ImportStats, db: AsyncSession
+) -> None:
+    records: dict[str, tuple[int, object, URLImportRecord]] = {}
+
+    for line_number, row in rows:
+        try:
+            url = URLImportRow.model_validate(row)
+        except ValidationError as e:
+            write_reject(rejects, line_number, row, format_validation_error(e))
+            stats.rejected += 1
+            continue
+
+        # The first row for a code wins, whether the other one is in this chunk or an earlier one.
+        if url.short_url in records:
+            write_reject(rejects, line_number, row, f"Short URL {url.short_url} is already taken.")
+            stats.rejected += 1
+            continue
+
+        records[url.short_url] = (
+            line_number,
+            row,
+            URLImportRecord(url.short_url, str(url.original_url), url.expires_at, url.click_count),
+        )
+
+    stats.read += len(rows)
+    if not records:
+        return
+
+    imported = await import_db_urls([record for *_, record in records.values()], db)
+    stats.imported += len(imported)
+
+    for short_url, (line_number, row, _) in records.items():
+        if short_url not in imported:
+            write_reject(rejects, line_number, row, f"Short URL {short_url} is already taken.")
+            stats.rejected += 1
+
+
+async def import_urls(
+    rows: Iterator[tuple[int, object]],
+    rejects: IO[bytes],
+    chunk_size: int,
+    session_maker: async_sessionmaker[AsyncSession],
+    progress: Callable[[ImportStats], None] = lambda stats: None,
+) -> ImportStats:
+    stats = ImportStats()
+
+    # Each chunk commits on its own, so a failed chunk doesn't undo the ones before it.
+    async with session_maker() as session:
+        chunk: list[tuple[int, object]] = []
+        for row in rows:
+            chunk.append(row)
+
+            if len(chunk) >= chunk_size:
+                await import_chunk(chunk, rejects, stats, session)
+                progress(stats)
+                chunk = []
+
+        if chunk:
+            await import_chunk(chunk, rejects, stats, session)
+            progress(stats)
+
+    return stats
+
+
+async def run(path: Path, import_format: ExportFormat, rejects_path: Path, chunk_size: int) -> ImportStats:
+    def report(stats: ImportStats) -> None:
+        print(stats, file=sys.stderr)
+
+    init_engines()
+    try:
+        with rejects_path.open("wb") as rejects:
+            if import_format == ExportFormat.csv:
+                with path.open(newline="", encoding="utf-8") as text_file:
+                    return await import_urls(read_csv_rows(text_file), rejects, chunk_size, async_session_maker, report)
+
+            with path.open("rb") as binary_file:
+                return await import_urls(
+                    read_ndjson_rows(binary_file), rejects, chunk_size, async_session_maker, report
+                )
+    finally:
+        # Imported codes reach the running workers' filters only through these.
+        await shared_url_cache.resend_invalidations()
+        await dispose_engines()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("path", type=Path)
+    parser.add_argument("--format", choices=[value.value for value in ExportFormat], default=None)
+    parser.add_argument("--rejects", type=Path, default=None)
+    parser.add_argument("--chunk-size", type=int, default=settings.import_chunk_size)
+    args = parser.parse_args()
+
+    import_format = ExportFormat(args.format or ("csv" if args.path.suffix.lower() == ".csv" else "ndjson"))
+    rejects_path = args.rejects or args.path.with_name(f"{args.path.stem}.rejects.ndjson")
+
+    stats = asyncio.run(run(args.path, import_format, rejects_path, args.chunk_size))
+    print(f"done: {stats}", file=sys.stderr)
+    if stats.rejected:
+        print(f"rejected rows written to {rejects_path}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
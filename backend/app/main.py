@@ -1,19 +1,134 @@
+import asyncio
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
-from app.routers import qr, urls
+from app.clicks import click_aggregator
+from app.config import AppProfile, settings
+from app.crud import warm_up_url_cache
+from app.database import async_session_maker, dispose_engines, init_engines
+from app.events import click_events
+from app.metrics import MetricsMiddleware, measure_event_loop_lag
+from app.routers import cache, metrics, pool, redirects
+from app.shared_cache import shared_url_cache
+from app.tasks import cancel_task, run_periodically
+from app.url_filter import rebuild_url_filter
+from app.visitors import visitor_sketches
+
+ORIGINS = ["http://localhost:3000", "https://shortlink.lol"]
+
+
+def start_maintenance_tasks() -> list[asyncio.Task[None]]:
+    # Rollups, sweeps and partition upkeep write to the database, so redirect-only processes leave them to the
+    # api ones and never import them.
+    from app.events import prune_click_events, rollup_click_events  # noqa: PLC0415
+    from app.partitions import maintain_url_partitions  # noqa: PLC0415
+    from app.sweeper import sweep_expired_urls  # noqa: PLC0415
+    from app.visitors import roll_up_visitor_sketches  # noqa: PLC0415
+
+    tasks = []
+    if settings.click_events_enabled:
+        tasks.append(asyncio.create_task(run_periodically(settings.click_rollup_interval, rollup_click_events)))
+        tasks.append(asyncio.create_task(run_periodically(settings.click_events_prune_interval, prune_click_events)))
+    if settings.unique_visitors_enabled:
+        tasks.append(
+            asyncio.create_task(run_periodically(settings.unique_visitors_rollup_interval, roll_up_visitor_sketches))
+        )
+    if settings.sweeper_enabled:
+        tasks.append(asyncio.create_task(run_periodically(settings.sweeper_interval, sweep_expired_urls)))
+    if settings.url_partitions_enabled:
+        tasks.append(asyncio.create_task(run_periodically(settings.url_partitions_interval, maintain_url_partitions)))
+
+    return tasks
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI) -> AsyncIterator[None]:
+    init_engines()
+
+    is_redirect_only = app.state.profile == "redirect"
+    if settings.url_partitions_enabled and not is_redirect_only:
+        from app.partitions import maintain_url_partitions  # noqa: PLC0415
+
+        # Inserts fail without a partition for the current month, so make sure it exists before serving.
+        await maintain_url_partitions()
+
+    if settings.url_cache_warmup_size > 0:
+        async with async_session_maker() as session:
+            await warm_up_url_cache(settings.url_cache_warmup_size, session)
+
+    tasks = [asyncio.create_task(run_periodically(settings.click_flush_interval, click_aggregator.flush))]
+    if settings.click_events_enabled:
+        tasks.append(asyncio.create_task(run_periodically(settings.click_events_flush_interval, click_events.flush)))
+    if settings.unique_visitors_enabled:
+        tasks.append(
+            asyncio.create_task(run_periodically(settings.unique_visitors_flush_interval, visitor_sketches.flush))
+        )
+    if settings.metrics_enabled:
+        tasks.append(asyncio.create_task(run_periodically(settings.metrics_loop_lag_interval, measure_event_loop_lag)))
+    if not is_redirect_only:
+        tasks.extend(start_maintenance_tasks())
+    if shared_url_cache.backend is not None:
+        tasks.append(asyncio.create_task(shared_url_cache.listen()))
+        tasks.append(
+            asyncio.create_task(
+                run_periodically(settings.shared_cache_retry_interval, shared_url_cache.resend_invalidations)
+            )
+        )
+    if settings.url_filter_enabled:
+        # Built in the background; until then every code is looked up as before.
+        tasks.append(
+            asyncio.create_task(
+                run_periodically(settings.url_filter_rebuild_interval, rebuild_url_filter, immediately=True)
+            )
+        )
+
+    yield
+
+    for task in tasks:
+        await cancel_task(task)
+    await click_aggregator.flush()
+    await click_events.flush()
+    await visitor_sketches.flush()
+    if not is_redirect_only:
+        from app.rendering import qr_code_renderer  # noqa: PLC0415
+
+        qr_code_renderer.shutdown()
+    await shared_url_cache.resend_invalidations()
+    await shared_url_cache.close()
+    await dispose_engines()
+
+
+def create_app(profile: AppProfile = settings.app_profile) -> FastAPI:
+    app = FastAPI(lifespan=lifespan)
+    app.state.profile = profile
+
+    app.add_middleware(
+        CORSMiddleware,
+        allow_origins=ORIGINS,
+        allow_credentials=True,
+        allow_methods=["*"],
+        allow_headers=["*"],
+    )
+
+    if settings.metrics_enabled:
+        app.add_middleware(MetricsMiddleware)
+
+    app.include_router(cache.router)
+    app.include_router(metrics.router)
+    app.include_router(pool.router)
+    if profile != "redirect":
+        # Only imported here so redirect-only processes never load the write and admin routes or the QR renderer.
+        from app.routers import qr, urls  # noqa: PLC0415
 
-app = FastAPI()
+        app.include_router(urls.router)
+        app.include_router(qr.router)
+    if profile != "api":
+        app.include_router(redirects.router)
 
-origins = ["http://localhost:3000", "https://shortlink.lol"]
+    return app
 
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=origins,
-    allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
-)
 
-app.include_router(urls.router)
-app.include_router(qr.router)
+app = create_app()
@@ -0,0 +1,194 @@
+import asyncio
+import time
+from bisect import bisect_left
+from collections.abc import Iterator, Sequence
+from typing import Any
+
+from sqlalchemy import Engine, event
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.constants import LATENCY_BUCKETS, UNMATCHED_ROUTE
+
+# Metrics are only updated from the event loop thread (SQLAlchemy events and pool checkouts run
+# in greenlets on that same thread), so plain dict and list updates need no locking.
+
+Labels = tuple[str, ...]
+
+
+def format_labels(label_names: Sequence[str], labels: Labels, extra: str = "") -> str:
+    pairs = [f'{name}="{value}"' for name, value in zip(label_names, labels, strict=True)]
+    if extra:
+        pairs.append(extra)
+
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+class Counter:
+    def __init__(self, name: str, documentation: str, label_names: Sequence[str] = ()) -> None:
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(label_names)
+        self._values: dict[Labels, float] = {}
+
+    def inc(self, labels: Labels = (), amount: float = 1.0) -> None:
+        self._values[labels] = self._values.get(labels, 0.0) + amount
+
+    def value(self, labels: Labels = ()) -> float:
+        return self._values.get(labels, 0.0)
+
+    def collect(self) -> Iterator[str]:
+        yield f"# HELP {self.name} {self.documentation}"
+        yield f"# TYPE {self.name} counter"
+        for labels, value in self._values.items():
+            yield f"{self.name}{format_labels(self.label_names, labels)} {format_value(value)}"
+
+
+class Histogram:
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        label_names: Sequence[str] = (),
+        buckets: Sequence[float] = LATENCY_BUCKETS,
+    ) -> None:
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(label_names)
+        self.buckets = tuple(buckets)
+        # Per label set: one count per bucket plus +Inf, stored non-cumulatively so observe is a single increment.
+        self._counts: dict[Labels, list[int]] = {}
+        self._sums: dict[Labels, float] = {}
+
+    def observe(self, value: float, labels: Labels = ()) -> None:
+        counts = self._counts.get(labels)
+        if counts is None:
+            counts = self._counts[labels] = [0] * (len(self.buckets) + 1)
+            self._sums[labels] = 0.0
+
+        counts[bisect_left(self.buckets, value)] += 1
+        self._sums[labels] += value
+
+    def count(self, labels: Labels = ()) -> int:
+        return sum(self._counts.get(labels, ()))
+
+    def collect(self) -> Iterator[str]:
+        yield f"# HELP {self.name} {self.documentation}"
+        yield f"# TYPE {self.name} histogram"
+        for labels, counts in self._counts.items():
+            cumulative = 0
+            for upper_bound, count in zip((*self.buckets, float("inf")), counts, strict=True):
+                cumulative += count
+                le = f'le="{format_value(upper_bound)}"'
+                yield f"{self.name}_bucket{format_labels(self.label_names, labels, le)} {cumulative}"
+            yield f"{self.name}_sum{format_labels(self.label_names, labels)} {format_value(self._sums[labels])}"
+            yield f"{self.name}_count{format_labels(self.label_names, labels)} {cumulative}"
+
+
+def collect_samples(
+    name: str, documentation: str, kind: str, label_name: str, samples: dict[str, float]
+) -> Iterator[str]:
+    # For values that already live elsewhere (pool and cache counters) and are read at scrape time.
+    yield f"# HELP {name} {documentation}"
+    yield f"# TYPE {name} {kind}"
+    for label, value in samples.items():
+        yield f"{name}{format_labels((label_name,), (label,))} {format_value(value)}"
+
+
+class MetricsRegistry:
+    def __init__(self) -> None:
+        self._metrics: list[Counter | Histogram] = []
+
+    def counter(self, name: str, documentation: str, label_names: Sequence[str] = ()) -> Counter:
+        counter = Counter(name, documentation, label_names)
+        self._metrics.append(counter)
+        return counter
+
+    def histogram(self, name: str, documentation: str, label_names: Sequence[str] = ()) -> Histogram:
+        histogram = Histogram(name, documentation, label_names)
+        self._metrics.append(histogram)
+        return histogram
+
+    def collect(self) -> Iterator[str]:
+        for metric in self._metrics:
+            yield from metric.collect()
+
+
+class MetricsMiddleware:
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status_code = 500
+
+        async def send_with_status(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        started_at = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            # The router stores the matched route in the scope, so labels use the path template, not the raw path.
+            route = getattr(scope.get("route"), "path", UNMATCHED_ROUTE)
+            method = scope["method"]
+            http_request_duration.observe(time.perf_counter() - started_at, (method, route))
+            http_requests.inc((method, route, str(status_code)))
+
+
+def get_statement_operation(statement: str) -> str:
+    return statement.lstrip().split(None, 1)[0].upper() if statement.strip() else "UNKNOWN"
+
+
+def instrument_engine(sync_engine: Engine) -> None:
+    @event.listens_for(sync_engine, "before_cursor_execute")
+    def before_cursor_execute(conn: Any, cursor: Any, statement: str, *args: Any) -> None:
+        conn.info.setdefault("statement_started_at", []).append(time.perf_counter())
+
+    @event.listens_for(sync_engine, "after_cursor_execute")
+    def after_cursor_execute(conn: Any, cursor: Any, statement: str, *args: Any) -> None:
+        started_at = conn.info["statement_started_at"].pop()
+        db_statement_duration.observe(time.perf_counter() - started_at, (get_statement_operation(statement),))
+
+    @event.listens_for(sync_engine, "handle_error")
+    def handle_error(context: Any) -> None:
+        started_at = context.connection.info.get("statement_started_at") if context.connection else None
+        if started_at:
+            started_at.pop()
+
+
+async def measure_event_loop_lag() -> None:
+    # How long a callback that is ready to run waits for its turn on the loop.
+    loop = asyncio.get_running_loop()
+    started_at = loop.time()
+    await asyncio.sleep(0)
+    event_loop_lag.observe(loop.time() - started_at)
+
+
+registry = MetricsRegistry()
+
+http_requests = registry.counter(
+    "http_requests_total", "HTTP requests by method, route template and status code.", ("method", "route", "status")
+)
+http_request_duration = registry.histogram(
+    "http_request_duration_seconds", "HTTP request latency by method and route template.", ("method", "route")
+)
+db_statement_duration = registry.histogram(
+    "db_statement_duration_seconds", "Database statement latency by SQL operation.", ("operation",)
+)
+db_pool_checkout_wait = registry.histogram(
+    "db_pool_checkout_wait_seconds", "Time spent waiting for a pooled database connection."
+)
+event_loop_lag = registry.histogram("event_loop_lag_seconds", "Delay before a ready callback runs on the event loop.")
@@ -1,26 +1,66 @@
 from datetime import UTC, datetime
+from typing import NamedTuple
 
-from sqlalchemy import Boolean, DateTime, Integer, String
+from sqlalchemy import (
+    BigInteger,
+    Boolean,
+    DateTime,
+    Identity,
+    Index,
+    Integer,
+    LargeBinary,
+    Sequence,
+    SmallInteger,
+    String,
+    func,
+    text,
+)
 from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column
 
+from app.enums import RedirectStatus
+
 
 class Base(DeclarativeBase):
     pass
 
 
+short_url_id_seq = Sequence("short_url_id_seq", metadata=Base.metadata)
+
+
+class URLCode(Base):
+    # Partitioned tables can only enforce uniqueness per partition, so short codes are claimed here first.
+    __tablename__ = "url_codes"
+
+    short_url: Mapped[str] = mapped_column(String(20), primary_key=True)
+    # Equal to the link's urls.created_at, so lookups by code can be pruned to the partition holding it.
+    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+
+
 class URL(Base):
     __tablename__ = "urls"
+    __table_args__ = (
+        Index("ix_urls_short_url", "short_url"),
+        Index("ix_urls_active_id", "id", postgresql_where=text("is_active")),
+        Index("ix_urls_active_expires_at", "expires_at", postgresql_where=text("is_active")),
+        Index("ix_urls_active_dedup_key", "dedup_key", postgresql_where=text("is_active")),
+        {"postgresql_partition_by": "RANGE (created_at)"},
+    )
 
-    id: Mapped[int] = mapped_column(primary_key=True)
+    id: Mapped[int] = mapped_column(primary_key=True, autoincrement=True)
     original_url: Mapped[str] = mapped_column(String, nullable=False)
-    short_url: Mapped[str] = mapped_column(String(20), unique=True, nullable=False)
+    short_url: Mapped[str] = mapped_column(String(20), nullable=False)
     created_at: Mapped[datetime] = mapped_column(
-        DateTime(timezone=True), default=lambda: datetime.now(UTC), nullable=False
+        DateTime(timezone=True), primary_key=True, default=lambda: datetime.now(UTC), nullable=False
     )
     expires_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
     is_active: Mapped[bool] = mapped_column(Boolean, default=True, nullable=False)
     click_count: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
     is_custom_alias: Mapped[bool] = mapped_column(Boolean, default=False, nullable=False)
+    # sha256 of the expiry option and original_url; NULL for custom aliases, which are never reused.
+    dedup_key: Mapped[bytes | None] = mapped_column(LargeBinary(32), nullable=True)
+    redirect_status: Mapped[int] = mapped_column(
+        SmallInteger, default=RedirectStatus.temporary_redirect.value, server_default=text("307"), nullable=False
+    )
 
     def __repr__(self) -> str:
         return (
@@ -29,3 +69,61 @@ class URL(Base):
             f"expires_at={self.expires_at}, is_active={self.is_active}, "
             f"click_count={self.click_count}, is_custom_alias={self.is_custom_alias})>"
         )
+
+
+class ClickEvent(Base):
+    __tablename__ = "click_events"
+
+    id: Mapped[int] = mapped_column(BigInteger, Identity(), primary_key=True)
+    short_url: Mapped[str] = mapped_column(String(20), nullable=False)
+    occurred_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False)
+    referrer_host: Mapped[str | None] = mapped_column(String(255), nullable=True)
+    user_agent_class: Mapped[str] = mapped_column(String(16), nullable=False)
+    ingested_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+
+
+class ClickEventRecord(NamedTuple):
+    # Field order matches the columns copied into click_events.
+    short_url: str
+    occurred_at: datetime
+    referrer_host: str | None
+    user_agent_class: str
+
+
+class URLImportRecord(NamedTuple):
+    # Field order matches the columns copied into the url_imports staging table.
+    short_url: str
+    original_url: str
+    expires_at: datetime | None
+    click_count: int
+
+
+class ClickRollupHourly(Base):
+    __tablename__ = "click_rollups_hourly"
+
+    short_url: Mapped[str] = mapped_column(String(20), primary_key=True)
+    bucket_start: Mapped[datetime] = mapped_column(DateTime(timezone=True), primary_key=True)
+    clicks: Mapped[int] = mapped_column(BigInteger, nullable=False)
+
+
+class ClickRollupDaily(Base):
+    __tablename__ = "click_rollups_daily"
+
+    short_url: Mapped[str] = mapped_column(String(20), primary_key=True)
+    bucket_start: Mapped[datetime] = mapped_column(DateTime(timezone=True), primary_key=True)
+    clicks: Mapped[int] = mapped_column(BigInteger, nullable=False)
+
+
+class ClickRollupState(Base):
+    __tablename__ = "click_rollup_state"
+
+    id: Mapped[int] = mapped_column(primary_key=True)
+    last_event_id: Mapped[int] = mapped_column(BigInteger, default=0, nullable=False)
+
+
+class VisitorSketch(Base):
+    __tablename__ = "visitor_sketches"
+
+    short_url: Mapped[str] = mapped_column(String(20), primary_key=True)
+    bucket_start: Mapped[datetime] = mapped_column(DateTime(timezone=True), primary_key=True)
+    registers: Mapped[bytes] = mapped_column(LargeBinary, nullable=False)
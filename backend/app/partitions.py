@@ -0,0 +1,30 @@
+import logging
+from datetime import timedelta
+
+from app.config import settings
+from app.crud import maintain_db_url_partitions
+from app.database import async_session_maker
+
+logger = logging.getLogger(__name__)
+
+
+async def maintain_url_partitions() -> None:
+    async with async_session_maker() as session:
+        result = await maintain_db_url_partitions(
+            settings.url_partitions_months_ahead,
+            timedelta(days=settings.url_partitions_retention_days),
+            settings.url_partitions_retention_action == "drop",
+            settings.url_partitions_lock_id,
+            session,
+        )
+
+    if result is None:
+        return
+
+    created, released = result
+    if created:
+        logger.info(f"Created urls partitions {', '.join(created)}")
+    if released:
+        logger.info(
+            f"Released expired urls partitions {', '.join(released)} ({settings.url_partitions_retention_action})"
+        )
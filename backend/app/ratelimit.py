@@ -0,0 +1,119 @@
+import asyncio
+import time
+from collections import OrderedDict
+from collections.abc import AsyncIterator, Callable
+from contextlib import asynccontextmanager
+
+from app.config import RateLimitRule, settings
+
+
+class ConcurrencyLimitExceededError(Exception):
+    pass
+
+
+class TokenBucketLimiter:
+    def __init__(self, rate: float, burst: float, max_keys: int, clock: Callable[[], float] = time.monotonic) -> None:
+        self.rate = rate
+        self.burst = burst
+        self.max_keys = max_keys
+        self._clock = clock
+        # key -> (tokens, updated_at), ordered from least to most recently used.
+        self._buckets: OrderedDict[str, tuple[float, float]] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._buckets)
+
+    def acquire(self, key: str) -> float:
+        # Returns 0 when a token was taken, otherwise the seconds until one will be available.
+        now = self._clock()
+        self._evict_idle(now)
+
+        bucket = self._buckets.pop(key, None)
+        if bucket is None:
+            if len(self._buckets) >= self.max_keys:
+                self._buckets.popitem(last=False)
+            tokens = self.burst
+        else:
+            tokens = min(self.burst, bucket[0] + (now - bucket[1]) * self.rate)
+
+        if tokens >= 1:
+            tokens -= 1
+            retry_after = 0.0
+        else:
+            retry_after = (1 - tokens) / self.rate
+
+        self._buckets[key] = (tokens, now)
+        return retry_after
+
+    def _evict_idle(self, now: float) -> None:
+        # A bucket that has had time to refill is the same as a new one, so buckets idle that long are dropped,
+        # oldest first; this keeps memory proportional to the clients active within the last refill period.
+        refill_time = self.burst / self.rate
+        while self._buckets:
+            _, updated_at = next(iter(self._buckets.values()))
+            if updated_at + refill_time > now:
+                break
+
+            self._buckets.popitem(last=False)
+
+
+class RouteRateLimiter:
+    def __init__(self, rule: RateLimitRule, max_clients: int, clock: Callable[[], float] = time.monotonic) -> None:
+        # A rate of 0 turns that bucket off.
+        self.clients = (
+            TokenBucketLimiter(rule.client_rate, rule.client_burst, max_clients, clock)
+            if rule.client_rate > 0
+            else None
+        )
+        self.everyone = (
+            TokenBucketLimiter(rule.global_rate, rule.global_burst, 1, clock) if rule.global_rate > 0 else None
+        )
+
+    def acquire(self, client: str) -> float:
+        # The client is checked first so a single flooding client is turned away before it drains the global bucket.
+        if self.clients is not None and (retry_after := self.clients.acquire(client)) > 0:
+            return retry_after
+
+        if self.everyone is not None:
+            return self.everyone.acquire("")
+
+        return 0.0
+
+
+class ConcurrencyLimiter:
+    def __init__(self, max_concurrent: int, max_wait: float) -> None:
+        self.max_concurrent = max_concurrent
+        self.max_wait = max_wait
+        self._semaphore = asyncio.Semaphore(max_concurrent)
+
+    @asynccontextmanager
+    async def slot(self) -> AsyncIterator[None]:
+        # Callers wait at most max_wait for a slot and are shed after that, instead of queueing for a pool connection.
+        if self._semaphore.locked():
+            if self.max_wait <= 0:
+                raise ConcurrencyLimitExceededError
+
+            try:
+                async with asyncio.timeout(self.max_wait):
+                    await self._semaphore.acquire()
+            except TimeoutError:
+                raise ConcurrencyLimitExceededError from None
+        else:
+            await self._semaphore.acquire()
+
+        try:
+            yield
+        finally:
+            self._semaphore.release()
+
+
+def create_route_rate_limiter(route: str) -> RouteRateLimiter | None:
+    rule = settings.rate_limits.get(route)
+    if rule is None:
+        return None
+
+    return RouteRateLimiter(rule, settings.rate_limit_max_clients)
+
+
+# Shared by every write endpoint so together they never hold more connections than this.
+write_limiter = ConcurrencyLimiter(settings.write_concurrency_limit, settings.write_concurrency_max_wait)
@@ -0,0 +1,109 @@
+import asyncio
+import io
+import zipfile
+from collections import deque
+from collections.abc import AsyncIterator, Iterable
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Literal
+
+from app.cache import qr_code_cache
+from app.config import settings
+from app.utils import generate_qr_code, get_qr_code_etag
+
+
+class QRCodeRendererBusyError(Exception):
+    pass
+
+
+class QRCodeRenderer:
+    def __init__(self, executor_type: Literal["process", "thread"], max_workers: int, max_pending: int) -> None:
+        self.executor_type = executor_type
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self._executor: Executor | None = None
+        self._semaphore = asyncio.Semaphore(max_pending)
+
+    @property
+    def executor(self) -> Executor:
+        if self._executor is None:
+            if self.executor_type == "process":
+                self._executor = ProcessPoolExecutor(max_workers=self.max_workers)
+            else:
+                self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="qr-render")
+
+        return self._executor
+
+    async def render(self, url: str, wait: bool = False) -> bytes:
+        # Without wait, a full queue is reported to the caller instead of piling up more work.
+        if not wait and self._semaphore.locked():
+            raise QRCodeRendererBusyError
+
+        async with self._semaphore:
+            return await asyncio.get_running_loop().run_in_executor(self.executor, generate_qr_code, url)
+
+    async def render_cached(self, url: str, wait: bool = False) -> bytes:
+        etag = get_qr_code_etag(url)
+        qr_code_bytes = qr_code_cache.get(etag)
+        if qr_code_bytes is None:
+            qr_code_bytes = await self.render(url, wait)
+            qr_code_cache.set(etag, qr_code_bytes)
+
+        return qr_code_bytes
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+class ZipStream(io.RawIOBase):
+    def __init__(self) -> None:
+        self._chunks: list[bytes] = []
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data: bytes) -> int:  # type: ignore[override]
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+async def stream_qr_code_archive(renderer: QRCodeRenderer, short_urls: Iterable[str]) -> AsyncIterator[bytes]:
+    stream = ZipStream()
+    pending: deque[tuple[str, asyncio.Task[bytes]]] = deque()
+    short_urls = iter(short_urls)
+
+    def schedule() -> None:
+        short_url = next(short_urls, None)
+        if short_url is not None:
+            url = f"{settings.base_url}/{short_url}"
+            pending.append((short_url, asyncio.create_task(renderer.render_cached(url, wait=True))))
+
+    # Keep one render in flight per worker and emit entries in request order as they finish.
+    for _ in range(renderer.max_workers):
+        schedule()
+
+    try:
+        with zipfile.ZipFile(stream, mode="w", compression=zipfile.ZIP_STORED) as archive:
+            while pending:
+                short_url, task = pending.popleft()
+                qr_code_bytes = await task
+                schedule()
+
+                archive.writestr(f"{short_url}.png", qr_code_bytes)
+                yield stream.drain()
+
+        yield stream.drain()
+    finally:
+        for _, task in pending:
+            task.cancel()
+
+
+qr_code_renderer = QRCodeRenderer(
+    settings.qr_render_executor, settings.qr_render_workers, settings.qr_render_max_pending
+)
@@ -0,0 +1,13 @@
+from fastapi import APIRouter
+
+from app.bloom import short_url_filter
+from app.cache import url_cache
+from app.schemas import CacheStats
+from app.shared_cache import shared_url_cache
+
+router = APIRouter()
+
+
+@router.get("/cache/stats")
+async def get_cache_stats() -> CacheStats:
+    return CacheStats.model_validate({**url_cache.stats(), **shared_url_cache.stats(), **short_url_filter.stats()})
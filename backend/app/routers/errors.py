@@ -0,0 +1,20 @@
+import math
+from typing import NoReturn
+
+from fastapi import HTTPException
+
+
+def raise_bad_request(message: str) -> NoReturn:
+    raise HTTPException(status_code=400, detail=message)
+
+
+def raise_not_found(message: str) -> NoReturn:
+    raise HTTPException(status_code=404, detail=message)
+
+
+def raise_too_many_requests(message: str, retry_after: float) -> NoReturn:
+    raise HTTPException(status_code=429, detail=message, headers={"Retry-After": str(math.ceil(retry_after))})
+
+
+def raise_service_unavailable(message: str) -> NoReturn:
+    raise HTTPException(status_code=503, detail=message, headers={"Retry-After": "1"})
@@ -0,0 +1,82 @@
+from collections.abc import Iterator
+
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+
+from app.bloom import short_url_filter
+from app.cache import url_cache
+from app.database import get_pool_stats
+from app.metrics import collect_samples, registry
+from app.shared_cache import shared_url_cache
+
+router = APIRouter()
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def collect_pool_metrics() -> Iterator[str]:
+    pool_stats = get_pool_stats()
+    gauges = {"checked_out": "Connections currently checked out.", "utilization": "Checked out share of capacity."}
+    counters = {
+        "checkouts": "Connection checkouts.",
+        "checkout_timeouts": "Checkouts that timed out waiting for a connection.",
+    }
+
+    for key, documentation in gauges.items():
+        samples = {pool: stats[key] for pool, stats in pool_stats.items()}
+        yield from collect_samples(f"db_pool_{key}", documentation, "gauge", "pool", samples)
+    for key, documentation in counters.items():
+        samples = {pool: stats[key] for pool, stats in pool_stats.items()}
+        yield from collect_samples(f"db_pool_{key}_total", documentation, "counter", "pool", samples)
+
+
+def collect_cache_metrics() -> Iterator[str]:
+    stats = url_cache.stats()
+    yield from collect_samples(
+        "url_cache_size", "Entries in the redirect cache.", "gauge", "cache", {"url": stats["size"]}
+    )
+    for key in ("hits", "misses", "evictions"):
+        yield from collect_samples(
+            f"url_cache_{key}_total", f"Redirect cache {key}.", "counter", "cache", {"url": stats[key]}
+        )
+
+    shared_stats = shared_url_cache.stats()
+    for key in ("shared_hits", "shared_misses", "shared_errors"):
+        yield from collect_samples(
+            f"url_cache_{key}_total",
+            f"Shared cache tier {key.removeprefix('shared_')}.",
+            "counter",
+            "cache",
+            {"url": shared_stats[key]},
+        )
+    yield from collect_samples(
+        "url_cache_coalesced_total",
+        "Lookups that waited on a concurrent miss instead of querying.",
+        "counter",
+        "cache",
+        {"url": shared_stats["coalesced"]},
+    )
+
+    filter_stats = short_url_filter.stats()
+    gauges = {
+        "items": "Codes added to the short code filter.",
+        "memory_bytes": "Memory held by the short code filter.",
+        "false_positive_rate": "Estimated false positive rate of the short code filter.",
+    }
+    for key, documentation in gauges.items():
+        yield from collect_samples(
+            f"url_filter_{key}", documentation, "gauge", "cache", {"url": filter_stats[f"filter_{key}"]}
+        )
+    yield from collect_samples(
+        "url_filter_rejections_total",
+        "Lookups answered 404 by the short code filter without a query.",
+        "counter",
+        "cache",
+        {"url": filter_stats["filter_rejections"]},
+    )
+
+
+@router.get("/metrics", include_in_schema=False)
+async def get_metrics() -> PlainTextResponse:
+    lines = [*registry.collect(), *collect_pool_metrics(), *collect_cache_metrics()]
+    return PlainTextResponse("\n".join(lines) + "\n", media_type=PROMETHEUS_CONTENT_TYPE)
@@ -0,0 +1,11 @@
+from fastapi import APIRouter
+
+from app.database import get_pool_stats
+from app.schemas import PoolStats
+
+router = APIRouter()
+
+
+@router.get("/pool/stats")
+async def get_connection_pool_stats() -> dict[str, PoolStats]:
+    return {name: PoolStats.model_validate(stats) for name, stats in get_pool_stats().items()}
@@ -1,26 +1,74 @@
-from io import BytesIO
+from typing import Annotated
 
-from fastapi import APIRouter, Depends
-from fastapi.responses import StreamingResponse
+from fastapi import APIRouter, Depends, Header
+from fastapi.responses import Response, StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.config import settings
-from app.database import get_session
-from app.routers.urls import get_url_or_404
-from app.utils import generate_qr_code
+from app.crud import get_db_active_short_urls
+from app.database import get_read_session
+from app.rendering import QRCodeRendererBusyError, qr_code_renderer, stream_qr_code_archive
+from app.routers.errors import raise_bad_request, raise_not_found, raise_service_unavailable
+from app.routers.redirects import get_cached_url_or_404
+from app.schemas import QRCodeBatchRequest
+from app.utils import get_qr_code_etag
 
 router = APIRouter()
 
 
+def etag_matches(etag: str, if_none_match: str | None) -> bool:
+    if not if_none_match:
+        return False
+
+    candidates = {candidate.strip().removeprefix("W/") for candidate in if_none_match.split(",")}
+    return "*" in candidates or etag in candidates
+
+
+@router.post("/qr/batch")
+async def get_qr_code_archive(
+    request: QRCodeBatchRequest, db: AsyncSession = Depends(get_read_session)
+) -> StreamingResponse:
+    short_urls = list(dict.fromkeys(request.short_urls))
+    if len(short_urls) > settings.qr_batch_max_items:
+        raise_bad_request(f"At most {settings.qr_batch_max_items} QR codes can be requested at once.")
+
+    existing = await get_db_active_short_urls(short_urls, db)
+    missing = [short_url for short_url in short_urls if short_url not in existing]
+    if missing:
+        raise_not_found(f"URLs {', '.join(missing)} don't exist.")
+
+    return StreamingResponse(
+        stream_qr_code_archive(qr_code_renderer, short_urls),
+        media_type="application/zip",
+        headers={"Content-Disposition": "attachment; filename=qr-codes.zip"},
+    )
+
+
 @router.get("/qr/{short_url}")
-async def get_qr_code(short_url: str, db: AsyncSession = Depends(get_session)) -> StreamingResponse:
-    _ = await get_url_or_404(short_url, db)
+async def get_qr_code(
+    short_url: str,
+    db: AsyncSession = Depends(get_read_session),
+    if_none_match: Annotated[str | None, Header()] = None,
+) -> Response:
+    _ = await get_cached_url_or_404(short_url, db)
 
     short_url = f"{settings.base_url}/{short_url}"
-    qr_code_bytes = generate_qr_code(short_url)
+    etag = get_qr_code_etag(short_url)
+    headers = {
+        "ETag": etag,
+        "Cache-Control": f"public, max-age={settings.qr_cache_max_age}, immutable",
+    }
 
-    return StreamingResponse(
-        BytesIO(qr_code_bytes),
+    if etag_matches(etag, if_none_match):
+        return Response(status_code=304, headers=headers)
+
+    try:
+        qr_code_bytes = await qr_code_renderer.render_cached(short_url)
+    except QRCodeRendererBusyError:
+        raise_service_unavailable("QR code renderer is busy, try again later.")
+
+    return Response(
+        qr_code_bytes,
         media_type="image/png",
-        headers={"Content-Disposition": "inline; filename=qr.png"},
+        headers={**headers, "Content-Disposition": "inline; filename=qr.png"},
     )
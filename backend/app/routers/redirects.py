@@ -0,0 +1,137 @@
+from datetime import UTC, datetime
+from typing import Annotated
+
+from fastapi import APIRouter, Depends, Header, Request
+from fastapi.responses import RedirectResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.bloom import short_url_filter
+from app.cache import CachedURL
+from app.clicks import click_aggregator
+from app.config import settings
+from app.constants import REDIRECT_SURROGATE_KEY, REDIRECT_SURROGATE_KEY_PREFIX
+from app.crud import get_cached_db_url, lookup_db_url, redirect_db_url
+from app.database import async_session_maker, get_read_session, is_replica_session
+from app.enums import RedirectStatus
+from app.events import click_events
+from app.routers.errors import raise_not_found
+from app.schemas import URLCheckResponse
+from app.shared_cache import shared_url_cache
+from app.utils import get_redirect_max_age
+from app.visitors import visitor_sketches
+
+# Everything a redirect-only deployment serves, kept apart from the write and admin routes so that profile
+# doesn't import them. /{short_url} matches any single segment, so this router is included last.
+router = APIRouter()
+
+
+async def get_cached_url_or_404(short_url: str, db: AsyncSession) -> CachedURL:
+    if not short_url_filter.might_exist(short_url):
+        raise_not_found(f"URL '{short_url}' doesn't exist.")
+
+    cached_url = await get_cached_db_url(short_url, db)
+    if not cached_url:
+        raise_not_found(f"URL '{short_url}' doesn't exist.")
+
+    return cached_url
+
+
+async def get_redirect_url_or_404(short_url: str, db: AsyncSession) -> CachedURL:
+    # Checked before the cache so probes for random codes don't crowd real entries out of it.
+    if not short_url_filter.might_exist(short_url):
+        raise_not_found(f"URL '{short_url}' doesn't exist.")
+
+    cached_url = await shared_url_cache.get(short_url)
+    if cached_url is not None:
+        if not cached_url.is_active:
+            raise_not_found(f"URL '{short_url}' doesn't exist.")
+
+        click_aggregator.record(short_url)
+        return cached_url
+
+    # Concurrent misses for one code share a single database round trip; the clicks of the
+    # callers that didn't run it are counted through the aggregator instead.
+    cached_url, is_loader = await shared_url_cache.coalesce(
+        f"redirect:{short_url}", lambda: resolve_redirect_url(short_url, db)
+    )
+    if not cached_url:
+        raise_not_found(f"URL '{short_url}' doesn't exist.")
+
+    if not cached_url.is_active:
+        raise_not_found(f"URL '{short_url}' is expired.")
+
+    if not is_loader:
+        click_aggregator.record(short_url)
+
+    return cached_url
+
+
+async def resolve_redirect_url(short_url: str, db: AsyncSession) -> CachedURL | None:
+    if not is_replica_session(db):
+        return await redirect_db_url(short_url, db)
+
+    cached_url = await lookup_db_url(short_url, db)
+    if cached_url is not None and (cached_url.expires_at is None or cached_url.expires_at > datetime.now(UTC)):
+        await shared_url_cache.set(short_url, cached_url)
+        click_aggregator.record(short_url)
+        return cached_url
+
+    # Replicas may not have a link that was just created yet and can't deactivate expired
+    # ones, so anything but a live hit is resolved on the primary.
+    async with async_session_maker() as session:
+        return await redirect_db_url(short_url, session)
+
+
+async def get_visitor_id(request: Request, user_agent: Annotated[str | None, Header()] = None) -> str | None:
+    if not settings.unique_visitors_enabled:
+        return None
+
+    client_host = request.client.host if request.client else ""
+    return f"{client_host}|{user_agent or ''}"
+
+
+@router.get("/{short_url}")
+async def redirect_to_original_url(
+    short_url: str,
+    db: AsyncSession = Depends(get_read_session),
+    referer: Annotated[str | None, Header()] = None,
+    user_agent: Annotated[str | None, Header()] = None,
+    visitor_id: Annotated[str | None, Depends(get_visitor_id)] = None,
+) -> RedirectResponse:
+    cached_url = await get_redirect_url_or_404(short_url, db)
+
+    if settings.click_events_enabled:
+        click_events.record(short_url, referer, user_agent)
+    if visitor_id is not None:
+        visitor_sketches.record(short_url, visitor_id)
+
+    return build_redirect_response(short_url, cached_url)
+
+
+def build_redirect_response(short_url: str, cached_url: CachedURL) -> RedirectResponse:
+    # Only permanent redirects may be cached; temporary ones have to reach us for every click to be counted.
+    redirect_status = RedirectStatus(cached_url.redirect_status)
+    max_age = (
+        get_redirect_max_age(cached_url.expires_at, settings.redirect_cache_max_age)
+        if redirect_status.is_permanent
+        else 0
+    )
+
+    headers = {"Cache-Control": f"public, max-age={max_age}" if max_age > 0 else "no-store"}
+    if max_age > 0 and settings.redirect_surrogate_keys_enabled:
+        headers["Surrogate-Key"] = f"{REDIRECT_SURROGATE_KEY} {REDIRECT_SURROGATE_KEY_PREFIX}{short_url}"
+
+    return RedirectResponse(cached_url.original_url, status_code=redirect_status, headers=headers)
+
+
+@router.get("/check/{short_url}")
+async def check_url_exists(short_url: str, db: AsyncSession = Depends(get_read_session)) -> URLCheckResponse:
+    try:
+        cached_url = await get_cached_url_or_404(short_url, db)
+
+        if cached_url.expires_at and cached_url.expires_at <= datetime.now(UTC):
+            raise_not_found(f"URL '{short_url}' is expired.")
+
+        return URLCheckResponse(exists=True, short_url=short_url)
+    except Exception:
+        raise_not_found(f"URL '{short_url}' doesn't exist.")
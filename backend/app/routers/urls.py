@@ -1,35 +1,72 @@
 import math
+from collections.abc import AsyncGenerator, Callable
 from datetime import UTC, datetime
-from typing import Annotated, NoReturn
+from typing import Annotated
 
-from fastapi import APIRouter, Depends, HTTPException, Query
-from fastapi.responses import RedirectResponse
+from fastapi import APIRouter, Depends, Query, Request
+from fastapi.responses import Response, StreamingResponse
 from pydantic import HttpUrl
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.constants import MAX_ATTEMPTS
+from app.batch import iter_items, iter_ndjson, spool_request_body, stream_batch_results
+from app.config import settings
+from app.constants import MAX_ATTEMPTS, TIMESERIES_DEFAULT_WINDOWS
 from app.crud import (
     check_db_url_exists,
     create_db_url,
+    get_db_click_timeseries,
+    get_db_duplicate_urls,
     get_db_url,
     get_db_urls,
-    update_db_url_click_count,
-    update_db_url_is_active,
+    get_db_urls_after,
+    get_db_visitor_sketch,
 )
-from app.database import get_session
+from app.database import async_session_maker, get_read_session, get_session
+from app.enums import ExportFormat, RedirectStatus, TimeseriesGranularity
+from app.export import EXPORT_MEDIA_TYPES, ExportResponse, stream_url_export
+from app.generators import short_url_generator
+from app.hll import HyperLogLog
 from app.models import URL
-from app.schemas import URLCheckResponse, URLCreate, URLListResponse, URLResponse, URLStats
-from app.utils import generate_short_url
+from app.ratelimit import ConcurrencyLimitExceededError, create_route_rate_limiter, write_limiter
+from app.routers.errors import raise_bad_request, raise_not_found, raise_service_unavailable, raise_too_many_requests
+from app.routers.redirects import get_cached_url_or_404
+from app.schemas import (
+    ClickTimeseriesPoint,
+    URLCreate,
+    URLListResponse,
+    URLResponse,
+    URLStats,
+    URLTimeseries,
+)
+from app.serialization import FastJSONResponse, url_response_row
+from app.utils import decode_cursor, encode_cursor, generate_short_url
 
 router = APIRouter()
 
 
-def raise_bad_request(message: str) -> None:
-    raise HTTPException(status_code=400, detail=message)
+def rate_limited(route: str) -> Callable[[Request], None]:
+    limiter = create_route_rate_limiter(route)
+
+    def check_rate_limit(request: Request) -> None:
+        # The setting is read per request so rate limiting can be switched off without rebuilding the routes.
+        if limiter is None or not settings.rate_limit_enabled:
+            return
+
+        retry_after = limiter.acquire(request.client.host if request.client else "")
+        if retry_after > 0:
+            raise_too_many_requests("Too many requests, try again later.", retry_after)
 
+    return check_rate_limit
 
-def raise_not_found(message: str) -> NoReturn:
-    raise HTTPException(status_code=404, detail=message)
+
+async def acquire_write_slot() -> AsyncGenerator[None]:
+    # Declared before the session dependency so a shed request never checks out a connection.
+    try:
+        async with write_limiter.slot():
+            yield
+    except ConcurrencyLimitExceededError:
+        raise_service_unavailable("Server is busy, try again later.")
 
 
 async def get_url_or_404(short_url: str, db: AsyncSession) -> URL:
@@ -40,14 +77,28 @@ async def get_url_or_404(short_url: str, db: AsyncSession) -> URL:
     return db_url
 
 
-@router.post("/shorten")
+@router.post("/shorten", dependencies=[Depends(rate_limited("POST /shorten")), Depends(acquire_write_slot)])
 async def create_short_url(url: URLCreate, db: AsyncSession = Depends(get_session)) -> URLResponse:
+    is_reusable = not url.custom_alias and url.redirect_status == RedirectStatus.temporary_redirect
+    if is_reusable and settings.url_dedup_enabled:
+        duplicates = await get_db_duplicate_urls([(str(url.original_url), url.expires_in)], db)
+        if duplicates:
+            existing_url = next(iter(duplicates.values()))
+            return URLResponse(
+                original_url=HttpUrl(existing_url.original_url),
+                short_url=existing_url.short_url,
+                is_active=existing_url.is_active,
+                expires_at=existing_url.expires_at,
+            )
+
     if url.custom_alias:
         if await check_db_url_exists(url.custom_alias, db):
             raise_bad_request(f"Alias {url.custom_alias} is already taken.")
 
         short_url = url.custom_alias
         is_custom_alias = True
+    elif settings.short_url_generator == "sequence":
+        return await create_sequential_short_url(url, db)
     else:
         for _ in range(MAX_ATTEMPTS):
             short_url = generate_short_url()
@@ -58,7 +109,9 @@ async def create_short_url(url: URLCreate, db: AsyncSession = Depends(get_sessio
 
         is_custom_alias = False
 
-    new_url = await create_db_url(short_url, str(url.original_url), url.expires_in, db, is_custom_alias)
+    new_url = await create_db_url(
+        short_url, str(url.original_url), url.expires_in, db, is_custom_alias, redirect_status=url.redirect_status
+    )
 
     return URLResponse(
         original_url=HttpUrl(new_url.original_url),
@@ -68,73 +121,135 @@ async def create_short_url(url: URLCreate, db: AsyncSession = Depends(get_sessio
     )
 
 
-@router.get("/urls")
+@router.post("/shorten/batch", dependencies=[Depends(rate_limited("POST /shorten/batch")), Depends(acquire_write_slot)])
+async def create_short_urls_batch(request: Request) -> StreamingResponse:
+    if request.headers.get("content-type", "").startswith("application/x-ndjson"):
+        items = iter_ndjson(await spool_request_body(request.stream()))
+    else:
+        try:
+            body = await request.json()
+        except ValueError:
+            raise_bad_request("Request body must be a JSON array or NDJSON.")
+
+        if not isinstance(body, list):
+            raise_bad_request("Request body must be a JSON array or NDJSON.")
+
+        items = iter_items(body)
+
+    return StreamingResponse(stream_batch_results(items, async_session_maker), media_type="application/x-ndjson")
+
+
+async def create_sequential_short_url(url: URLCreate, db: AsyncSession) -> URLResponse:
+    # Sequence codes are unique among themselves, so only a clash with a custom alias or a
+    # code from the random generator can fail the insert.
+    for _ in range(MAX_ATTEMPTS):
+        short_url = await short_url_generator.next_short_url(db)
+        try:
+            new_url = await create_db_url(
+                short_url, str(url.original_url), url.expires_in, db, redirect_status=url.redirect_status
+            )
+        except IntegrityError:
+            await db.rollback()
+        else:
+            return URLResponse(
+                original_url=HttpUrl(new_url.original_url),
+                short_url=new_url.short_url,
+                is_active=new_url.is_active,
+                expires_at=new_url.expires_at,
+            )
+
+    raise_bad_request("Failed to generate a unique short code.")
+
+
+@router.get("/urls", response_model=URLListResponse)
 async def get_all_urls(
-    db: AsyncSession = Depends(get_session),
+    db: AsyncSession = Depends(get_read_session),
     page: Annotated[int, Query(ge=1)] = 1,
     page_size: Annotated[int, Query(ge=1, le=100)] = 10,
-) -> URLListResponse:
-    skip = (page - 1) * page_size
-    urls, total = await get_db_urls(skip, page_size, db)
+    after: Annotated[str | None, Query()] = None,
+) -> Response:
+    if after is not None:
+        try:
+            after_id = decode_cursor(after)
+        except ValueError as e:
+            raise_bad_request(str(e))
+
+        urls, total = await get_db_urls_after(after_id, page_size, db)
+    else:
+        skip = (page - 1) * page_size
+        urls, total = await get_db_urls(skip, page_size, db)
 
     if not urls:
         raise_not_found("No URLs found")
 
     total_pages = math.ceil(total / page_size)
-
-    url_responses = [
-        URLResponse(
-            original_url=HttpUrl(url.original_url),
-            short_url=url.short_url,
-            is_active=url.is_active,
-            expires_at=url.expires_at,
-        )
-        for url in urls
-    ]
-
-    return URLListResponse(
-        urls=url_responses,
-        total=total,
-        page=page,
-        page_size=page_size,
-        total_pages=total_pages,
+    next_cursor = encode_cursor(urls[-1].id) if len(urls) == page_size else None
+
+    # Rows were validated on insert; building the body directly skips re-parsing every URL and
+    # FastAPI's second validation pass against the response model.
+    return FastJSONResponse(
+        {
+            "urls": [url_response_row(url) for url in urls],
+            "total": total,
+            "page": page,
+            "page_size": page_size,
+            "total_pages": total_pages,
+            "next_cursor": next_cursor,
+        }
     )
 
 
-@router.get("/stats/{short_url}")
-async def get_url_stats(short_url: str, db: AsyncSession = Depends(get_session)) -> URLStats:
-    db_url = await get_url_or_404(short_url, db)
-
-    return URLStats(
-        original_url=HttpUrl(db_url.original_url),
-        short_url=db_url.short_url,
-        created_at=db_url.created_at,
-        expires_at=db_url.expires_at,
-        is_active=db_url.is_active,
-        click_count=db_url.click_count,
+@router.get("/urls/export")
+async def export_urls(
+    export_format: Annotated[ExportFormat, Query(alias="format")] = ExportFormat.ndjson,
+    active: bool | None = None,
+    created_since: datetime | None = None,
+    expired: bool | None = None,
+) -> StreamingResponse:
+    return ExportResponse(
+        stream_url_export(export_format, active, created_since, expired),
+        media_type=EXPORT_MEDIA_TYPES[export_format],
+        headers={"Content-Disposition": f'attachment; filename="urls.{export_format.value}"'},
     )
 
 
-@router.get("/{short_url}")
-async def redirect_to_original_url(short_url: str, db: AsyncSession = Depends(get_session)) -> RedirectResponse:
+@router.get("/stats/{short_url}", response_model=URLStats)
+async def get_url_stats(short_url: str, db: AsyncSession = Depends(get_read_session)) -> Response:
     db_url = await get_url_or_404(short_url, db)
+    sketch = await get_db_visitor_sketch(short_url, db) or HyperLogLog(settings.unique_visitors_precision)
+
+    return FastJSONResponse(
+        {
+            **url_response_row(db_url),
+            "created_at": db_url.created_at,
+            "click_count": db_url.click_count,
+            "unique_visitors_estimate": sketch.estimate(),
+            "unique_visitors_relative_error": sketch.relative_error,
+        }
+    )
 
-    if db_url.expires_at and db_url.expires_at <= datetime.now(UTC):
-        await update_db_url_is_active(db_url, db)
-        raise_not_found(f"URL '{short_url}' is expired.")
-
-    await update_db_url_click_count(db_url, db)
-    return RedirectResponse(str(db_url.original_url))
-
-
-@router.get("/check/{short_url}")
-async def check_url_exists(short_url: str, db: AsyncSession = Depends(get_session)) -> URLCheckResponse:
-    try:
-        db_url = await get_url_or_404(short_url, db)
-
-        if db_url.expires_at and db_url.expires_at <= datetime.now(UTC):
-            raise_not_found(f"URL '{short_url}' is expired.")
 
-        return URLCheckResponse(exists=True, short_url=short_url)
-    except Exception:
-        raise_not_found(f"URL '{short_url}' doesn't exist.")
+@router.get("/stats/{short_url}/timeseries")
+async def get_url_timeseries(
+    short_url: str,
+    db: AsyncSession = Depends(get_read_session),
+    granularity: TimeseriesGranularity = TimeseriesGranularity.hour,
+    since: datetime | None = None,
+    until: datetime | None = None,
+) -> URLTimeseries:
+    _ = await get_cached_url_or_404(short_url, db)
+
+    until = until or datetime.now(UTC)
+    since = since or until - TIMESERIES_DEFAULT_WINDOWS[granularity]
+    if since >= until:
+        raise_bad_request("'since' must be earlier than 'until'.")
+
+    points = await get_db_click_timeseries(short_url, granularity, since, until, db)
+
+    return URLTimeseries(
+        short_url=short_url,
+        granularity=granularity,
+        since=since,
+        until=until,
+        points=[ClickTimeseriesPoint(bucket_start=bucket_start, clicks=clicks) for bucket_start, clicks in points],
+    )
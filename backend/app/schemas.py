@@ -1,8 +1,9 @@
-from datetime import datetime
+from datetime import UTC, datetime
 
 from pydantic import BaseModel, Field, HttpUrl, field_validator
 
-from app.enums import ExpirationOption
+from app.constants import RESERVED_SHORT_URLS
+from app.enums import ExpirationOption, RedirectStatus, TimeseriesGranularity
 
 
 class URLBase(BaseModel):
@@ -12,14 +13,14 @@ class URLBase(BaseModel):
 class URLCreate(URLBase):
     expires_in: ExpirationOption
     custom_alias: str | None = Field(None, min_length=3, max_length=20)
+    redirect_status: RedirectStatus = RedirectStatus.temporary_redirect
 
     @field_validator("custom_alias")
     def validate_custom_alias(cls, value: str | None) -> str | None:
         if value is None:
             return value
 
-        reserved_words = {"urls, shorten", "stats", "urls"}
-        if value.lower() in reserved_words:
+        if value.lower() in RESERVED_SHORT_URLS:
             raise ValueError(f"'{value}' is a reserved word and cannot be used as a custom alias.")
 
         if not value.replace("-", "").replace("_", "").isalnum():
@@ -34,12 +35,55 @@ class URLResponse(URLBase):
     expires_at: datetime | None
 
 
+class URLImportRow(BaseModel):
+    short_url: str = Field(min_length=1, max_length=20)
+    original_url: HttpUrl
+    expires_at: datetime | None = None
+    click_count: int = Field(0, ge=0)
+
+    @field_validator("short_url")
+    def validate_short_url(cls, value: str) -> str:
+        # Legacy codes keep their case; only codes that would shadow a route are refused.
+        if value.lower() in RESERVED_SHORT_URLS:
+            raise ValueError(f"'{value}' is a reserved word and cannot be used as a short URL.")
+
+        if not value.replace("-", "").replace("_", "").isalnum():
+            raise ValueError("Short URL can only contain letters, numbers, hyphens, and underscores.")
+
+        return value
+
+    @field_validator("expires_at")
+    def assume_utc(cls, value: datetime | None) -> datetime | None:
+        return value.replace(tzinfo=UTC) if value is not None and value.tzinfo is None else value
+
+
+class URLBatchResult(BaseModel):
+    index: int
+    url: URLResponse | None = None
+    error: str | None = None
+
+
 class URLStats(URLBase):
     short_url: str
     created_at: datetime
     expires_at: datetime | None
     is_active: bool
     click_count: int
+    unique_visitors_estimate: int
+    unique_visitors_relative_error: float
+
+
+class ClickTimeseriesPoint(BaseModel):
+    bucket_start: datetime
+    clicks: int
+
+
+class URLTimeseries(BaseModel):
+    short_url: str
+    granularity: TimeseriesGranularity
+    since: datetime
+    until: datetime
+    points: list[ClickTimeseriesPoint]
 
 
 class URLListResponse(BaseModel):
@@ -48,8 +92,42 @@ class URLListResponse(BaseModel):
     page: int
     page_size: int
     total_pages: int
+    next_cursor: str | None = None
 
 
 class URLCheckResponse(BaseModel):
     exists: bool
     short_url: str
+
+
+class CacheStats(BaseModel):
+    size: int
+    max_size: int
+    hits: int
+    misses: int
+    evictions: int
+    shared_hits: int
+    shared_misses: int
+    shared_errors: int
+    coalesced: int
+    filter_ready: bool
+    filter_items: int
+    filter_memory_bytes: int
+    filter_false_positive_rate: float
+    filter_rejections: int
+    filter_rebuilds: int
+
+
+class PoolStats(BaseModel):
+    size: int
+    checked_out: int
+    overflow: int
+    utilization: float
+    checkouts: int
+    checkout_timeouts: int
+    checkout_wait_seconds: float
+    max_checkout_wait_seconds: float
+
+
+class QRCodeBatchRequest(BaseModel):
+    short_urls: list[str] = Field(min_length=1)
@@ -0,0 +1,37 @@
+from datetime import datetime
+from typing import Any, TypedDict
+
+import orjson
+from fastapi.responses import Response
+
+from app.models import URL
+
+
+class URLResponseRow(TypedDict):
+    original_url: str
+    short_url: str
+    is_active: bool
+    expires_at: datetime | None
+
+
+def dumps(content: object) -> bytes:
+    # OPT_UTC_Z matches Pydantic's JSON output for UTC timestamps.
+    return orjson.dumps(content, option=orjson.OPT_UTC_Z)
+
+
+class FastJSONResponse(Response):
+    # Content is assumed to be built from trusted rows, so it is encoded without any model validation.
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+
+def url_response_row(url: URL) -> URLResponseRow:
+    # original_url was normalized by HttpUrl before it was stored, so it is emitted as-is.
+    return {
+        "original_url": url.original_url,
+        "short_url": url.short_url,
+        "is_active": url.is_active,
+        "expires_at": url.expires_at,
+    }
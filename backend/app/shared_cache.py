@@ -0,0 +1,411 @@
+import asyncio
+import json
+import logging
+import time
+import uuid
+from collections.abc import AsyncGenerator, AsyncIterator, Awaitable, Callable, Iterable
+from datetime import UTC, datetime
+from typing import Any, Protocol, TypeVar
+
+from redis.asyncio import BlockingConnectionPool, Redis
+from redis.exceptions import RedisError
+
+from app.bloom import ShortURLFilter, short_url_filter
+from app.cache import MISSING_URL, CachedURL, URLCache, url_cache
+from app.config import settings
+from app.constants import (
+    SHARED_CACHE_INVALIDATE_ALL,
+    SHARED_CACHE_INVALIDATION_CHANNEL,
+    SHARED_CACHE_KEY_PREFIX,
+    SHARED_CACHE_MAX_UNSENT_INVALIDATIONS,
+    SHARED_CACHE_TOMBSTONE,
+)
+from app.serialization import dumps
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+SHARED_CACHE_ERRORS = (OSError, TimeoutError, ValueError, RedisError)
+
+
+class SharedCacheBackend(Protocol):
+    async def get(self, key: str) -> bytes | None: ...
+
+    async def set(self, key: str, value: bytes, ttl: float, *, only_if_missing: bool = False) -> None: ...
+
+    async def set_many(self, keys: list[str], value: bytes, ttl: float) -> None: ...
+
+    async def publish(self, channel: str, message: bytes) -> None: ...
+
+    def subscribe(self, channel: str) -> AsyncIterator[bytes]: ...
+
+    async def close(self) -> None: ...
+
+
+class InMemorySharedCacheBackend:
+    # Stands in for a shared server within one process; workers are simulated by separate caches over it.
+    def __init__(self, clock: Callable[[], float] = time.monotonic) -> None:
+        self._clock = clock
+        self._entries: dict[str, tuple[float, bytes]] = {}
+        self._subscribers: dict[str, list[asyncio.Queue[bytes]]] = {}
+
+    async def get(self, key: str) -> bytes | None:
+        entry = self._entries.get(key)
+        if entry is None or entry[0] <= self._clock():
+            return None
+
+        return entry[1]
+
+    async def set(self, key: str, value: bytes, ttl: float, *, only_if_missing: bool = False) -> None:
+        entry = self._entries.get(key)
+        if only_if_missing and entry is not None and entry[0] > self._clock():
+            return
+
+        self._entries[key] = (self._clock() + ttl, value)
+
+    async def set_many(self, keys: list[str], value: bytes, ttl: float) -> None:
+        for key in keys:
+            await self.set(key, value, ttl)
+
+    async def publish(self, channel: str, message: bytes) -> None:
+        for queue in self._subscribers.get(channel, []):
+            queue.put_nowait(message)
+
+    async def subscribe(self, channel: str) -> AsyncIterator[bytes]:
+        queue: asyncio.Queue[bytes] = asyncio.Queue()
+        self._subscribers.setdefault(channel, []).append(queue)
+        try:
+            while True:
+                yield await queue.get()
+        finally:
+            self._subscribers[channel].remove(queue)
+
+    async def close(self) -> None:
+        self._entries.clear()
+
+
+class RedisSharedCacheBackend:
+    def __init__(self, url: str, pool_size: int, timeout: float) -> None:
+        self.url = url
+        self.timeout = timeout
+        # Callers wait up to `timeout` for a free connection instead of failing as soon as the pool is exhausted.
+        pool = BlockingConnectionPool.from_url(
+            url, max_connections=pool_size, timeout=timeout, socket_timeout=timeout, socket_connect_timeout=timeout
+        )
+        self.client = Redis(connection_pool=pool)
+
+    async def get(self, key: str) -> bytes | None:
+        value = await self.client.get(key)
+        return value if isinstance(value, bytes) else None
+
+    async def set(self, key: str, value: bytes, ttl: float, *, only_if_missing: bool = False) -> None:
+        await self.client.set(key, value, px=max(1, int(ttl * 1000)), nx=only_if_missing)
+
+    async def set_many(self, keys: list[str], value: bytes, ttl: float) -> None:
+        async with self.client.pipeline(transaction=False) as pipeline:
+            for key in keys:
+                pipeline.set(key, value, px=max(1, int(ttl * 1000)))
+            await pipeline.execute()
+
+    async def publish(self, channel: str, message: bytes) -> None:
+        await self.client.publish(channel, message)
+
+    async def subscribe(self, channel: str) -> AsyncGenerator[bytes]:
+        # A subscription waits for messages indefinitely, so it gets its own connection without the read timeout.
+        client = Redis.from_url(self.url, socket_connect_timeout=self.timeout)
+        try:
+            async with client.pubsub(ignore_subscribe_messages=True) as pubsub:
+                await pubsub.subscribe(channel)
+                async for message in pubsub.listen():
+                    if message["type"] == "message":
+                        yield message["data"]
+        finally:
+            await client.aclose()
+
+    async def close(self) -> None:
+        await self.client.aclose()
+
+
+def create_shared_cache_backend(url: str) -> SharedCacheBackend | None:
+    if not url:
+        return None
+
+    if url.startswith("memory://"):
+        return InMemorySharedCacheBackend()
+
+    if url.startswith(("redis://", "rediss://", "unix://")):
+        return RedisSharedCacheBackend(url, settings.shared_cache_pool_size, settings.shared_cache_timeout)
+
+    raise ValueError(f"Unsupported shared cache URL '{url}'.")
+
+
+def encode_cached_url(cached_url: CachedURL) -> bytes:
+    return dumps(list(cached_url))
+
+
+def decode_cached_url(value: bytes) -> CachedURL:
+    # Entries written before redirect_status was cached have no fourth item and take the default.
+    original_url, expires_at, is_active, *rest = json.loads(value)
+    return CachedURL(original_url, datetime.fromisoformat(expires_at) if expires_at else None, is_active, *rest)
+
+
+class TwoLevelURLCache:
+    def __init__(
+        self,
+        local: URLCache,
+        backend: SharedCacheBackend | None,
+        ttl: float,
+        retry_interval: float,
+        *,
+        invalidation_ttl: float = 5.0,
+        url_filter: ShortURLFilter | None = None,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.local = local
+        self.backend = backend
+        # Every code written goes through invalidate, so its broadcast doubles as the filter's feed of new codes.
+        self.url_filter = url_filter
+        self.ttl = ttl
+        self.invalidation_ttl = invalidation_ttl
+        self.retry_interval = retry_interval
+        # Tags published invalidations so a worker skips its own, which it has already applied.
+        self.origin = uuid.uuid4().hex
+        self._clock = clock
+        self._retry_at = 0.0
+        self._inflight: dict[str, asyncio.Future[Any]] = {}
+        # Codes being loaded from the database, and those of them invalidated since their load began.
+        self._loading: set[str] = set()
+        self._stale: set[str] = set()
+        # Invalidations not delivered yet, in order; past the limit only the overflow flag is kept.
+        self._unsent: dict[str, None] = {}
+        self._unsent_overflow = False
+        self.shared_hits = 0
+        self.shared_misses = 0
+        self.shared_errors = 0
+        self.coalesced = 0
+
+    async def get(self, short_url: str) -> CachedURL | None:
+        cached_url = self.local.get(short_url)
+        if cached_url is not None or self.backend is None:
+            return cached_url
+
+        value = await self._call_shared(lambda backend: backend.get(SHARED_CACHE_KEY_PREFIX + short_url))
+        if value is None or value == SHARED_CACHE_TOMBSTONE:
+            self.shared_misses += 1
+            return None
+
+        self.shared_hits += 1
+        cached_url = decode_cached_url(value)
+        if cached_url.is_active:
+            self.local.set(short_url, cached_url)
+        else:
+            self.local.set_missing(short_url)
+
+        return cached_url
+
+    async def get_or_load(self, short_url: str, loader: Callable[[], Awaitable[CachedURL | None]]) -> CachedURL | None:
+        cached_url = await self.get(short_url)
+        if cached_url is not None:
+            return cached_url
+
+        cached_url, is_loader = await self.coalesce(f"lookup:{short_url}", lambda: self._load(short_url, loader))
+        if is_loader:
+            if short_url in self._stale:
+                # Invalidated while loading, so the value may predate the change and isn't cached.
+                self._stale.discard(short_url)
+            elif cached_url is None:
+                await self.set_missing(short_url)
+            else:
+                await self.set(short_url, cached_url)
+
+        return cached_url
+
+    async def coalesce(self, key: str, loader: Callable[[], Awaitable[T]]) -> tuple[T, bool]:
+        # Concurrent callers for one key share a single loader call; the flag is True for the caller that ran it.
+        while (future := self._inflight.get(key)) is not None:
+            try:
+                result = await asyncio.shield(future)
+            except asyncio.CancelledError:
+                task = asyncio.current_task()
+                # The caller that was loading went away, not this one, so load again.
+                if future.cancelled() and (task is None or not task.cancelling()):
+                    continue
+                raise
+
+            self.coalesced += 1
+            return result, False
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            result = await loader()
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except BaseException as e:
+            future.set_exception(e)
+            # Marks the exception as retrieved for when nobody else was waiting on it.
+            future.exception()
+            raise
+        finally:
+            del self._inflight[key]
+
+        future.set_result(result)
+        return result, True
+
+    async def _load(self, short_url: str, loader: Callable[[], Awaitable[CachedURL | None]]) -> CachedURL | None:
+        self._loading.add(short_url)
+        self._stale.discard(short_url)
+        try:
+            return await loader()
+        finally:
+            self._loading.discard(short_url)
+
+    async def set(self, short_url: str, cached_url: CachedURL) -> None:
+        # Values come from database reads, so they only fill missing keys: one read just before an invalidation on
+        # another worker must not overwrite its tombstone and put the old value back for the whole TTL.
+        self.local.set(short_url, cached_url)
+
+        ttl = self.ttl
+        if cached_url.expires_at is not None:
+            ttl = min(ttl, (cached_url.expires_at - datetime.now(UTC)).total_seconds())
+        if ttl > 0:
+            value = encode_cached_url(cached_url)
+            await self._fill_shared(short_url, value, ttl)
+
+    async def set_missing(self, short_url: str) -> None:
+        self.local.set_missing(short_url)
+
+        ttl = self.local.negative_ttl
+        if ttl > 0:
+            value = encode_cached_url(MISSING_URL)
+            await self._fill_shared(short_url, value, ttl)
+
+    async def invalidate(self, short_urls: Iterable[str]) -> None:
+        short_urls = list(short_urls)
+        if not short_urls:
+            return
+
+        for short_url in short_urls:
+            self._invalidate_local(short_url)
+
+        await self._send_invalidations(short_urls)
+
+    async def resend_invalidations(self) -> None:
+        # Run periodically, so invalidations that couldn't be sent go out once the shared cache is back.
+        if self._unsent or self._unsent_overflow:
+            await self._send_invalidations([])
+
+    def apply_invalidation(self, message: bytes) -> None:
+        origin, *short_urls = message.decode().split(" ")
+        if origin == self.origin:
+            return
+
+        if short_urls == [SHARED_CACHE_INVALIDATE_ALL]:
+            self._invalidate_all()
+        else:
+            for short_url in short_urls:
+                self._invalidate_local(short_url)
+
+    def _invalidate_all(self) -> None:
+        self.local.clear()
+        if self.url_filter is not None:
+            self.url_filter.reset()
+
+    def _invalidate_local(self, short_url: str) -> None:
+        self.local.invalidate(short_url)
+        if short_url in self._loading:
+            self._stale.add(short_url)
+        if self.url_filter is not None:
+            self.url_filter.add(short_url)
+
+    async def listen(self) -> None:
+        if self.backend is None:
+            return
+
+        while True:
+            try:
+                async for message in self.backend.subscribe(SHARED_CACHE_INVALIDATION_CHANNEL):
+                    self.apply_invalidation(message)
+            except SHARED_CACHE_ERRORS:
+                logger.warning("Lost the shared cache invalidation subscription", exc_info=True)
+
+            # Invalidations published while disconnected are lost, so nothing local can be trusted.
+            self._invalidate_all()
+            await asyncio.sleep(self.retry_interval)
+
+    def stats(self) -> dict[str, int]:
+        return {
+            "shared_hits": self.shared_hits,
+            "shared_misses": self.shared_misses,
+            "shared_errors": self.shared_errors,
+            "coalesced": self.coalesced,
+        }
+
+    async def close(self) -> None:
+        if self.backend is not None:
+            await self.backend.close()
+
+    async def _fill_shared(self, short_url: str, value: bytes, ttl: float) -> None:
+        await self._call_shared(
+            lambda backend: backend.set(SHARED_CACHE_KEY_PREFIX + short_url, value, ttl, only_if_missing=True)
+        )
+
+    async def _send_invalidations(self, short_urls: list[str]) -> None:
+        # Other workers learn about new codes (for their filters) and changed ones only from these messages, so one
+        # that can't be sent now is kept, merged with later ones and sent again rather than dropped.
+        if self.backend is None:
+            return
+
+        self._unsent.update(dict.fromkeys(short_urls))
+        if len(self._unsent) > SHARED_CACHE_MAX_UNSENT_INVALIDATIONS:
+            self._unsent.clear()
+            self._unsent_overflow = True
+
+        if self._unsent_overflow:
+            # Too many to list; receivers drop everything they have instead. Shared entries expire on their own.
+            keys, message = [], f"{self.origin} {SHARED_CACHE_INVALIDATE_ALL}".encode()
+        else:
+            keys = [SHARED_CACHE_KEY_PREFIX + short_url for short_url in self._unsent]
+            message = " ".join([self.origin, *self._unsent]).encode()
+
+        sending, self._unsent = self._unsent, {}
+        if await self._call_shared(lambda backend: self._deliver(backend, keys, message)):
+            self._unsent_overflow = False
+            return
+
+        self._unsent = sending | self._unsent
+        # Shared entries of these codes weren't replaced by tombstones either, so local entries refilled from them
+        # may be stale too; only the database can be trusted until they are sent.
+        self.local.clear()
+        logger.warning(f"Could not send {len(self._unsent)} shared cache invalidations, will resend them")
+
+    async def _deliver(self, backend: SharedCacheBackend, keys: list[str], message: bytes) -> bool:
+        if keys:
+            await backend.set_many(keys, SHARED_CACHE_TOMBSTONE, self.invalidation_ttl)
+        await backend.publish(SHARED_CACHE_INVALIDATION_CHANNEL, message)
+        return True
+
+    async def _call_shared(self, operation: Callable[[SharedCacheBackend], Awaitable[T]]) -> T | None:
+        # The shared tier is an optimization: while it is unreachable, lookups fall through to the database.
+        if self.backend is None or self._clock() < self._retry_at:
+            return None
+
+        try:
+            return await operation(self.backend)
+        except SHARED_CACHE_ERRORS:
+            self.shared_errors += 1
+            self._retry_at = self._clock() + self.retry_interval
+            logger.warning("Shared cache unavailable, using the local cache only", exc_info=True)
+            return None
+
+
+shared_url_cache = TwoLevelURLCache(
+    url_cache,
+    create_shared_cache_backend(settings.shared_cache_url),
+    ttl=settings.shared_cache_ttl,
+    retry_interval=settings.shared_cache_retry_interval,
+    invalidation_ttl=settings.shared_cache_invalidation_ttl,
+    url_filter=short_url_filter,
+)
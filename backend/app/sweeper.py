@@ -0,0 +1,22 @@
+from app.config import settings
+from app.crud import deactivate_expired_db_urls
+from app.database import async_session_maker
+
+
+async def sweep_expired_urls() -> int:
+    swept = 0
+
+    while True:
+        async with async_session_maker() as session:
+            short_urls = await deactivate_expired_db_urls(
+                settings.sweeper_batch_size, settings.sweeper_lock_id, session
+            )
+
+        if short_urls is None:
+            break
+
+        swept += len(short_urls)
+        if len(short_urls) < settings.sweeper_batch_size:
+            break
+
+    return swept
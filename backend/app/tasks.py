@@ -0,0 +1,23 @@
+import asyncio
+import contextlib
+import logging
+from collections.abc import Awaitable, Callable
+
+logger = logging.getLogger(__name__)
+
+
+async def run_periodically(interval: float, func: Callable[[], Awaitable[object]], immediately: bool = False) -> None:
+    delay = 0.0 if immediately else interval
+    while True:
+        await asyncio.sleep(delay)
+        delay = interval
+        try:
+            await func()
+        except Exception:
+            logger.exception(f"Periodic task {func.__qualname__} failed")
+
+
+async def cancel_task(task: asyncio.Task[None]) -> None:
+    task.cancel()
+    with contextlib.suppress(asyncio.CancelledError):
+        await task
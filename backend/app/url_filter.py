@@ -0,0 +1,14 @@
+from contextlib import aclosing
+
+from app.bloom import short_url_filter
+from app.config import settings
+from app.crud import count_db_urls, stream_db_active_short_urls
+from app.database import async_session_maker
+
+
+async def rebuild_url_filter() -> bool:
+    # Always from the primary: a lagging replica could miss codes whose announcement arrived before the build began.
+    async with async_session_maker() as session:
+        expected = await count_db_urls(session)
+        async with aclosing(stream_db_active_short_urls(settings.url_filter_fetch_size, session)) as batches:
+            return await short_url_filter.rebuild(batches, expected)
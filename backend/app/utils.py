@@ -1,11 +1,26 @@
+import base64
+import hashlib
 import secrets
 import string
-from datetime import UTC, datetime, timedelta
+from datetime import UTC, datetime
 from io import BytesIO
+from urllib.parse import urlsplit
 
-import qrcode
+from app.constants import (
+    EXPIRATION_DELTAS,
+    MAX_URL_ID,
+    PERMUTATION_HALF_BITS,
+    PERMUTATION_ROUNDS,
+    QR_CODE_BORDER,
+    QR_CODE_BOX_SIZE,
+    QR_CODE_VERSION,
+    URL_PARTITION_PREFIX,
+    USER_AGENT_BOT_MARKERS,
+    USER_AGENT_MOBILE_MARKERS,
+)
+from app.enums import ExpirationOption, UserAgentClass
 
-from app.enums import ExpirationOption
+BASE62_ALPHABET = string.ascii_letters + string.digits
 
 
 def generate_short_url(length: int = 10) -> str:
@@ -13,8 +28,38 @@ def generate_short_url(length: int = 10) -> str:
     return "".join(secrets.choice(aplhabet) for _ in range(length))
 
 
+def encode_base62(value: int, length: int = 10) -> str:
+    chars = []
+    while value:
+        value, remainder = divmod(value, 62)
+        chars.append(BASE62_ALPHABET[remainder])
+
+    return "".join(reversed(chars)).rjust(length, BASE62_ALPHABET[0])
+
+
+def permute_id(value: int, secret: str) -> int:
+    mask = (1 << PERMUTATION_HALF_BITS) - 1
+    if not 0 <= value <= (mask << PERMUTATION_HALF_BITS | mask):
+        raise ValueError(f"Id {value} is outside the permutation domain.")
+
+    key = hashlib.sha256(secret.encode()).digest()
+    left, right = value >> PERMUTATION_HALF_BITS, value & mask
+    for round_number in range(PERMUTATION_ROUNDS):
+        digest = hashlib.blake2b(round_number.to_bytes(1) + right.to_bytes(4), key=key, digest_size=4).digest()
+        left, right = right, left ^ (int.from_bytes(digest) & mask)
+
+    return left << PERMUTATION_HALF_BITS | right
+
+
+def generate_sequential_short_url(value: int, secret: str) -> str:
+    return encode_base62(permute_id(value, secret))
+
+
 def generate_qr_code(url: str) -> bytes:
-    qr = qrcode.QRCode(version=1, box_size=10, border=5)
+    # Imported on first use: qrcode pulls in PIL, which processes that only redirect never need.
+    import qrcode  # noqa: PLC0415
+
+    qr = qrcode.QRCode(version=QR_CODE_VERSION, box_size=QR_CODE_BOX_SIZE, border=QR_CODE_BORDER)
     qr.add_data(url)
     qr.make(fit=True)
     img = qr.make_image(fill_color="black", back_color="white")
@@ -26,17 +71,95 @@ def generate_qr_code(url: str) -> bytes:
     return buffer.getvalue()
 
 
+def get_qr_code_etag(url: str) -> str:
+    # Rendering is deterministic, so the encoded URL and render parameters identify the image.
+    key = f"{url}|{QR_CODE_VERSION}|{QR_CODE_BOX_SIZE}|{QR_CODE_BORDER}|png"
+    return f'"{hashlib.sha256(key.encode()).hexdigest()[:32]}"'
+
+
 def get_expiration_datetime(option: ExpirationOption) -> datetime | None:
     if option == ExpirationOption.indefinite:
         return None
 
-    now = datetime.now(UTC)
-    mapping = {
-        ExpirationOption.one_hour: timedelta(hours=1),
-        ExpirationOption.six_hours: timedelta(hours=6),
-        ExpirationOption.one_day: timedelta(days=1),
-        ExpirationOption.one_week: timedelta(weeks=1),
-        ExpirationOption.one_month: timedelta(days=30),
-        ExpirationOption.one_year: timedelta(days=365),
-    }
-    return now + mapping[option]
+    return datetime.now(UTC) + EXPIRATION_DELTAS[option]
+
+
+def get_redirect_max_age(expires_at: datetime | None, max_age: int) -> int:
+    # Never past the link's expiry, so a cached redirect stops resolving when the link does.
+    if expires_at is None:
+        return max_age
+
+    return max(0, min(max_age, int((expires_at - datetime.now(UTC)).total_seconds())))
+
+
+def get_url_dedup_key(original_url: str, expires_in: ExpirationOption) -> bytes:
+    # original_url is already normalized by HttpUrl; the expiry option is part of the key so a
+    # request for a one-hour link never gets a permanent one back.
+    return hashlib.sha256(f"{expires_in.value}\n{original_url}".encode()).digest()
+
+
+def encode_cursor(last_id: int) -> str:
+    return base64.urlsafe_b64encode(str(last_id).encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> int:
+    try:
+        last_id = int(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode())
+    except (ValueError, UnicodeDecodeError) as e:
+        raise ValueError(f"Invalid cursor '{cursor}'.") from e
+
+    if not 0 <= last_id <= MAX_URL_ID:
+        raise ValueError(f"Invalid cursor '{cursor}'.")
+
+    return last_id
+
+
+def classify_user_agent(user_agent: str | None) -> UserAgentClass:
+    if not user_agent:
+        return UserAgentClass.other
+
+    user_agent = user_agent.lower()
+    if any(marker in user_agent for marker in USER_AGENT_BOT_MARKERS):
+        return UserAgentClass.bot
+
+    if any(marker in user_agent for marker in USER_AGENT_MOBILE_MARKERS):
+        return UserAgentClass.mobile
+
+    if user_agent.startswith("mozilla/"):
+        return UserAgentClass.desktop
+
+    return UserAgentClass.other
+
+
+def get_referrer_host(referrer: str | None) -> str | None:
+    if not referrer:
+        return None
+
+    try:
+        host = urlsplit(referrer).hostname
+    except ValueError:
+        return None
+
+    return host[:255] if host else None
+
+
+def add_months(month_start: datetime, months: int) -> datetime:
+    month_index = month_start.year * 12 + month_start.month - 1 + months
+    return month_start.replace(year=month_index // 12, month=month_index % 12 + 1)
+
+
+def get_month_start(value: datetime) -> datetime:
+    return value.astimezone(UTC).replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+
+
+def get_url_partition_name(month_start: datetime) -> str:
+    return f"{URL_PARTITION_PREFIX}{month_start:%Y%m}"
+
+
+def parse_url_partition_name(name: str) -> datetime | None:
+    # Partitions that don't follow the naming scheme were created by hand and are left alone.
+    suffix = name.removeprefix(URL_PARTITION_PREFIX)
+    if suffix == name or len(suffix) != 6 or not suffix.isdigit():
+        return None
+
+    return datetime.strptime(suffix, "%Y%m").replace(tzinfo=UTC)
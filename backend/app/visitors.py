@@ -0,0 +1,90 @@
+import asyncio
+import logging
+from datetime import UTC, datetime, timedelta
+
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.config import settings
+from app.crud import merge_db_visitor_sketches, roll_up_db_visitor_sketches
+from app.database import async_session_maker
+from app.hll import HyperLogLog
+
+logger = logging.getLogger(__name__)
+
+
+class VisitorSketchAggregator:
+    def __init__(self, session_maker: async_sessionmaker[AsyncSession], precision: int, max_pending: int) -> None:
+        self.session_maker = session_maker
+        self.precision = precision
+        self.max_pending = max_pending
+        self._pending: dict[tuple[str, datetime], HyperLogLog] = {}
+        self._flush_lock = asyncio.Lock()
+        self._flush_task: asyncio.Task[None] | None = None
+
+    @property
+    def pending(self) -> int:
+        return len(self._pending)
+
+    def record(self, short_url: str, visitor_id: str) -> None:
+        # Sketches are kept per link and UTC day, so stored buckets can later be merged over any range of days.
+        bucket_start = datetime.now(UTC).replace(hour=0, minute=0, second=0, microsecond=0)
+        sketch = self._pending.get((short_url, bucket_start))
+        if sketch is None:
+            sketch = self._pending[short_url, bucket_start] = HyperLogLog(self.precision)
+
+        sketch.add(visitor_id)
+
+        if len(self._pending) >= self.max_pending and (self._flush_task is None or self._flush_task.done()):
+            self._flush_task = asyncio.create_task(self._flush_in_background())
+
+    async def flush(self) -> int:
+        async with self._flush_lock:
+            if not self._pending:
+                return 0
+
+            # Swap before awaiting so visits recorded during the flush land in the next batch.
+            pending, self._pending = self._pending, {}
+            try:
+                async with self.session_maker() as session:
+                    await merge_db_visitor_sketches(pending, session)
+            except Exception:
+                for key, sketch in pending.items():
+                    if key in self._pending:
+                        sketch.merge(self._pending[key])
+                    self._pending[key] = sketch
+                raise
+
+            return len(pending)
+
+    async def _flush_in_background(self) -> None:
+        try:
+            await self.flush()
+        except Exception:
+            logger.exception("Failed to flush visitor sketches")
+
+
+async def roll_up_visitor_sketches() -> int:
+    rolled_up = 0
+
+    while True:
+        async with async_session_maker() as session:
+            count = await roll_up_db_visitor_sketches(
+                timedelta(days=settings.unique_visitors_retention_days),
+                settings.unique_visitors_rollup_batch_size,
+                settings.unique_visitors_rollup_lock_id,
+                session,
+            )
+
+        if count is None:
+            break
+
+        rolled_up += count
+        if count < settings.unique_visitors_rollup_batch_size:
+            break
+
+    return rolled_up
+
+
+visitor_sketches = VisitorSketchAggregator(
+    async_session_maker, settings.unique_visitors_precision, settings.unique_visitors_max_pending
+)
@@ -0,0 +1,115 @@
+"""Drive the real ASGI app in-process and report throughput and latency percentiles per request mix.
+
+Does not need a database; the urls table is replaced by an in-memory stand-in (benchmarks/stand_in.py), so
+the numbers cover routing, middleware, caching, validation, serialization and QR rendering:
+
+    uv run python -m benchmarks.bench_load --requests 5000 --concurrency 32
+    uv run python -m benchmarks.bench_load --mix redirect --mix mixed --output benchmarks/results/load-baseline.json
+"""
+
+import argparse
+import asyncio
+import random
+import time
+from collections.abc import Awaitable, Callable
+from pathlib import Path
+from unittest.mock import patch
+
+import httpx
+
+from app.cache import url_cache
+from app.main import app
+from app.rendering import qr_code_renderer
+from benchmarks.reporting import print_results, summarize, write_results
+from benchmarks.stand_in import InMemoryURLStore, use_stand_in
+
+Request = Callable[[httpx.AsyncClient, random.Random], Awaitable[httpx.Response]]
+
+
+def build_requests(short_urls: list[str]) -> dict[str, Request]:
+    def redirect(client: httpx.AsyncClient, rng: random.Random) -> Awaitable[httpx.Response]:
+        return client.get(f"/{rng.choice(short_urls)}")
+
+    def shorten(client: httpx.AsyncClient, rng: random.Random) -> Awaitable[httpx.Response]:
+        return client.post(
+            "/shorten", json={"original_url": f"https://example.com/{rng.random()}", "expires_in": "24h"}
+        )
+
+    def stats(client: httpx.AsyncClient, rng: random.Random) -> Awaitable[httpx.Response]:
+        return client.get(f"/stats/{rng.choice(short_urls)}")
+
+    def qr(client: httpx.AsyncClient, rng: random.Random) -> Awaitable[httpx.Response]:
+        return client.get(f"/qr/{rng.choice(short_urls)}")
+
+    return {"redirect": redirect, "shorten": shorten, "stats": stats, "qr": qr}
+
+
+# Mix name -> weight per request kind; "mixed" approximates production, where redirects dominate.
+MIXES = {
+    "redirect": {"redirect": 1.0},
+    "shorten": {"shorten": 1.0},
+    "stats": {"stats": 1.0},
+    "qr": {"qr": 1.0},
+    "mixed": {"redirect": 0.85, "shorten": 0.08, "stats": 0.05, "qr": 0.02},
+}
+
+
+async def run_mix(
+    client: httpx.AsyncClient, requests: dict[str, Request], weights: dict[str, float], total: int, concurrency: int
+) -> tuple[list[float], int, float]:
+    rng = random.Random(0)
+    kinds = rng.choices(list(weights), weights=list(weights.values()), k=total)
+    queue: asyncio.Queue[str] = asyncio.Queue()
+    for kind in kinds:
+        queue.put_nowait(kind)
+
+    latencies: list[float] = []
+    errors = 0
+
+    async def worker() -> None:
+        nonlocal errors
+        while not queue.empty():
+            kind = queue.get_nowait()
+            start = time.perf_counter()
+            response = await requests[kind](client, rng)
+            latencies.append(time.perf_counter() - start)
+            if response.status_code >= 400:
+                errors += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return latencies, errors, time.perf_counter() - start
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--links", type=int, default=1000)
+    parser.add_argument("--mix", choices=list(MIXES), action="append", dest="mixes")
+    parser.add_argument("--output", type=Path, default=None)
+    args = parser.parse_args()
+
+    store = InMemoryURLStore()
+    requests = build_requests(store.seed(args.links))
+    results = {}
+
+    # Every request comes from one client address, so the per-client limits would turn nearly all writes away.
+    with use_stand_in(store), patch("app.routers.urls.settings.rate_limit_enabled", False):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://benchmark") as client:
+            for mix in args.mixes or list(MIXES):
+                url_cache.clear()
+                await run_mix(client, requests, MIXES[mix], min(args.requests, 200), args.concurrency)
+                latencies, errors, elapsed = await run_mix(
+                    client, requests, MIXES[mix], args.requests, args.concurrency
+                )
+                results[mix] = summarize(latencies, elapsed) | {"errors": errors}
+
+    qr_code_renderer.shutdown()
+    print_results(results)
+    print(f"Saved results to {write_results('load', results, args.output)}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,99 @@
+"""Measure what the metrics middleware adds to a cached redirect, and the cost of a single histogram observation.
+
+Does not need a database; redirects are served from a pre-filled cache:
+
+    uv run python -m benchmarks.bench_metrics_overhead --requests 20000
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+import timeit
+
+from fastapi import FastAPI
+from starlette.types import ASGIApp, Message
+
+from app.cache import CachedURL, url_cache
+from app.config import settings
+from app.metrics import Histogram, MetricsMiddleware
+from app.routers import redirects, urls
+
+
+def build_app(with_metrics: bool) -> FastAPI:
+    app = FastAPI()
+    if with_metrics:
+        app.add_middleware(MetricsMiddleware)
+    app.include_router(urls.router)
+    app.include_router(redirects.router)
+    return app
+
+
+async def redirect(app: ASGIApp, short_url: str) -> None:
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "GET",
+        "scheme": "http",
+        "path": f"/{short_url}",
+        "raw_path": f"/{short_url}".encode(),
+        "query_string": b"",
+        "headers": [(b"host", b"localhost"), (b"user-agent", b"benchmark")],
+        "client": ("127.0.0.1", 50000),
+        "server": ("localhost", 80),
+    }
+
+    async def receive() -> Message:
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message: Message) -> None:
+        pass
+
+    await app(scope, receive, send)
+
+
+async def measure(app: ASGIApp, requests: int) -> float:
+    start = time.perf_counter()
+    for index in range(requests):
+        await redirect(app, f"bench{index % 100}")
+
+    return (time.perf_counter() - start) / requests
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=20000)
+    parser.add_argument("--rounds", type=int, default=5)
+    args = parser.parse_args()
+
+    # Keep the redirect on the cache-hit path so the middleware is the only variable.
+    settings.click_events_enabled = False
+    settings.unique_visitors_enabled = False
+    for index in range(100):
+        url_cache.set(f"bench{index}", CachedURL(f"https://example.com/{index}", None, True))
+
+    apps = {"without metrics": build_app(False), "with metrics": build_app(True)}
+    timings: dict[str, list[float]] = {name: [] for name in apps}
+    for app in apps.values():
+        await measure(app, 1000)
+
+    # Rounds alternate between the two apps so drift in machine load affects both equally.
+    for _ in range(args.rounds):
+        for name, app in apps.items():
+            timings[name].append(await measure(app, args.requests))
+
+    results = {name: statistics.median(values) for name, values in timings.items()}
+    for name, result in results.items():
+        print(f"{name:>16}: {result * 1e6:7.2f}us per redirect")
+
+    overhead = results["with metrics"] - results["without metrics"]
+    print(f"{'overhead':>16}: {overhead * 1e6:7.2f}us ({overhead / results['without metrics']:.1%})")
+
+    histogram = Histogram("bench_seconds", "Benchmark.", ("route",))
+    observe = timeit.timeit(lambda: histogram.observe(0.003, ("/{short_url}",)), number=1_000_000)
+    print(f"{'observe':>16}: {observe * 1e3:7.3f}ns per histogram observation")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
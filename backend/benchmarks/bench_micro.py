@@ -0,0 +1,73 @@
+"""Microbenchmarks for the per-request building blocks: short code generation, QR rendering and schema handling.
+
+Does not need a database. Each sample times a batch of calls, so percentiles are across batches:
+
+    uv run python -m benchmarks.bench_micro --samples 200
+    uv run python -m benchmarks.bench_micro --output benchmarks/results/micro-baseline.json
+"""
+
+import argparse
+import time
+from collections.abc import Callable
+from datetime import UTC, datetime
+from pathlib import Path
+
+from pydantic import HttpUrl
+
+from app.schemas import URLCreate, URLResponse
+from app.utils import generate_qr_code, generate_short_url
+from benchmarks.reporting import print_results, summarize, write_results
+
+URL_CREATE_PAYLOAD = {"original_url": "https://example.com/some/long/path?query=1", "expires_in": "24h"}
+EXPIRES_AT = datetime(2030, 1, 1, tzinfo=UTC)
+
+
+def build_url_response() -> URLResponse:
+    return URLResponse(
+        original_url=HttpUrl("https://example.com/some/long/path?query=1"),
+        short_url="abc123",
+        is_active=True,
+        expires_at=EXPIRES_AT,
+    )
+
+
+# Name -> (function, calls per sample); slow functions get smaller batches.
+BENCHMARKS: dict[str, tuple[Callable[[], object], int]] = {
+    "generate_short_url": (generate_short_url, 1000),
+    "generate_qr_code": (lambda: generate_qr_code("https://shortlink.lol/abc123"), 5),
+    "URLCreate validation": (lambda: URLCreate.model_validate(URL_CREATE_PAYLOAD), 500),
+    "URLResponse construction": (build_url_response, 500),
+}
+
+
+def measure(func: Callable[[], object], calls: int, samples: int) -> list[float]:
+    for _ in range(calls):
+        func()
+
+    per_call = []
+    for _ in range(samples):
+        start = time.perf_counter()
+        for _ in range(calls):
+            func()
+        per_call.append((time.perf_counter() - start) / calls)
+
+    return per_call
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--samples", type=int, default=100)
+    parser.add_argument("--output", type=Path, default=None)
+    args = parser.parse_args()
+
+    results = {}
+    for name, (func, calls) in BENCHMARKS.items():
+        per_call = measure(func, calls, args.samples)
+        results[name] = summarize(per_call) | {"ops_per_s": 1 / min(per_call)}
+
+    print_results(results)
+    print(f"Saved results to {write_results('micro', results, args.output)}")
+
+
+if __name__ == "__main__":
+    main()
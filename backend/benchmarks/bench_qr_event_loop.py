@@ -0,0 +1,76 @@
+"""Measure event-loop lag under concurrent QR rendering, inline vs. offloaded to an executor.
+
+Does not need a database:
+
+    uv run python -m benchmarks.bench_qr_event_loop --requests 200 --concurrency 16 --workers 4
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+
+from app.rendering import QRCodeRenderer
+from app.utils import generate_qr_code
+
+MODES = ("inline", "thread", "process")
+
+
+async def monitor_lag(stop: asyncio.Event, interval: float = 0.005) -> list[float]:
+    loop = asyncio.get_running_loop()
+    lags = []
+
+    while not stop.is_set():
+        start = loop.time()
+        await asyncio.sleep(interval)
+        lags.append(loop.time() - start - interval)
+
+    return lags
+
+
+async def run(mode: str, requests: int, concurrency: int, workers: int) -> None:
+    renderer = QRCodeRenderer("process" if mode == "process" else "thread", workers, max_pending=concurrency)
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def render(index: int) -> None:
+        url = f"https://shortlink.lol/{index:010d}"
+        async with semaphore:
+            if mode == "inline":
+                generate_qr_code(url)
+                await asyncio.sleep(0)
+            else:
+                await renderer.render(url, wait=True)
+
+    if mode != "inline":
+        # Start the workers outside the measured window.
+        await asyncio.gather(*(renderer.render("warmup", wait=True) for _ in range(workers)))
+
+    stop = asyncio.Event()
+    monitor = asyncio.create_task(monitor_lag(stop))
+    start = time.perf_counter()
+    await asyncio.gather(*(render(index) for index in range(requests)))
+    elapsed = time.perf_counter() - start
+    stop.set()
+    lags = sorted(await monitor)
+    renderer.shutdown()
+
+    p99 = lags[int(len(lags) * 0.99) - 1] if len(lags) > 1 else lags[-1]
+    print(
+        f"{mode:>8}: {requests / elapsed:8.1f} renders/s  "
+        f"loop lag p50={statistics.median(lags) * 1000:.2f}ms p99={p99 * 1000:.2f}ms max={lags[-1] * 1000:.2f}ms"
+    )
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--workers", type=int, default=4)
+    args = parser.parse_args()
+
+    for mode in MODES:
+        await run(mode, args.requests, args.concurrency, args.workers)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
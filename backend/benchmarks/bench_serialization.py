@@ -0,0 +1,156 @@
+"""Compare the CPU cost of serializing a /urls page through response models against trusted-row encoding.
+
+Does not need a database; pages are served from an in-memory list of rows:
+
+    uv run python -m benchmarks.bench_serialization --requests 2000 --page-size 100
+"""
+
+import argparse
+import asyncio
+import math
+import statistics
+import time
+from collections.abc import Sequence
+from datetime import UTC, datetime, timedelta
+from pathlib import Path
+from typing import Any
+from unittest.mock import patch
+
+from fastapi import FastAPI
+from pydantic import HttpUrl
+from starlette.types import ASGIApp, Message
+
+from app.database import get_read_session
+from app.models import URL
+from app.routers import urls
+from app.schemas import URLListResponse, URLResponse
+from app.utils import encode_cursor
+from benchmarks.reporting import summarize, write_results
+
+
+def build_rows(count: int) -> list[URL]:
+    expires_at = datetime.now(UTC) + timedelta(days=30)
+    return [
+        URL(
+            id=index + 1,
+            original_url=f"https://example.com/articles/{index}/",
+            short_url=f"bench{index:05d}",
+            is_active=True,
+            expires_at=expires_at if index % 2 else None,
+        )
+        for index in range(count)
+    ]
+
+
+def build_legacy_app(rows: Sequence[URL]) -> FastAPI:
+    # The shape of /urls before rows were encoded directly: every URL is re-parsed into HttpUrl, and
+    # FastAPI validates the returned model against the annotation a second time.
+    app = FastAPI()
+
+    @app.get("/urls")
+    async def get_all_urls(page: int = 1, page_size: int = 10) -> URLListResponse:
+        page_rows = rows[(page - 1) * page_size : page * page_size]
+        return URLListResponse(
+            urls=[
+                URLResponse(
+                    original_url=HttpUrl(url.original_url),
+                    short_url=url.short_url,
+                    is_active=url.is_active,
+                    expires_at=url.expires_at,
+                )
+                for url in page_rows
+            ],
+            total=len(rows),
+            page=page,
+            page_size=page_size,
+            total_pages=math.ceil(len(rows) / page_size),
+            next_cursor=encode_cursor(page_rows[-1].id) if len(page_rows) == page_size else None,
+        )
+
+    return app
+
+
+async def no_session() -> None:
+    return None
+
+
+def build_current_app() -> FastAPI:
+    app = FastAPI()
+    app.include_router(urls.router)
+    app.dependency_overrides[get_read_session] = no_session
+    return app
+
+
+async def get_page(app: ASGIApp, page_size: int) -> None:
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "GET",
+        "scheme": "http",
+        "path": "/urls",
+        "raw_path": b"/urls",
+        "query_string": f"page=1&page_size={page_size}".encode(),
+        "headers": [(b"host", b"localhost")],
+        "client": ("127.0.0.1", 50000),
+        "server": ("localhost", 80),
+    }
+
+    async def receive() -> Message:
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message: Message) -> None:
+        pass
+
+    await app(scope, receive, send)
+
+
+async def measure(app: ASGIApp, requests: int, page_size: int) -> list[float]:
+    # Process time leaves out scheduler noise; serialization is pure CPU work.
+    samples = []
+    for _ in range(requests):
+        start = time.process_time()
+        await get_page(app, page_size)
+        samples.append(time.process_time() - start)
+
+    return samples
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--rounds", type=int, default=5)
+    parser.add_argument("--page-size", type=int, default=100)
+    parser.add_argument("--output", type=Path, default=None)
+    args = parser.parse_args()
+
+    rows = build_rows(args.page_size * 10)
+
+    async def get_db_urls(skip: int, limit: int, db: Any) -> tuple[list[URL], int]:
+        return rows[skip : skip + limit], len(rows)
+
+    apps = {"response models": build_legacy_app(rows), "trusted rows": build_current_app()}
+    samples: dict[str, list[float]] = {name: [] for name in apps}
+
+    with patch("app.routers.urls.get_db_urls", get_db_urls):
+        for app in apps.values():
+            await measure(app, 100, args.page_size)
+
+        # Rounds alternate between the two apps so drift in machine load affects both equally.
+        for _ in range(args.rounds):
+            for name, app in apps.items():
+                samples[name].extend(await measure(app, args.requests, args.page_size))
+
+    results: dict[str, dict[str, float]] = {name: summarize(values) for name, values in samples.items()}
+    for name, summary in results.items():
+        print(f"{name:>16}: mean={summary['mean_ms']:.4f}ms cpu per page of {args.page_size}")
+
+    legacy, current = (statistics.mean(values) for values in samples.values())
+    print(f"{'speedup':>16}: {legacy / current:.2f}x")
+
+    path = write_results("serialization", results, args.output)
+    print(f"results written to {path}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,60 @@
+"""Compare POST /shorten latency for the random and sequence short url generators.
+
+Runs against the database configured in .env, which must be migrated to head:
+
+    uv run python -m benchmarks.bench_short_url_generators --count 2000 --output benchmarks/results/generators.json
+"""
+
+import argparse
+import asyncio
+import time
+from pathlib import Path
+from typing import Literal
+
+from pydantic import HttpUrl
+
+from app.config import settings
+from app.database import async_session_maker, dispose_engines, init_engines
+from app.enums import ExpirationOption
+from app.routers.urls import create_short_url
+from app.schemas import URLCreate
+from benchmarks.reporting import print_results, summarize, write_results
+
+GENERATORS: tuple[Literal["random", "sequence"], ...] = ("random", "sequence")
+
+
+async def measure(generator: Literal["random", "sequence"], count: int) -> dict[str, float]:
+    settings.short_url_generator = generator
+    url = URLCreate(
+        original_url=HttpUrl("https://example.com/benchmark"),
+        expires_in=ExpirationOption.one_hour,
+        custom_alias=None,
+    )
+    latencies = []
+
+    started_at = time.perf_counter()
+    for _ in range(count):
+        async with async_session_maker() as session:
+            start = time.perf_counter()
+            await create_short_url(url, session)
+            latencies.append(time.perf_counter() - start)
+
+    return summarize(latencies, time.perf_counter() - started_at)
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--count", type=int, default=1000)
+    parser.add_argument("--output", type=Path, default=None)
+    args = parser.parse_args()
+
+    init_engines()
+    results: dict[str, dict[str, float]] = {generator: await measure(generator, args.count) for generator in GENERATORS}
+    await dispose_engines()
+
+    print_results(results)
+    print(f"Saved results to {write_results('short_url_generators', results, args.output)}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
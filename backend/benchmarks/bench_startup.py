@@ -0,0 +1,87 @@
+"""Measure cold import-and-build time and resident memory of the app for each profile.
+
+Does not need a database; engines are created in the lifespan, which isn't run. Every sample is a fresh interpreter:
+
+    uv run python -m benchmarks.bench_startup --runs 20
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import get_args
+
+from app.config import AppProfile
+from benchmarks.reporting import summarize, write_results
+
+# Runs in the child: time to import the app module, which builds the app for APP_PROFILE, and peak RSS after it.
+# Most modules are the framework's and shared by every profile, so the app's own are counted separately too.
+CHILD = """
+import json, resource, sys, time
+start = time.perf_counter()
+import app.main
+elapsed = time.perf_counter() - start
+print(json.dumps({
+    "import_s": elapsed,
+    "max_rss_kb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+    "modules": len(sys.modules),
+    "app_modules": sum(name.startswith("app.") for name in sys.modules),
+}))
+"""
+
+
+def run_child(profile: str) -> tuple[float, dict[str, float]]:
+    start = time.perf_counter()
+    result = subprocess.run(
+        [sys.executable, "-c", CHILD],
+        env={**os.environ, "APP_PROFILE": profile},
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return time.perf_counter() - start, json.loads(result.stdout)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--runs", type=int, default=20)
+    parser.add_argument("--output", type=Path, default=None)
+    args = parser.parse_args()
+
+    profiles = get_args(AppProfile)
+    for profile in profiles:
+        run_child(profile)
+
+    samples: dict[str, list[tuple[float, dict[str, float]]]] = {profile: [] for profile in profiles}
+    # Runs alternate between profiles so drift in machine load affects all of them equally.
+    for _ in range(args.runs):
+        for profile in profiles:
+            samples[profile].append(run_child(profile))
+
+    # Separate entries for the import alone and the whole process, so compare.py flags regressions in either.
+    results: dict[str, dict[str, float]] = {}
+    for profile, runs in samples.items():
+        results[f"{profile} import"] = summarize([child["import_s"] for _, child in runs])
+        results[f"{profile} import"]["max_rss_mb"] = statistics.median(child["max_rss_kb"] for _, child in runs) / 1024
+        results[f"{profile} import"]["modules"] = statistics.median(child["modules"] for _, child in runs)
+        results[f"{profile} import"]["app_modules"] = statistics.median(child["app_modules"] for _, child in runs)
+        results[f"{profile} process"] = summarize([wall for wall, _ in runs])
+
+    for profile in profiles:
+        imports, process = results[f"{profile} import"], results[f"{profile} process"]
+        print(
+            f"{profile:>10}: import p50={imports['p50_ms']:.1f}ms p95={imports['p95_ms']:.1f}ms "
+            f"process p50={process['p50_ms']:.1f}ms rss={imports['max_rss_mb']:.1f}MB "
+            f"modules={imports['modules']:.0f} (app {imports['app_modules']:.0f})"
+        )
+
+    path = write_results("startup", results, args.output)
+    print(f"results written to {path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""Compare per-lookup CPU time of the ORM lookup (crud.get_db_url) with the asyncpg fast path.
+
+Runs against the database configured in .env, which must be migrated to head and hold at least one active link:
+
+    uv run python -m benchmarks.bench_url_lookup --count 5000 --output benchmarks/results/url-lookup.json
+"""
+
+import argparse
+import asyncio
+import time
+from collections.abc import Awaitable, Callable
+from pathlib import Path
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.crud import get_db_url
+from app.database import async_session_maker, dispose_engines, init_engines
+from app.fastpath import fetch_url
+from app.models import URL
+from benchmarks.reporting import summarize, write_results
+
+Lookup = Callable[[str, AsyncSession], Awaitable[object]]
+
+LOOKUPS: dict[str, Lookup] = {"orm": get_db_url, "fast path": fetch_url}
+
+
+async def measure(lookup: Lookup, short_urls: list[str], count: int) -> tuple[list[float], list[float]]:
+    cpu_times = []
+    wall_times = []
+
+    # One session for the whole run, so both sides reuse a connection and its statement cache.
+    async with async_session_maker() as session:
+        await lookup(short_urls[0], session)
+
+        for index in range(count):
+            short_url = short_urls[index % len(short_urls)]
+            cpu_start, wall_start = time.process_time(), time.perf_counter()
+            await lookup(short_url, session)
+            cpu_times.append(time.process_time() - cpu_start)
+            wall_times.append(time.perf_counter() - wall_start)
+            # The ORM identity map would otherwise turn repeated lookups into cheaper refreshes.
+            session.expunge_all()
+
+    return cpu_times, wall_times
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--count", type=int, default=5000)
+    parser.add_argument("--links", type=int, default=100)
+    parser.add_argument("--output", type=Path, default=None)
+    args = parser.parse_args()
+
+    init_engines()
+    async with async_session_maker() as session:
+        short_urls = list(await session.scalars(select(URL.short_url).filter(URL.is_active).limit(args.links)))
+    if not short_urls:
+        raise SystemExit("No active links to look up; create some first.")
+
+    results: dict[str, dict[str, float]] = {}
+    for name, lookup in LOOKUPS.items():
+        cpu_times, wall_times = await measure(lookup, short_urls, args.count)
+        results[f"{name} cpu"] = summarize(cpu_times) | {"total_s": sum(cpu_times)}
+        results[f"{name} wall"] = summarize(wall_times)
+    await dispose_engines()
+
+    for name in LOOKUPS:
+        cpu, wall = results[f"{name} cpu"], results[f"{name} wall"]
+        print(
+            f"{name:>9}: cpu mean={cpu['mean_ms'] * 1000:7.1f}us  "
+            f"wall p50={wall['p50_ms']:.3f}ms p99={wall['p99_ms']:.3f}ms  total cpu={cpu['total_s']:.3f}s"
+        )
+
+    print(f"Saved results to {write_results('url_lookup', results, args.output)}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
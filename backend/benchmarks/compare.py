@@ -0,0 +1,60 @@
+"""Compare two saved benchmark runs and flag regressions.
+
+Exits with status 1 when any shared result got slower than the threshold allows:
+
+    uv run python -m benchmarks.compare benchmarks/results/load-baseline.json benchmarks/results/load-latest.json
+"""
+
+import argparse
+import json
+import sys
+from pathlib import Path
+
+# Lower is better for latencies; higher is better for throughput.
+LOWER_IS_BETTER = ("p50_ms", "p95_ms", "p99_ms")
+HIGHER_IS_BETTER = ("throughput_per_s", "ops_per_s")
+
+
+def find_regressions(
+    baseline: dict[str, dict[str, float]], current: dict[str, dict[str, float]], threshold: float
+) -> list[str]:
+    regressions = []
+    for name in baseline.keys() & current.keys():
+        for metric in LOWER_IS_BETTER + HIGHER_IS_BETTER:
+            before, after = baseline[name].get(metric), current[name].get(metric)
+            if not before or after is None:
+                continue
+
+            change = (after - before) / before
+            if (metric in LOWER_IS_BETTER and change > threshold) or (
+                metric in HIGHER_IS_BETTER and change < -threshold
+            ):
+                regressions.append(f"{name} {metric}: {before:.4f} -> {after:.4f} ({change:+.1%})")
+
+    return sorted(regressions)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("baseline", type=Path)
+    parser.add_argument("current", type=Path)
+    parser.add_argument("--threshold", type=float, default=0.10, help="Allowed relative slowdown (default 10%%).")
+    args = parser.parse_args()
+
+    baseline = json.loads(args.baseline.read_text())
+    current = json.loads(args.current.read_text())
+    if baseline["suite"] != current["suite"]:
+        sys.exit(f"Cannot compare a {baseline['suite']} run with a {current['suite']} run.")
+
+    regressions = find_regressions(baseline["results"], current["results"], args.threshold)
+    for regression in regressions:
+        print(f"REGRESSION {regression}")
+
+    if regressions:
+        sys.exit(1)
+
+    print(f"No regressions beyond {args.threshold:.0%}.")
+
+
+if __name__ == "__main__":
+    main()
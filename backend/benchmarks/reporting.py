@@ -0,0 +1,53 @@
+import json
+import platform
+import statistics
+from datetime import UTC, datetime
+from pathlib import Path
+
+RESULTS_DIR = Path(__file__).parent / "results"
+
+
+def percentile(sorted_values: list[float], fraction: float) -> float:
+    index = min(len(sorted_values) - 1, max(0, round(fraction * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+def summarize(samples: list[float], elapsed: float | None = None) -> dict[str, float]:
+    # Samples are in seconds; the summary reports milliseconds, and throughput when the wall time is known.
+    ordered = sorted(samples)
+    summary = {
+        "count": len(ordered),
+        "mean_ms": statistics.mean(ordered) * 1000,
+        "p50_ms": percentile(ordered, 0.50) * 1000,
+        "p95_ms": percentile(ordered, 0.95) * 1000,
+        "p99_ms": percentile(ordered, 0.99) * 1000,
+    }
+    if elapsed is not None:
+        summary["throughput_per_s"] = len(ordered) / elapsed
+
+    return summary
+
+
+def write_results(suite: str, results: dict[str, dict[str, float]], output: Path | None) -> Path:
+    started_at = datetime.now(UTC)
+    path = output or RESULTS_DIR / f"{suite}-{started_at:%Y%m%dT%H%M%SZ}.json"
+    path.parent.mkdir(parents=True, exist_ok=True)
+
+    document = {
+        "suite": suite,
+        "created_at": started_at.isoformat(),
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "results": results,
+    }
+    path.write_text(json.dumps(document, indent=2) + "\n")
+    return path
+
+
+def print_results(results: dict[str, dict[str, float]]) -> None:
+    for name, summary in results.items():
+        throughput = f"{summary['throughput_per_s']:10.1f}/s  " if "throughput_per_s" in summary else ""
+        print(
+            f"{name:>24}: {throughput}p50={summary['p50_ms']:.4f}ms "
+            f"p95={summary['p95_ms']:.4f}ms p99={summary['p99_ms']:.4f}ms"
+        )
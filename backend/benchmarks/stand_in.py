@@ -0,0 +1,132 @@
+from collections.abc import Iterator, Mapping, Sequence
+from contextlib import ExitStack, contextmanager
+from datetime import UTC, datetime
+from typing import Any, Self
+from unittest.mock import patch
+
+from app.cache import CachedURL
+from app.enums import RedirectStatus
+from app.models import URL
+
+
+class InMemoryURLStore:
+    # Stands in for the urls table so load runs exercise routing, caching and serialization without Postgres.
+    def __init__(self) -> None:
+        self.urls: dict[str, URL] = {}
+        self._next_id = 1
+
+    def add(self, db_url: URL) -> None:
+        db_url.id = self._next_id
+        db_url.created_at = datetime.now(UTC)
+        db_url.is_active = True
+        db_url.click_count = 0
+        db_url.is_custom_alias = bool(db_url.is_custom_alias)
+        db_url.redirect_status = db_url.redirect_status or RedirectStatus.temporary_redirect.value
+        self._next_id += 1
+        self.urls[db_url.short_url] = db_url
+
+    def seed(self, count: int) -> list[str]:
+        for index in range(count):
+            self.add(URL(short_url=f"seed{index}", original_url=f"https://example.com/{index}", expires_at=None))
+
+        return list(self.urls)
+
+    def get_active(self, short_url: str) -> URL | None:
+        db_url = self.urls.get(short_url)
+        if db_url is None or not db_url.is_active:
+            return None
+
+        return db_url
+
+    async def fetch_url(self, short_url: str, db: object) -> CachedURL | None:
+        db_url = self.get_active(short_url)
+        return (
+            CachedURL(db_url.original_url, db_url.expires_at, db_url.is_active, db_url.redirect_status)
+            if db_url
+            else None
+        )
+
+    async def fetch_redirect_url(self, short_url: str, db: object) -> CachedURL | None:
+        db_url = self.get_active(short_url)
+        if db_url is None:
+            return None
+
+        db_url.click_count += 1
+        return CachedURL(db_url.original_url, db_url.expires_at, db_url.is_active, db_url.redirect_status)
+
+    async def get_db_url(self, short_url: str, db: object) -> URL | None:
+        return self.get_active(short_url)
+
+    async def get_db_active_short_urls(self, short_urls: Sequence[str], db: object) -> set[str]:
+        return {short_url for short_url in short_urls if self.get_active(short_url)}
+
+    async def increment_db_url_click_counts(self, click_counts: Mapping[str, int], db: object) -> None:
+        for short_url, clicks in click_counts.items():
+            if short_url in self.urls:
+                self.urls[short_url].click_count += clicks
+
+
+class StandInSession:
+    def __init__(self, store: InMemoryURLStore) -> None:
+        self.store = store
+        self.info: dict[str, Any] = {}
+
+    def add(self, db_url: URL) -> None:
+        self.store.add(db_url)
+
+    async def execute(self, stmt: object) -> None:
+        # Only the url_codes claim goes through here; the store keys rows by code already.
+        pass
+
+    async def commit(self) -> None:
+        pass
+
+    async def rollback(self) -> None:
+        pass
+
+    async def refresh(self, db_url: URL) -> None:
+        pass
+
+    async def close(self) -> None:
+        pass
+
+    async def __aenter__(self) -> Self:
+        return self
+
+    async def __aexit__(self, *args: object) -> None:
+        pass
+
+
+async def discard(*args: object) -> None:
+    pass
+
+
+async def no_visitor_sketch(*args: object) -> None:
+    return None
+
+
+@contextmanager
+def use_stand_in(store: InMemoryURLStore) -> Iterator[None]:
+    def session_maker() -> StandInSession:
+        return StandInSession(store)
+
+    # Session makers are patched rather than using dependency overrides, which FastAPI re-analyzes on every request.
+    replacements = {
+        "app.database.async_session_maker": session_maker,
+        "app.routers.urls.async_session_maker": session_maker,
+        "app.routers.redirects.async_session_maker": session_maker,
+        "app.crud.fetch_url": store.fetch_url,
+        "app.crud.fetch_redirect_url": store.fetch_redirect_url,
+        "app.routers.urls.get_db_url": store.get_db_url,
+        "app.routers.urls.get_db_visitor_sketch": no_visitor_sketch,
+        "app.routers.qr.get_db_active_short_urls": store.get_db_active_short_urls,
+        "app.clicks.increment_db_url_click_counts": store.increment_db_url_click_counts,
+        "app.events.copy_db_click_events": discard,
+        "app.visitors.merge_db_visitor_sketches": discard,
+    }
+
+    with ExitStack() as stack:
+        for target, replacement in replacements.items():
+            stack.enter_context(patch(target, replacement))
+
+        yield
@@ -1,17 +1,54 @@
+from collections.abc import Iterator
 from datetime import UTC, datetime, timedelta
-from unittest.mock import AsyncMock
+from unittest.mock import AsyncMock, patch
 
 import pytest
 from pydantic import HttpUrl
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.cache import qr_code_cache, url_cache
 from app.enums import ExpirationOption
+from app.rendering import QRCodeRenderer
 from app.schemas import URLCreate
 
 
+@pytest.fixture(autouse=True)
+def clear_caches() -> Iterator[None]:
+    url_cache.clear()
+    qr_code_cache.clear()
+    yield
+    url_cache.clear()
+    qr_code_cache.clear()
+
+
+@pytest.fixture
+def qr_renderer() -> Iterator[QRCodeRenderer]:
+    # Mocked render functions can't be pickled into a process pool.
+    renderer = QRCodeRenderer("thread", max_workers=2, max_pending=4)
+    with patch("app.routers.qr.qr_code_renderer", renderer):
+        yield renderer
+
+    renderer.shutdown()
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock() -> FakeClock:
+    return FakeClock()
+
+
 @pytest.fixture
 def mock_db_session() -> AsyncMock:
-    return AsyncMock(spec=AsyncSession)
+    session = AsyncMock(spec=AsyncSession)
+    session.info = {}
+    return session
 
 
 @pytest.fixture
@@ -38,6 +75,7 @@ class MockURL:
         click_count: int = 0,
         created_at: datetime | None = None,
         is_custom_alias: bool = False,
+        id: int = 1,
     ):
         self.original_url = original_url
         self.short_url = short_url
@@ -46,6 +84,7 @@ class MockURL:
         self.click_count = click_count
         self.created_at = created_at or datetime.now(UTC)
         self.is_custom_alias = is_custom_alias
+        self.id = id
 
 
 @pytest.fixture
@@ -66,7 +105,7 @@ def sample_custom_alias_url() -> MockURL:
 @pytest.fixture
 def multiple_db_urls() -> list[MockURL]:
     return [
-        MockURL(original_url="https://example1.com", short_url="abc123"),
-        MockURL(original_url="https://example2.com", short_url="def456"),
-        MockURL(original_url="https://example3.com", short_url="ghi789"),
+        MockURL(original_url="https://example1.com", short_url="abc123", id=1),
+        MockURL(original_url="https://example2.com", short_url="def456", id=2),
+        MockURL(original_url="https://example3.com", short_url="ghi789", id=3),
     ]
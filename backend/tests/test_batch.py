@@ -0,0 +1,88 @@
+import json
+from collections.abc import AsyncIterator
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+
+from app.batch import create_batch_urls, iter_items, iter_ndjson, spool_request_body, stream_batch_results
+from app.cache import CachedURL
+from app.enums import ExpirationOption
+from app.schemas import URLCreate, URLResponse
+
+
+async def chunks(*values: bytes) -> AsyncIterator[bytes]:
+    for value in values:
+        yield value
+
+
+def make_url(original_url: str, custom_alias: str | None = None) -> URLCreate:
+    return URLCreate.model_validate(
+        {"original_url": original_url, "expires_in": ExpirationOption.indefinite, "custom_alias": custom_alias}
+    )
+
+
+def created(*short_urls: str) -> dict[str, CachedURL]:
+    return {short_url: CachedURL("https://example.com/", None, True) for short_url in short_urls}
+
+
+class TestIterNdjson:
+    @pytest.mark.asyncio
+    async def test_lines_split_across_chunks(self) -> None:
+        body = await spool_request_body(chunks(b'{"a": 1}\n{"b"', b": 2}\n\nnot json\n", b'{"c": 3}'))
+        items = [item async for item in iter_ndjson(body)]
+
+        assert items == [{"a": 1}, {"b": 2}, "not json", {"c": 3}]
+
+
+class TestCreateBatchUrls:
+    @pytest.mark.asyncio
+    async def test_only_collisions_are_retried(self, mock_db_session: AsyncMock) -> None:
+        urls = {0: make_url("https://a.com"), 1: make_url("https://b.com")}
+
+        with (
+            patch("app.batch.generate_short_url", side_effect=["aaa", "bbb", "ccc"]),
+            patch(
+                "app.batch.create_db_urls", new_callable=AsyncMock, side_effect=[created("bbb"), created("ccc")]
+            ) as mock_create,
+        ):
+            results = await create_batch_urls(urls, mock_db_session)
+
+        assert isinstance(results[0], URLResponse)
+        assert results[0].short_url == "ccc"
+        assert isinstance(results[1], URLResponse)
+        assert results[1].short_url == "bbb"
+        assert [row[0] for row in mock_create.call_args_list[1].args[0]] == ["ccc"]
+
+    @pytest.mark.asyncio
+    async def test_taken_alias_is_not_retried(self, mock_db_session: AsyncMock) -> None:
+        urls = {0: make_url("https://a.com", "taken"), 1: make_url("https://b.com", "taken")}
+
+        with patch("app.batch.create_db_urls", new_callable=AsyncMock, return_value={}) as mock_create:
+            results = await create_batch_urls(urls, mock_db_session)
+
+        assert results == {0: "Alias taken is already taken.", 1: "Alias taken is already taken."}
+        mock_create.assert_called_once()
+
+
+class TestStreamBatchResults:
+    @pytest.mark.asyncio
+    async def test_results_in_input_order(self) -> None:
+        items = [
+            {"original_url": "https://a.com", "expires_in": "never"},
+            {"original_url": "not a url", "expires_in": "never"},
+            "not json",
+            {"original_url": "https://b.com", "expires_in": "never"},
+        ]
+
+        with (
+            patch("app.batch.settings.batch_chunk_size", 2),
+            patch("app.batch.generate_short_url", side_effect=["aaa", "bbb"]),
+            patch("app.batch.create_db_urls", new_callable=AsyncMock, side_effect=[created("aaa"), created("bbb")]),
+        ):
+            lines = [json.loads(line) async for line in stream_batch_results(iter_items(items), MagicMock())]
+
+        assert [line["index"] for line in lines] == [0, 1, 2, 3]
+        assert lines[0]["url"]["short_url"] == "aaa"
+        assert lines[1]["error"] is not None
+        assert lines[2]["error"] is not None
+        assert lines[3]["url"]["short_url"] == "bbb"
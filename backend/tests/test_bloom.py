@@ -0,0 +1,162 @@
+import asyncio
+from collections.abc import AsyncIterator, Sequence
+from unittest.mock import AsyncMock, patch
+
+import pytest
+from fastapi import HTTPException
+from pydantic import ValidationError
+
+from app.bloom import BloomFilter, ShortURLFilter
+from app.cache import CachedURL, URLCache
+from app.config import Settings
+from app.routers.redirects import get_cached_url_or_404, get_redirect_url_or_404
+from app.shared_cache import InMemorySharedCacheBackend, TwoLevelURLCache
+from tests.conftest import FakeClock
+
+CACHED_URL = CachedURL("https://example.com/", None, True)
+
+
+async def batches_of(*batches: Sequence[str]) -> AsyncIterator[Sequence[str]]:
+    for batch in batches:
+        await asyncio.sleep(0)
+        yield batch
+
+
+async def built_filter(*short_urls: str) -> ShortURLFilter:
+    url_filter = ShortURLFilter(capacity=1000, error_rate=0.01)
+    await url_filter.rebuild(batches_of(short_urls), expected=len(short_urls))
+    return url_filter
+
+
+class TestBloomFilter:
+    def test_sizing(self) -> None:
+        bloom = BloomFilter(capacity=1_000_000, error_rate=0.01)
+
+        assert bloom.hash_count == 7
+        assert 1_100_000 < bloom.memory_bytes < 1_300_000
+
+    def test_no_false_negatives_and_bounded_false_positives(self) -> None:
+        bloom = BloomFilter(capacity=10_000, error_rate=0.01)
+        for i in range(10_000):
+            bloom.add(f"code{i}")
+
+        assert all(f"code{i}" in bloom for i in range(10_000))
+        false_positives = sum(f"probe{i}" in bloom for i in range(10_000))
+        assert false_positives < 200
+        assert bloom.false_positive_rate == pytest.approx(0.01, rel=0.2)
+
+
+class TestShortURLFilter:
+    @pytest.mark.asyncio
+    async def test_everything_might_exist_until_built(self) -> None:
+        url_filter = ShortURLFilter(capacity=1000, error_rate=0.01)
+
+        assert url_filter.might_exist("abc")
+
+        await url_filter.rebuild(batches_of(["abc"], ["def"]), expected=2)
+
+        assert url_filter.might_exist("abc")
+        assert url_filter.might_exist("def")
+        assert not url_filter.might_exist("zzzzzz")
+        assert url_filter.stats()["filter_rejections"] == 1
+
+    @pytest.mark.asyncio
+    async def test_codes_added_during_rebuild_are_kept(self) -> None:
+        url_filter = ShortURLFilter(capacity=1000, error_rate=0.01)
+
+        async def batches() -> AsyncIterator[Sequence[str]]:
+            yield ["abc"]
+            url_filter.add("new")
+            yield ["def"]
+
+        assert await url_filter.rebuild(batches(), expected=2)
+        assert url_filter.might_exist("new")
+
+    @pytest.mark.asyncio
+    async def test_reset_during_rebuild_discards_it(self) -> None:
+        url_filter = ShortURLFilter(capacity=1000, error_rate=0.01)
+
+        async def batches() -> AsyncIterator[Sequence[str]]:
+            yield ["abc"]
+            url_filter.reset()
+
+        assert not await url_filter.rebuild(batches(), expected=1)
+        assert url_filter.bloom is None
+
+    @pytest.mark.asyncio
+    async def test_codes_announced_by_other_workers_are_added(self) -> None:
+        backend = InMemorySharedCacheBackend()
+        url_filter = await built_filter("abc")
+        first = TwoLevelURLCache(URLCache(100, 60, 5), backend, ttl=60, retry_interval=5)
+        second = TwoLevelURLCache(URLCache(100, 60, 5), backend, ttl=60, retry_interval=5, url_filter=url_filter)
+
+        listener = asyncio.create_task(second.listen())
+        await asyncio.sleep(0)
+        await first.invalidate(["new"])
+        await asyncio.sleep(0)
+        listener.cancel()
+
+        assert url_filter.might_exist("new")
+
+
+class TestUndeliveredInvalidations:
+    @pytest.mark.asyncio
+    async def test_new_codes_reach_other_workers_once_sent(self, clock: FakeClock, mock_db_session: AsyncMock) -> None:
+        backend = InMemorySharedCacheBackend()
+        url_filter = await built_filter("abc")
+        first = TwoLevelURLCache(URLCache(100, 60, 5), backend, ttl=60, retry_interval=5, clock=clock)
+        second = TwoLevelURLCache(URLCache(100, 60, 5), backend, ttl=60, retry_interval=5, url_filter=url_filter)
+        listener = asyncio.create_task(second.listen())
+        await asyncio.sleep(0)
+
+        with patch.object(backend, "publish", side_effect=ConnectionError):
+            await first.invalidate(["new"])
+        # Within the backoff after the failure nothing is sent at all.
+        await first.invalidate(["newer"])
+        await first.resend_invalidations()
+        await asyncio.sleep(0)
+        assert not url_filter.might_exist("new")
+
+        clock.now = 5
+        await first.resend_invalidations()
+        await asyncio.sleep(0)
+        listener.cancel()
+
+        with (
+            patch("app.routers.redirects.short_url_filter", url_filter),
+            patch("app.routers.redirects.shared_url_cache", second),
+            patch("app.routers.redirects.redirect_db_url", new_callable=AsyncMock, return_value=CACHED_URL),
+            patch("app.routers.redirects.click_aggregator"),
+        ):
+            for short_url in ("new", "newer"):
+                assert await get_redirect_url_or_404(short_url, mock_db_session) == CACHED_URL
+
+
+class TestSettings:
+    def test_filter_requires_shared_cache(self) -> None:
+        with pytest.raises(ValidationError, match="SHARED_CACHE_URL"):
+            Settings.model_validate({"URL_FILTER_ENABLED": True, "SHARED_CACHE_URL": ""})
+
+    def test_filter_with_shared_cache(self) -> None:
+        settings = Settings.model_validate({"URL_FILTER_ENABLED": True, "SHARED_CACHE_URL": "redis://localhost:6379"})
+
+        assert settings.url_filter_enabled
+
+
+class TestFilteredLookups:
+    @pytest.mark.asyncio
+    async def test_rejected_codes_skip_the_database(self, mock_db_session: AsyncMock) -> None:
+        url_filter = await built_filter("abc")
+
+        with (
+            patch("app.routers.redirects.short_url_filter", url_filter),
+            patch("app.routers.redirects.shared_url_cache") as mock_cache,
+        ):
+            for lookup in (get_redirect_url_or_404, get_cached_url_or_404):
+                with pytest.raises(HTTPException) as exc_info:
+                    await lookup("zzzzzz", mock_db_session)
+
+                assert exc_info.value.status_code == 404
+
+        mock_cache.get.assert_not_called()
+        mock_db_session.execute.assert_not_called()
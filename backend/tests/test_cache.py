@@ -0,0 +1,127 @@
+from datetime import UTC, datetime, timedelta
+from unittest.mock import AsyncMock, patch
+
+import pytest
+
+from app.cache import BytesLRUCache, CachedCount, CachedURL, URLCache
+from app.crud import get_cached_db_url
+from tests.conftest import FakeClock, MockURL
+
+
+@pytest.fixture
+def cache(clock: FakeClock) -> URLCache:
+    return URLCache(max_size=2, ttl=60, negative_ttl=5, clock=clock)
+
+
+class TestURLCache:
+    def test_get_and_set(self, cache: URLCache) -> None:
+        cached_url = CachedURL("https://example.com", None, True)
+
+        assert cache.get("abc123") is None
+        cache.set("abc123", cached_url)
+
+        assert cache.get("abc123") == cached_url
+        assert cache.stats()["hits"] == 1
+        assert cache.stats()["misses"] == 1
+
+    def test_lru_eviction(self, cache: URLCache) -> None:
+        cache.set("a", CachedURL("https://a.com", None, True))
+        cache.set("b", CachedURL("https://b.com", None, True))
+        cache.get("a")
+        cache.set("c", CachedURL("https://c.com", None, True))
+
+        assert cache.get("b") is None
+        assert cache.get("a") is not None
+        assert cache.get("c") is not None
+        assert cache.stats()["evictions"] == 1
+
+    def test_ttl_expiry(self, cache: URLCache, clock: FakeClock) -> None:
+        cache.set("abc123", CachedURL("https://example.com", None, True))
+        clock.now = 61
+
+        assert cache.get("abc123") is None
+        assert len(cache) == 0
+
+    def test_ttl_capped_at_link_expiry(self, cache: URLCache, clock: FakeClock) -> None:
+        expires_at = datetime.now(UTC) + timedelta(seconds=10)
+        cache.set("abc123", CachedURL("https://example.com", expires_at, True))
+
+        clock.now = 9
+        assert cache.get("abc123") is not None
+        clock.now = 11
+        assert cache.get("abc123") is None
+
+    def test_expired_link_not_cached(self, cache: URLCache) -> None:
+        expires_at = datetime.now(UTC) - timedelta(seconds=1)
+        cache.set("abc123", CachedURL("https://example.com", expires_at, True))
+
+        assert len(cache) == 0
+
+    def test_negative_entry(self, cache: URLCache, clock: FakeClock) -> None:
+        cache.set_missing("nonexistent")
+
+        cached_url = cache.get("nonexistent")
+        assert cached_url is not None
+        assert not cached_url.is_active
+
+        clock.now = 6
+        assert cache.get("nonexistent") is None
+
+    def test_invalidate(self, cache: URLCache) -> None:
+        cache.set("abc123", CachedURL("https://example.com", None, True))
+        cache.invalidate("abc123")
+
+        assert cache.get("abc123") is None
+
+
+class TestGetCachedDbUrl:
+    @pytest.mark.asyncio
+    async def test_miss_then_hit(self, mock_db_session: AsyncMock, sample_db_url: MockURL) -> None:
+        cached_url = CachedURL(sample_db_url.original_url, None, True)
+
+        with patch("app.crud.lookup_db_url", new_callable=AsyncMock, return_value=cached_url) as mock_get:
+            first = await get_cached_db_url("abc123", mock_db_session)
+            second = await get_cached_db_url("abc123", mock_db_session)
+
+        assert first == second == cached_url
+        mock_get.assert_called_once()
+
+    @pytest.mark.asyncio
+    async def test_negative_caching(self, mock_db_session: AsyncMock) -> None:
+        with patch("app.crud.lookup_db_url", new_callable=AsyncMock, return_value=None) as mock_get:
+            assert await get_cached_db_url("nonexistent", mock_db_session) is None
+            assert await get_cached_db_url("nonexistent", mock_db_session) is None
+
+        mock_get.assert_called_once()
+
+
+class TestCachedCount:
+    def test_expires_after_ttl(self, clock: FakeClock) -> None:
+        count = CachedCount(ttl=30, clock=clock)
+        assert count.get() is None
+
+        count.set(42)
+        assert count.get() == 42
+
+        clock.now = 31
+        assert count.get() is None
+
+
+class TestBytesLRUCache:
+    def test_evicts_by_size(self) -> None:
+        cache = BytesLRUCache(max_bytes=10)
+        cache.set("a", b"1234")
+        cache.set("b", b"1234")
+        cache.get("a")
+        cache.set("c", b"1234")
+
+        assert cache.get("b") is None
+        assert cache.get("a") == b"1234"
+        assert cache.size_bytes == 8
+        assert cache.stats()["evictions"] == 1
+
+    def test_skips_values_larger_than_limit(self) -> None:
+        cache = BytesLRUCache(max_bytes=2)
+        cache.set("a", b"1234")
+
+        assert len(cache) == 0
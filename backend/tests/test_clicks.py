@@ -0,0 +1,78 @@
+import asyncio
+from collections import Counter
+from collections.abc import Mapping
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.clicks import ClickAggregator
+
+
+@pytest.fixture
+def aggregator() -> ClickAggregator:
+    return ClickAggregator(MagicMock(), max_pending=100)
+
+
+class TestClickAggregator:
+    @pytest.mark.asyncio
+    async def test_flush_batches_counts(self, aggregator: ClickAggregator) -> None:
+        for short_url in ["abc123", "abc123", "def456"]:
+            aggregator.record(short_url)
+
+        with patch("app.clicks.increment_db_url_click_counts", new_callable=AsyncMock) as mock_increment:
+            assert await aggregator.flush() == 3
+
+        mock_increment.assert_called_once()
+        assert mock_increment.call_args.args[0] == {"abc123": 2, "def456": 1}
+        assert aggregator.pending == 0
+
+    @pytest.mark.asyncio
+    async def test_flush_without_pending(self, aggregator: ClickAggregator) -> None:
+        with patch("app.clicks.increment_db_url_click_counts", new_callable=AsyncMock) as mock_increment:
+            assert await aggregator.flush() == 0
+
+        mock_increment.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_no_increments_lost_across_flushes(self, aggregator: ClickAggregator) -> None:
+        flushed: Counter[str] = Counter()
+
+        async def increment(click_counts: Mapping[str, int], db: AsyncSession) -> None:
+            # Clicks arriving mid-flush must be carried over to the next batch.
+            aggregator.record("abc123")
+            await asyncio.sleep(0)
+            flushed.update(click_counts)
+
+        with patch("app.clicks.increment_db_url_click_counts", side_effect=increment):
+            for _ in range(5):
+                aggregator.record("abc123")
+                aggregator.record("def456")
+                await aggregator.flush()
+
+        assert flushed == {"abc123": 9, "def456": 5}
+        assert aggregator.pending == 1
+
+    @pytest.mark.asyncio
+    async def test_failed_flush_keeps_counts(self, aggregator: ClickAggregator) -> None:
+        aggregator.record("abc123")
+
+        with (
+            patch("app.clicks.increment_db_url_click_counts", side_effect=RuntimeError("db down")),
+            pytest.raises(RuntimeError),
+        ):
+            await aggregator.flush()
+
+        assert aggregator.pending == 1
+
+    @pytest.mark.asyncio
+    async def test_flush_when_max_pending_reached(self) -> None:
+        aggregator = ClickAggregator(MagicMock(), max_pending=2)
+
+        with patch("app.clicks.increment_db_url_click_counts", new_callable=AsyncMock) as mock_increment:
+            aggregator.record("abc123")
+            aggregator.record("def456")
+            await asyncio.sleep(0)
+
+        mock_increment.assert_called_once()
+        assert aggregator.pending == 0
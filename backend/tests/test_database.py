@@ -0,0 +1,132 @@
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+from unittest.mock import patch
+
+import pytest
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine
+
+from app.cache import CachedURL
+from app.database import (
+    InstrumentedPool,
+    async_session_maker,
+    dispose_engines,
+    get_engine,
+    get_read_session,
+    init_engines,
+    is_replica_session,
+    open_read_session,
+    replica_engines,
+)
+from app.routers.redirects import redirect_to_original_url
+from app.shared_cache import shared_url_cache
+
+
+@asynccontextmanager
+async def engines(*replica_urls: str) -> AsyncIterator[None]:
+    # The primary is an in-memory SQLite database; replica_urls stand in for the configured replicas, in order.
+    urls = iter(["sqlite+aiosqlite://", *replica_urls])
+    with (
+        patch("app.database.settings.db_read_replica_urls", ",".join(f"replica-{i}" for i in range(len(replica_urls)))),
+        patch("app.database.create_engine", lambda _: create_async_engine(next(urls), poolclass=InstrumentedPool)),
+    ):
+        init_engines()
+
+    try:
+        yield
+    finally:
+        await dispose_engines()
+
+
+def pool_checkouts(engine: AsyncEngine) -> int:
+    assert isinstance(engine.pool, InstrumentedPool)
+    return engine.pool.checkouts
+
+
+class TestInstrumentedPool:
+    @pytest.mark.asyncio
+    async def test_records_checkouts(self) -> None:
+        engine = create_async_engine("sqlite+aiosqlite://", poolclass=InstrumentedPool, pool_size=2, max_overflow=2)
+        assert isinstance(engine.pool, InstrumentedPool)
+
+        try:
+            async with engine.connect() as connection:
+                await connection.execute(text("SELECT 1"))
+                stats = engine.pool.stats()
+                assert stats["checked_out"] == 1
+                assert stats["utilization"] == 0.25
+
+            stats = engine.pool.stats()
+            assert stats["checkouts"] == 1
+            assert stats["checked_out"] == 0
+            assert stats["checkout_wait_seconds"] >= 0
+        finally:
+            await engine.dispose()
+
+
+class TestEngines:
+    @pytest.mark.asyncio
+    async def test_created_on_init_and_released_on_dispose(self) -> None:
+        with pytest.raises(RuntimeError):
+            get_engine()
+
+        with patch("app.database.create_engine", lambda url: create_async_engine("sqlite+aiosqlite://")):
+            init_engines()
+
+        try:
+            assert async_session_maker.kw["bind"] is get_engine()
+        finally:
+            await dispose_engines()
+
+        assert async_session_maker.kw["bind"] is None
+        with pytest.raises(RuntimeError):
+            get_engine()
+
+
+class TestOpenReadSession:
+    @pytest.mark.asyncio
+    async def test_uses_primary_without_replicas(self) -> None:
+        async with engines():
+            session = open_read_session()
+
+            assert session.bind is get_engine()
+            assert not is_replica_session(session)
+            await session.close()
+
+    @pytest.mark.asyncio
+    async def test_uses_replica(self) -> None:
+        async with engines("sqlite+aiosqlite://"):
+            async with open_read_session() as session:
+                await session.execute(text("SELECT 1"))
+
+                assert is_replica_session(session)
+
+            assert pool_checkouts(replica_engines[0]) == 1
+            assert pool_checkouts(get_engine()) == 0
+
+    @pytest.mark.asyncio
+    async def test_falls_back_to_primary_on_first_statement(self) -> None:
+        async with engines("sqlite+aiosqlite:////nonexistent/replica.db"):
+            async with open_read_session() as session:
+                assert is_replica_session(session)
+
+                assert (await session.execute(text("SELECT 1"))).scalar() == 1
+                assert (await session.execute(text("SELECT 2"))).scalar() == 2
+
+                assert not is_replica_session(session)
+
+            assert pool_checkouts(replica_engines[0]) == 1
+            assert pool_checkouts(get_engine()) == 1
+
+    @pytest.mark.asyncio
+    async def test_cached_redirect_does_not_connect(self) -> None:
+        async with engines("sqlite+aiosqlite://"):
+            await shared_url_cache.set("abc123", CachedURL("https://example.com/", None, True))
+
+            sessions = get_read_session()
+            response = await redirect_to_original_url("abc123", await anext(sessions))
+            await sessions.aclose()
+
+            assert response.headers["location"] == "https://example.com/"
+            assert pool_checkouts(replica_engines[0]) == 0
+            assert pool_checkouts(get_engine()) == 0
@@ -0,0 +1,90 @@
+from datetime import UTC, datetime, timedelta
+from unittest.mock import AsyncMock, patch
+
+import pytest
+
+from app.batch import create_batch_urls
+from app.crud import get_db_duplicate_urls
+from app.enums import ExpirationOption
+from app.models import URL
+from app.schemas import URLCreate, URLResponse
+from app.utils import get_url_dedup_key
+
+ORIGINAL_URL = "https://example.com/"
+
+
+def make_db_url(
+    short_url: str, expires_in: ExpirationOption, expires_at: datetime | None, original_url: str = ORIGINAL_URL
+) -> URL:
+    return URL(
+        short_url=short_url,
+        original_url=original_url,
+        expires_at=expires_at,
+        is_active=True,
+        dedup_key=get_url_dedup_key(ORIGINAL_URL, expires_in),
+    )
+
+
+class TestGetUrlDedupKey:
+    def test_expiry_option_is_part_of_key(self) -> None:
+        key = get_url_dedup_key(ORIGINAL_URL, ExpirationOption.one_hour)
+
+        assert len(key) == 32
+        assert key == get_url_dedup_key(ORIGINAL_URL, ExpirationOption.one_hour)
+        assert key != get_url_dedup_key(ORIGINAL_URL, ExpirationOption.indefinite)
+
+
+class TestGetDbDuplicateUrls:
+    @pytest.mark.asyncio
+    async def test_reuses_newest_link_with_enough_lifetime_left(self, mock_db_session: AsyncMock) -> None:
+        now = datetime.now(UTC)
+        mock_db_session.scalars.return_value = [
+            make_db_url("older", ExpirationOption.one_day, now + timedelta(hours=20)),
+            make_db_url("newer", ExpirationOption.one_day, now + timedelta(hours=23)),
+            make_db_url("forever", ExpirationOption.indefinite, None),
+        ]
+
+        duplicates = await get_db_duplicate_urls(
+            [(ORIGINAL_URL, ExpirationOption.one_day), (ORIGINAL_URL, ExpirationOption.indefinite)], mock_db_session
+        )
+
+        assert duplicates[ORIGINAL_URL, ExpirationOption.one_day].short_url == "newer"
+        assert duplicates[ORIGINAL_URL, ExpirationOption.indefinite].short_url == "forever"
+
+    @pytest.mark.asyncio
+    async def test_skips_expiring_links_and_collisions(self, mock_db_session: AsyncMock) -> None:
+        now = datetime.now(UTC)
+        mock_db_session.scalars.return_value = [
+            make_db_url("expiring", ExpirationOption.one_hour, now + timedelta(minutes=10)),
+            make_db_url("collision", ExpirationOption.indefinite, None, original_url="https://other.com/"),
+        ]
+
+        duplicates = await get_db_duplicate_urls(
+            [(ORIGINAL_URL, ExpirationOption.one_hour), (ORIGINAL_URL, ExpirationOption.indefinite)], mock_db_session
+        )
+
+        assert duplicates == {}
+
+
+class TestCreateBatchUrlsDedup:
+    @pytest.mark.asyncio
+    async def test_duplicates_are_not_recreated(self, mock_db_session: AsyncMock) -> None:
+        urls = {
+            0: URLCreate.model_validate({"original_url": ORIGINAL_URL, "expires_in": ExpirationOption.indefinite}),
+            1: URLCreate.model_validate({"original_url": "https://b.com", "expires_in": ExpirationOption.indefinite}),
+        }
+        duplicates = {
+            (ORIGINAL_URL, ExpirationOption.indefinite): make_db_url("existing", ExpirationOption.indefinite, None)
+        }
+
+        with (
+            patch("app.batch.settings.url_dedup_enabled", True),
+            patch("app.batch.get_db_duplicate_urls", new_callable=AsyncMock, return_value=duplicates),
+            patch("app.batch.generate_short_url", return_value="new"),
+            patch("app.batch.create_db_urls", new_callable=AsyncMock, return_value={}) as mock_create,
+        ):
+            results = await create_batch_urls(urls, mock_db_session)
+
+        assert isinstance(results[0], URLResponse)
+        assert results[0].short_url == "existing"
+        assert [row[1] for row in mock_create.call_args_list[0].args[0]] == ["https://b.com/"]
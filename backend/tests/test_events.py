@@ -0,0 +1,116 @@
+from collections.abc import Sequence
+from datetime import timedelta
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.crud import prune_db_click_events
+from app.enums import UserAgentClass
+from app.events import ClickEventBuffer, prune_click_events
+from app.models import ClickEventRecord
+from app.utils import classify_user_agent, get_referrer_host
+
+
+@pytest.fixture
+def buffer() -> ClickEventBuffer:
+    return ClickEventBuffer(MagicMock(), max_size=5, batch_size=2)
+
+
+class TestClickEventBuffer:
+    def test_record_builds_event(self, buffer: ClickEventBuffer) -> None:
+        buffer.record("abc123", "https://news.ycombinator.com/item?id=1", "curl/8.0")
+
+        event = buffer._events[0]
+        assert event.short_url == "abc123"
+        assert event.referrer_host == "news.ycombinator.com"
+        assert event.user_agent_class == UserAgentClass.bot.value
+
+    def test_full_buffer_drops_oldest(self) -> None:
+        buffer = ClickEventBuffer(MagicMock(), max_size=2, batch_size=10)
+        for short_url in ["a", "b", "c"]:
+            buffer.record(short_url, None, None)
+
+        assert [event.short_url for event in buffer._events] == ["b", "c"]
+        assert buffer.dropped == 1
+
+    @pytest.mark.asyncio
+    async def test_flush_copies_in_batches(self, buffer: ClickEventBuffer) -> None:
+        batches: list[list[str]] = []
+
+        async def copy(events: Sequence[ClickEventRecord], db: AsyncSession) -> None:
+            batches.append([event.short_url for event in events])
+
+        buffer._events.extend(ClickEventRecord(short_url, MagicMock(), None, "other") for short_url in "abcde")
+
+        with patch("app.events.copy_db_click_events", side_effect=copy):
+            assert await buffer.flush() == 5
+
+        assert batches == [["a", "b"], ["c", "d"], ["e"]]
+        assert len(buffer) == 0
+
+    @pytest.mark.asyncio
+    async def test_failed_flush_keeps_events(self, buffer: ClickEventBuffer) -> None:
+        buffer._events.extend(ClickEventRecord(short_url, MagicMock(), None, "other") for short_url in "abc")
+
+        with (
+            patch("app.events.copy_db_click_events", new_callable=AsyncMock, side_effect=RuntimeError("db down")),
+            pytest.raises(RuntimeError),
+        ):
+            await buffer.flush()
+
+        assert [event.short_url for event in buffer._events] == ["a", "b", "c"]
+
+
+class TestPruneClickEvents:
+    @pytest.mark.asyncio
+    async def test_deletes_only_rolled_up_events(self, mock_db_session: AsyncMock) -> None:
+        mock_db_session.scalar.return_value = True
+        mock_db_session.scalars.return_value = [1, 2, 3]
+
+        assert await prune_db_click_events(timedelta(days=7), 100, 1, mock_db_session) == 3
+
+        stmt = mock_db_session.scalars.call_args.args[0]
+        sql = str(stmt.compile(dialect=postgresql.dialect()))
+        assert sql.startswith("DELETE FROM click_events")
+        assert "click_events.id <= (SELECT click_rollup_state.last_event_id" in sql
+        mock_db_session.commit.assert_called_once()
+
+    @pytest.mark.asyncio
+    async def test_skips_when_locked(self, mock_db_session: AsyncMock) -> None:
+        mock_db_session.scalar.return_value = False
+
+        assert await prune_db_click_events(timedelta(days=7), 100, 1, mock_db_session) is None
+        mock_db_session.scalars.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_runs_batches_until_done(self) -> None:
+        with (
+            patch("app.events.async_session_maker"),
+            patch("app.events.settings.click_events_prune_batch_size", 2),
+            patch("app.events.prune_db_click_events", new_callable=AsyncMock, side_effect=[2, 2, 0]) as prune,
+        ):
+            assert await prune_click_events() == 4
+
+        assert prune.call_count == 3
+
+
+class TestClickEventHelpers:
+    @pytest.mark.parametrize(
+        ("user_agent", "expected"),
+        [
+            (None, UserAgentClass.other),
+            ("Mozilla/5.0 (compatible; Googlebot/2.1)", UserAgentClass.bot),
+            ("Mozilla/5.0 (iPhone; CPU iPhone OS 17_0 like Mac OS X) Mobile/15E148", UserAgentClass.mobile),
+            ("Mozilla/5.0 (Windows NT 10.0; Win64; x64) Chrome/126.0", UserAgentClass.desktop),
+            ("SomeClient/1.0", UserAgentClass.other),
+        ],
+    )
+    def test_classify_user_agent(self, user_agent: str | None, expected: UserAgentClass) -> None:
+        assert classify_user_agent(user_agent) == expected
+
+    def test_get_referrer_host(self) -> None:
+        assert get_referrer_host("https://Example.com:8080/path") == "example.com"
+        assert get_referrer_host("not a url") is None
+        assert get_referrer_host(None) is None
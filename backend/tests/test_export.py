@@ -0,0 +1,117 @@
+import json
+from collections.abc import AsyncIterator
+from datetime import UTC, datetime
+from typing import Any, NamedTuple
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+from starlette.requests import ClientDisconnect
+from starlette.types import Message
+
+from app.crud import stream_db_urls
+from app.enums import ExportFormat
+from app.export import ExportResponse, stream_url_export
+from app.routers.urls import export_urls
+
+
+class ExportRow(NamedTuple):
+    id: int
+    short_url: str
+    original_url: str
+    created_at: datetime
+    expires_at: datetime | None
+    is_active: bool
+    click_count: int
+    is_custom_alias: bool
+
+
+ROWS = [
+    ExportRow(1, "abc123", "https://example.com/", datetime(2026, 1, 1, tzinfo=UTC), None, True, 3, False),
+    ExportRow(2, "promo", "https://example.com/a,b", datetime(2026, 1, 2, tzinfo=UTC), None, False, 0, True),
+]
+
+
+async def batches(*_: object) -> AsyncIterator[list[ExportRow]]:
+    yield ROWS[:1]
+    yield ROWS[1:]
+
+
+async def export(export_format: ExportFormat) -> bytes:
+    with (
+        patch("app.export.open_read_session", return_value=MagicMock()),
+        patch("app.export.stream_db_urls", batches),
+    ):
+        return b"".join([chunk async for chunk in stream_url_export(export_format, None, None, None)])
+
+
+class TestStreamUrlExport:
+    @pytest.mark.asyncio
+    async def test_ndjson(self) -> None:
+        lines = (await export(ExportFormat.ndjson)).splitlines()
+
+        assert [json.loads(line)["short_url"] for line in lines] == ["abc123", "promo"]
+        assert json.loads(lines[0])["created_at"] == "2026-01-01T00:00:00Z"
+
+    @pytest.mark.asyncio
+    async def test_csv(self) -> None:
+        lines = (await export(ExportFormat.csv)).decode().splitlines()
+
+        assert lines == [
+            "id,short_url,original_url,created_at,expires_at,is_active,click_count,is_custom_alias",
+            "1,abc123,https://example.com/,2026-01-01T00:00:00+00:00,,True,3,False",
+            '2,promo,"https://example.com/a,b",2026-01-02T00:00:00+00:00,,False,0,True',
+        ]
+
+
+class TestStreamDbUrls:
+    @pytest.mark.asyncio
+    async def test_filters_and_closes_cursor(self, mock_db_session: AsyncMock) -> None:
+        result = MagicMock()
+        result.partitions.return_value = batches()
+        result.close = AsyncMock()
+        mock_db_session.stream.return_value = result
+
+        rows = [row async for batch in stream_db_urls(True, None, False, 500, mock_db_session) for row in batch]
+
+        stmt = mock_db_session.stream.call_args.args[0]
+        assert rows == ROWS
+        assert stmt.get_execution_options()["yield_per"] == 500
+        assert "urls.is_active = " in str(stmt)
+        assert "urls.expires_at <= now()" in str(stmt)
+        result.close.assert_awaited_once()
+
+
+class TestExportResponse:
+    @pytest.mark.asyncio
+    async def test_disconnect_closes_body(self) -> None:
+        closed = False
+
+        async def body() -> AsyncIterator[bytes]:
+            nonlocal closed
+            try:
+                while True:
+                    yield b"row\n"
+            finally:
+                closed = True
+
+        async def receive() -> Message:
+            return {"type": "http.request", "body": b"", "more_body": False}
+
+        async def send(message: Message) -> None:
+            if message["type"] == "http.response.body":
+                raise OSError
+
+        scope: dict[str, Any] = {"type": "http", "asgi": {"spec_version": "2.4"}}
+        with pytest.raises(ClientDisconnect):
+            await ExportResponse(body())(scope, receive, send)
+
+        assert closed
+
+    @pytest.mark.asyncio
+    async def test_route_headers(self) -> None:
+        response = await export_urls(ExportFormat.csv)
+
+        assert isinstance(response, ExportResponse)
+        assert response.media_type == "text/csv"
+        assert response.headers["content-disposition"] == 'attachment; filename="urls.csv"'
+        await response.body_iterator.aclose()
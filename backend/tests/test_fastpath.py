@@ -0,0 +1,46 @@
+from datetime import UTC, datetime
+from unittest.mock import AsyncMock, patch
+
+import pytest
+
+from app.cache import CachedURL, url_cache
+from app.crud import redirect_db_url
+from app.fastpath import LOOKUP_URL_SQL, REDIRECT_URL_SQL, fetch_redirect_url, fetch_url
+
+
+class TestFastPath:
+    @pytest.mark.asyncio
+    async def test_fetch_url(self, mock_db_session: AsyncMock) -> None:
+        expires_at = datetime(2030, 1, 1, tzinfo=UTC)
+        driver_connection = AsyncMock()
+        driver_connection.fetchrow.return_value = ("https://example.com", expires_at, True)
+
+        with patch("app.fastpath.get_driver_connection", new_callable=AsyncMock, return_value=driver_connection):
+            result = await fetch_url("abc123", mock_db_session)
+
+        assert result == CachedURL("https://example.com", expires_at, True)
+        driver_connection.fetchrow.assert_called_once_with(LOOKUP_URL_SQL, "abc123")
+
+    @pytest.mark.asyncio
+    async def test_fetch_redirect_url_missing(self, mock_db_session: AsyncMock) -> None:
+        driver_connection = AsyncMock()
+        driver_connection.fetchrow.return_value = None
+
+        with patch("app.fastpath.get_driver_connection", new_callable=AsyncMock, return_value=driver_connection):
+            assert await fetch_redirect_url("nonexistent", mock_db_session) is None
+
+        driver_connection.fetchrow.assert_called_once_with(REDIRECT_URL_SQL, "nonexistent")
+
+    @pytest.mark.asyncio
+    async def test_redirect_db_url_uses_fast_path(self, mock_db_session: AsyncMock) -> None:
+        cached_url = CachedURL("https://example.com", None, True)
+
+        with (
+            patch("app.crud.settings.db_fast_path_enabled", True),
+            patch("app.crud.fetch_redirect_url", new_callable=AsyncMock, return_value=cached_url) as mock_fetch,
+        ):
+            assert await redirect_db_url("abc123", mock_db_session) == cached_url
+
+        mock_fetch.assert_called_once_with("abc123", mock_db_session)
+        mock_db_session.execute.assert_not_called()
+        assert url_cache.get("abc123") == cached_url
@@ -0,0 +1,57 @@
+from unittest.mock import AsyncMock, patch
+
+import pytest
+from pydantic import ValidationError
+
+from app.config import Settings
+from app.generators import SequenceShortURLGenerator
+from app.utils import encode_base62, generate_sequential_short_url, permute_id
+
+
+class TestSequentialShortUrl:
+    def test_permutation_is_unique(self) -> None:
+        codes = {generate_sequential_short_url(value, "secret") for value in range(1, 10_001)}
+        assert len(codes) == 10_000
+
+    def test_permutation_depends_on_secret(self) -> None:
+        assert permute_id(1, "secret") != permute_id(1, "other-secret")
+
+    def test_permutation_domain(self) -> None:
+        with pytest.raises(ValueError):
+            permute_id(1 << 56, "secret")
+
+    def test_codes_have_fixed_length(self) -> None:
+        assert len(encode_base62(0)) == 10
+        assert len(encode_base62((1 << 56) - 1)) == 10
+        assert len(generate_sequential_short_url(1, "secret")) == 10
+
+
+class TestSequenceShortURLGenerator:
+    @pytest.mark.asyncio
+    async def test_allocates_ids_in_blocks(self, mock_db_session: AsyncMock) -> None:
+        generator = SequenceShortURLGenerator("secret", block_size=3)
+
+        with patch(
+            "app.generators.allocate_db_short_url_ids", new_callable=AsyncMock, side_effect=[[1, 2, 3], [4, 5, 6]]
+        ) as mock_allocate:
+            codes = [await generator.next_short_url(mock_db_session) for _ in range(4)]
+
+        assert codes == [generate_sequential_short_url(value, "secret") for value in range(1, 5)]
+        assert mock_allocate.call_count == 2
+
+
+def make_settings(generator: str, secret: str) -> Settings:
+    return Settings.model_validate({"SHORT_URL_GENERATOR": generator, "SHORT_URL_SECRET": secret})
+
+
+class TestShortUrlSecret:
+    @pytest.mark.parametrize("secret", ["", "too-short"])
+    def test_sequence_requires_secret(self, secret: str) -> None:
+        with pytest.raises(ValidationError, match="SHORT_URL_SECRET"):
+            make_settings("sequence", secret)
+
+    def test_random_needs_no_secret(self) -> None:
+        assert make_settings("random", "").short_url_secret == ""
+
+    def test_sequence_with_secret(self) -> None:
+        assert make_settings("sequence", "x" * 16).short_url_generator == "sequence"
@@ -0,0 +1,105 @@
+import io
+import json
+from collections.abc import Sequence
+from datetime import UTC, datetime
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+
+from app.crud import import_db_urls
+from app.importer import import_urls, read_csv_rows, read_ndjson_rows
+from app.models import URLImportRecord
+from app.schemas import URLImportRow
+
+
+class StandInURLCodes:
+    # Stands in for the staging table merge: a code is imported only if nothing has claimed it yet.
+    def __init__(self, *existing: str) -> None:
+        self.claimed = set(existing)
+        self.records: list[URLImportRecord] = []
+
+    async def import_db_urls(self, records: Sequence[URLImportRecord], db: object) -> set[str]:
+        imported = {record.short_url for record in records} - self.claimed
+        self.claimed |= imported
+        self.records.extend(record for record in records if record.short_url in imported)
+        return imported
+
+
+def session_maker() -> MagicMock:
+    maker = MagicMock()
+    maker.return_value.__aenter__.return_value = AsyncMock()
+    return maker
+
+
+class TestImportUrls:
+    @pytest.mark.asyncio
+    async def test_csv(self) -> None:
+        file = io.StringIO(
+            "short_url,original_url,expires_at,click_count\n"
+            "legacy1,https://example.com/1,,5\n"
+            "legacy2,not a url,,\n"
+            "taken,https://example.com/3,,\n"
+            "legacy1,https://example.com/4,,\n"
+            "Legacy5,https://example.com/5,2030-01-01T00:00:00,\n"
+            "stats,https://example.com/6,,\n"
+        )
+        codes = StandInURLCodes("taken")
+        rejects = io.BytesIO()
+        progress = MagicMock()
+
+        with patch("app.importer.import_db_urls", codes.import_db_urls):
+            stats = await import_urls(read_csv_rows(file), rejects, 2, session_maker(), progress)
+
+        assert (stats.read, stats.imported, stats.rejected) == (6, 2, 4)
+        assert progress.call_count == 3
+        assert codes.records == [
+            URLImportRecord("legacy1", "https://example.com/1", None, 5),
+            URLImportRecord("Legacy5", "https://example.com/5", datetime(2030, 1, 1, tzinfo=UTC), 0),
+        ]
+
+        reject_lines = [json.loads(line) for line in rejects.getvalue().splitlines()]
+        assert [reject["line"] for reject in reject_lines] == [3, 4, 5, 7]
+        assert reject_lines[0]["row"] == {"short_url": "legacy2", "original_url": "not a url"}
+        assert reject_lines[1]["error"] == "Short URL taken is already taken."
+        assert reject_lines[2]["error"] == "Short URL legacy1 is already taken."
+        assert "reserved word" in reject_lines[3]["error"]
+
+    @pytest.mark.asyncio
+    async def test_ndjson(self) -> None:
+        file = io.BytesIO(b'{"short_url": "a1", "original_url": "https://example.com"}\n\nnot json\n')
+        codes = StandInURLCodes()
+        rejects = io.BytesIO()
+
+        with patch("app.importer.import_db_urls", codes.import_db_urls):
+            stats = await import_urls(read_ndjson_rows(file), rejects, 100, session_maker())
+
+        assert (stats.read, stats.imported, stats.rejected) == (2, 1, 1)
+        assert json.loads(rejects.getvalue())["line"] == 3
+
+
+class TestImportDbUrls:
+    @pytest.mark.asyncio
+    async def test_copies_into_staging_and_merges(self, mock_db_session: AsyncMock) -> None:
+        driver_connection = AsyncMock()
+        mock_db_session.scalars.return_value = ["a1"]
+        records = [URLImportRecord("a1", "https://example.com/", None, 0)]
+
+        with patch("app.crud.get_driver_connection", new_callable=AsyncMock, return_value=driver_connection):
+            imported = await import_db_urls(records, mock_db_session)
+
+        assert imported == {"a1"}
+        driver_connection.copy_records_to_table.assert_awaited_once_with(
+            "url_imports", records=records, columns=["short_url", "original_url", "expires_at", "click_count"]
+        )
+        assert "ON CONFLICT (short_url) DO NOTHING" in str(mock_db_session.scalars.call_args.args[0])
+        mock_db_session.commit.assert_awaited_once()
+
+
+class TestURLImportRow:
+    def test_naive_expiry_is_utc(self) -> None:
+        row = URLImportRow.model_validate(
+            {"short_url": "a1", "original_url": "https://example.com", "expires_at": "2030-01-01T00:00:00"}
+        )
+
+        assert row.expires_at == datetime(2030, 1, 1, tzinfo=UTC)
+        assert row.click_count == 0
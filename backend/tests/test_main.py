@@ -1,20 +1,26 @@
+import io
+import os
+import subprocess
+import sys
+import zipfile
+from datetime import UTC, datetime, timedelta
 from unittest.mock import AsyncMock, patch
 
 import pytest
 from fastapi import HTTPException
 from pydantic import HttpUrl
 
-from app.routers.qr import get_qr_code
-from app.routers.urls import (
-    create_short_url,
-    get_all_urls,
-    get_url_or_404,
-    get_url_stats,
-    raise_bad_request,
-    raise_not_found,
-    redirect_to_original_url,
-)
-from app.schemas import URLCreate, URLResponse, URLStats
+from app.cache import CachedURL, url_cache
+from app.enums import RedirectStatus, TimeseriesGranularity
+from app.hll import HyperLogLog
+from app.main import create_app
+from app.rendering import QRCodeRendererBusyError
+from app.routers.errors import raise_bad_request, raise_not_found
+from app.routers.qr import get_qr_code, get_qr_code_archive
+from app.routers.redirects import build_redirect_response, redirect_to_original_url
+from app.routers.urls import create_short_url, get_all_urls, get_url_or_404, get_url_stats, get_url_timeseries
+from app.schemas import QRCodeBatchRequest, URLCreate, URLListResponse, URLResponse, URLStats
+from app.utils import encode_cursor
 from tests.conftest import MockURL
 
 
@@ -114,6 +120,52 @@ class TestCreateShortUrl:
             assert exc_info.value.status_code == 400
             assert "Failed to generate" in exc_info.value.detail
 
+    @pytest.mark.asyncio
+    async def test_create_short_url_sequence_generator(
+        self, mock_db_session: AsyncMock, sample_url_data: URLCreate, sample_db_url: MockURL
+    ) -> None:
+        with (
+            patch("app.routers.urls.settings.short_url_generator", "sequence"),
+            patch("app.routers.urls.short_url_generator.next_short_url", new_callable=AsyncMock, return_value="abc123"),
+            patch("app.routers.urls.check_db_url_exists", new_callable=AsyncMock) as mock_exists,
+            patch("app.routers.urls.create_db_url", new_callable=AsyncMock, return_value=sample_db_url),
+        ):
+            result = await create_short_url(sample_url_data, mock_db_session)
+
+            assert result.short_url == sample_db_url.short_url
+            mock_exists.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_create_short_url_returns_duplicate(
+        self, mock_db_session: AsyncMock, sample_url_data: URLCreate, sample_db_url: MockURL
+    ) -> None:
+        duplicates = {(str(sample_url_data.original_url), sample_url_data.expires_in): sample_db_url}
+        with (
+            patch("app.routers.urls.settings.url_dedup_enabled", True),
+            patch("app.routers.urls.get_db_duplicate_urls", new_callable=AsyncMock, return_value=duplicates),
+            patch("app.routers.urls.create_db_url", new_callable=AsyncMock) as mock_create,
+        ):
+            result = await create_short_url(sample_url_data, mock_db_session)
+
+            assert result.short_url == sample_db_url.short_url
+            mock_create.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_create_permanent_short_url_is_never_deduplicated(
+        self, mock_db_session: AsyncMock, sample_url_data: URLCreate, sample_db_url: MockURL
+    ) -> None:
+        url = sample_url_data.model_copy(update={"redirect_status": RedirectStatus.permanent_redirect})
+        with (
+            patch("app.routers.urls.settings.url_dedup_enabled", True),
+            patch("app.routers.urls.get_db_duplicate_urls", new_callable=AsyncMock) as mock_duplicates,
+            patch("app.routers.urls.check_db_url_exists", new_callable=AsyncMock, return_value=False),
+            patch("app.routers.urls.create_db_url", new_callable=AsyncMock, return_value=sample_db_url) as mock_create,
+        ):
+            await create_short_url(url, mock_db_session)
+
+            mock_duplicates.assert_not_called()
+            assert mock_create.call_args.kwargs["redirect_status"] == RedirectStatus.permanent_redirect
+
 
 class TestGetAllUrls:
     @pytest.mark.asyncio
@@ -123,7 +175,8 @@ class TestGetAllUrls:
             new_callable=AsyncMock,
             return_value=(multiple_db_urls, len(multiple_db_urls)),
         ):
-            result = await get_all_urls(mock_db_session, 1, 10)
+            response = await get_all_urls(mock_db_session, 1, 10)
+            result = URLListResponse.model_validate_json(bytes(response.body))
 
             assert result.total == 3
             assert result.page == 1
@@ -146,20 +199,61 @@ class TestGetAllUrls:
         page_urls = multiple_db_urls[2:3]
 
         with patch("app.routers.urls.get_db_urls", new_callable=AsyncMock, return_value=(page_urls, 3)):
-            result = await get_all_urls(mock_db_session, 2, 2)
+            response = await get_all_urls(mock_db_session, 2, 2)
+            result = URLListResponse.model_validate_json(bytes(response.body))
 
             assert result.total == 3
             assert result.page == 2
             assert result.page_size == 2
             assert result.total_pages == 2
             assert len(result.urls) == 1
+            assert result.next_cursor is None
+
+    @pytest.mark.asyncio
+    async def test_get_all_urls_returns_next_cursor(
+        self, mock_db_session: AsyncMock, multiple_db_urls: list[MockURL]
+    ) -> None:
+        with patch("app.routers.urls.get_db_urls", new_callable=AsyncMock, return_value=(multiple_db_urls[:2], 3)):
+            response = await get_all_urls(mock_db_session, 1, 2)
+            result = URLListResponse.model_validate_json(bytes(response.body))
+
+            assert result.next_cursor == encode_cursor(2)
+
+    @pytest.mark.asyncio
+    async def test_get_all_urls_after_cursor(self, mock_db_session: AsyncMock, multiple_db_urls: list[MockURL]) -> None:
+        with patch(
+            "app.routers.urls.get_db_urls_after", new_callable=AsyncMock, return_value=(multiple_db_urls[2:], 3)
+        ) as mock_get:
+            response = await get_all_urls(mock_db_session, 1, 2, encode_cursor(2))
+            result = URLListResponse.model_validate_json(bytes(response.body))
+
+            mock_get.assert_called_once_with(2, 2, mock_db_session)
+            assert len(result.urls) == 1
+            assert result.next_cursor is None
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("cursor", ["not a cursor", encode_cursor(-1), encode_cursor(2**31), encode_cursor(10**30)])
+    async def test_get_all_urls_invalid_cursor(self, mock_db_session: AsyncMock, cursor: str) -> None:
+        with pytest.raises(HTTPException) as exc_info:
+            await get_all_urls(mock_db_session, 1, 10, cursor)
+
+        assert exc_info.value.status_code == 400
+        mock_db_session.execute.assert_not_called()
 
 
 class TestGetUrlStats:
     @pytest.mark.asyncio
     async def test_get_url_stats_success(self, mock_db_session: AsyncMock, sample_db_url: MockURL) -> None:
-        with patch("app.routers.urls.get_url_or_404", new_callable=AsyncMock, return_value=sample_db_url):
-            result = await get_url_stats("abc123", mock_db_session)
+        sketch = HyperLogLog(12)
+        for visitor in ["a", "b", "a"]:
+            sketch.add(visitor)
+
+        with (
+            patch("app.routers.urls.get_url_or_404", new_callable=AsyncMock, return_value=sample_db_url),
+            patch("app.routers.urls.get_db_visitor_sketch", new_callable=AsyncMock, return_value=sketch),
+        ):
+            response = await get_url_stats("abc123", mock_db_session)
+            result = URLStats.model_validate_json(bytes(response.body))
 
             expected_response = URLStats(
                 original_url=HttpUrl(sample_db_url.original_url),
@@ -168,47 +262,296 @@ class TestGetUrlStats:
                 expires_at=sample_db_url.expires_at,
                 created_at=sample_db_url.created_at,
                 click_count=sample_db_url.click_count,
+                unique_visitors_estimate=2,
+                unique_visitors_relative_error=sketch.relative_error,
             )
             assert result == expected_response
 
 
+class TestGetUrlTimeseries:
+    @pytest.mark.asyncio
+    async def test_get_url_timeseries(self, mock_db_session: AsyncMock, sample_db_url: MockURL) -> None:
+        bucket_start = datetime(2026, 1, 1, tzinfo=UTC)
+
+        with (
+            patch("app.routers.urls.get_cached_url_or_404", new_callable=AsyncMock, return_value=sample_db_url),
+            patch(
+                "app.routers.urls.get_db_click_timeseries", new_callable=AsyncMock, return_value=[(bucket_start, 5)]
+            ) as mock_timeseries,
+        ):
+            result = await get_url_timeseries("abc123", mock_db_session, TimeseriesGranularity.day)
+
+            assert result.points[0].bucket_start == bucket_start
+            assert result.points[0].clicks == 5
+            assert result.until - result.since == timedelta(days=90)
+            assert mock_timeseries.call_args.args[1] == TimeseriesGranularity.day
+
+    @pytest.mark.asyncio
+    async def test_get_url_timeseries_invalid_range(self, mock_db_session: AsyncMock, sample_db_url: MockURL) -> None:
+        now = datetime.now(UTC)
+
+        with patch("app.routers.urls.get_cached_url_or_404", new_callable=AsyncMock, return_value=sample_db_url):
+            with pytest.raises(HTTPException) as exc_info:
+                await get_url_timeseries("abc123", mock_db_session, TimeseriesGranularity.hour, now, now)
+
+            assert exc_info.value.status_code == 400
+
+
 class TestRedirectToOriginalUrl:
     @pytest.mark.asyncio
     async def test_redirect_success(self, mock_db_session: AsyncMock, sample_db_url: MockURL) -> None:
+        cached_url = CachedURL(sample_db_url.original_url, sample_db_url.expires_at, sample_db_url.is_active)
+
         with (
-            patch("app.routers.urls.get_url_or_404", new_callable=AsyncMock, return_value=sample_db_url),
-            patch("app.routers.urls.update_db_url_click_count", new_callable=AsyncMock) as mock_update,
+            patch(
+                "app.routers.redirects.redirect_db_url", new_callable=AsyncMock, return_value=cached_url
+            ) as mock_redirect,
+            patch("app.routers.redirects.click_aggregator") as mock_aggregator,
         ):
             result = await redirect_to_original_url("abc123", mock_db_session)
 
             assert result.headers["location"] == sample_db_url.original_url
             assert result.status_code == 307
-            mock_update.assert_called_once_with(sample_db_url, mock_db_session)
+            mock_redirect.assert_called_once_with("abc123", mock_db_session)
+            mock_aggregator.record.assert_not_called()
 
     @pytest.mark.asyncio
-    async def test_redirect_expired_url(self, mock_db_session: AsyncMock, sample_expired_url: MockURL) -> None:
+    async def test_redirect_records_click_event(self, mock_db_session: AsyncMock, sample_db_url: MockURL) -> None:
+        cached_url = CachedURL(sample_db_url.original_url, None, True)
+
+        with (
+            patch("app.routers.redirects.redirect_db_url", new_callable=AsyncMock, return_value=cached_url),
+            patch("app.routers.redirects.click_events") as mock_events,
+        ):
+            await redirect_to_original_url("abc123", mock_db_session, "https://example.org/", "curl/8.0")
+
+            mock_events.record.assert_called_once_with("abc123", "https://example.org/", "curl/8.0")
+
+    @pytest.mark.asyncio
+    async def test_redirect_records_visitor(self, mock_db_session: AsyncMock, sample_db_url: MockURL) -> None:
+        cached_url = CachedURL(sample_db_url.original_url, None, True)
+
+        with (
+            patch("app.routers.redirects.redirect_db_url", new_callable=AsyncMock, return_value=cached_url),
+            patch("app.routers.redirects.visitor_sketches") as mock_visitors,
+        ):
+            await redirect_to_original_url("abc123", mock_db_session, visitor_id="127.0.0.1|curl/8.0")
+
+            mock_visitors.record.assert_called_once_with("abc123", "127.0.0.1|curl/8.0")
+
+    @pytest.mark.asyncio
+    async def test_redirect_from_replica(self, mock_db_session: AsyncMock, sample_db_url: MockURL) -> None:
+        mock_db_session.info = {"replica": True}
+        cached_url = CachedURL(sample_db_url.original_url, None, True)
+
+        with (
+            patch("app.routers.redirects.lookup_db_url", new_callable=AsyncMock, return_value=cached_url),
+            patch("app.routers.redirects.redirect_db_url", new_callable=AsyncMock) as mock_redirect,
+            patch("app.routers.redirects.click_aggregator") as mock_aggregator,
+        ):
+            result = await redirect_to_original_url("abc123", mock_db_session)
+
+            assert result.headers["location"] == sample_db_url.original_url
+            mock_redirect.assert_not_called()
+            mock_aggregator.record.assert_called_once_with("abc123")
+            assert url_cache.get("abc123") == cached_url
+
+    @pytest.mark.asyncio
+    async def test_redirect_replica_miss_uses_primary(self, mock_db_session: AsyncMock, sample_db_url: MockURL) -> None:
+        mock_db_session.info = {"replica": True}
+        cached_url = CachedURL(sample_db_url.original_url, None, True)
+
         with (
-            patch("app.routers.urls.get_url_or_404", new_callable=AsyncMock, return_value=sample_expired_url),
-            patch("app.routers.urls.update_db_url_is_active", new_callable=AsyncMock) as mock_update,
+            patch("app.routers.redirects.lookup_db_url", new_callable=AsyncMock, return_value=None),
+            patch(
+                "app.routers.redirects.redirect_db_url", new_callable=AsyncMock, return_value=cached_url
+            ) as mock_redirect,
+            patch("app.routers.redirects.async_session_maker") as mock_session_maker,
         ):
+            result = await redirect_to_original_url("abc123", mock_db_session)
+
+            assert result.headers["location"] == sample_db_url.original_url
+            primary_session = mock_session_maker.return_value.__aenter__.return_value
+            mock_redirect.assert_called_once_with("abc123", primary_session)
+
+    @pytest.mark.asyncio
+    async def test_redirect_cache_hit(self, mock_db_session: AsyncMock, sample_db_url: MockURL) -> None:
+        url_cache.set("abc123", CachedURL(sample_db_url.original_url, None, True))
+
+        with (
+            patch("app.routers.redirects.redirect_db_url", new_callable=AsyncMock) as mock_redirect,
+            patch("app.routers.redirects.click_aggregator") as mock_aggregator,
+        ):
+            result = await redirect_to_original_url("abc123", mock_db_session)
+
+            assert result.headers["location"] == sample_db_url.original_url
+            mock_redirect.assert_not_called()
+            mock_aggregator.record.assert_called_once_with("abc123")
+
+    @pytest.mark.asyncio
+    async def test_redirect_not_found(self, mock_db_session: AsyncMock) -> None:
+        with patch("app.routers.redirects.redirect_db_url", new_callable=AsyncMock, return_value=None):
+            with pytest.raises(HTTPException) as exc_info:
+                await redirect_to_original_url("nonexistent", mock_db_session)
+
+            assert exc_info.value.status_code == 404
+            assert "doesn't exist" in exc_info.value.detail
+
+    @pytest.mark.asyncio
+    async def test_redirect_expired_url(self, mock_db_session: AsyncMock, sample_expired_url: MockURL) -> None:
+        cached_url = CachedURL(sample_expired_url.original_url, sample_expired_url.expires_at, False)
+
+        with patch("app.routers.redirects.redirect_db_url", new_callable=AsyncMock, return_value=cached_url):
             with pytest.raises(HTTPException) as exc_info:
                 await redirect_to_original_url("expired123", mock_db_session)
 
             assert exc_info.value.status_code == 404
             assert "expired" in exc_info.value.detail
-            mock_update.assert_called_once_with(sample_expired_url, mock_db_session)
 
 
+@pytest.mark.usefixtures("qr_renderer")
 class TestGetQrCode:
     @pytest.mark.asyncio
     async def test_get_qr_code_success(self, mock_db_session: AsyncMock, sample_db_url: MockURL) -> None:
         mock_qr_bytes = b"fake_qr_code_data"
 
         with (
-            patch("app.routers.qr.get_url_or_404", new_callable=AsyncMock, return_value=sample_db_url),
-            patch("app.routers.qr.generate_qr_code", return_value=mock_qr_bytes),
+            patch("app.routers.qr.get_cached_url_or_404", new_callable=AsyncMock, return_value=sample_db_url),
+            patch("app.rendering.generate_qr_code", return_value=mock_qr_bytes),
         ):
             result = await get_qr_code("abc123", mock_db_session)
 
             assert result.media_type == "image/png"
             assert "qr.png" in result.headers["Content-Disposition"]
+            assert result.body == mock_qr_bytes
+            assert result.headers["ETag"]
+            assert "max-age" in result.headers["Cache-Control"]
+
+    @pytest.mark.asyncio
+    async def test_get_qr_code_renders_once(self, mock_db_session: AsyncMock, sample_db_url: MockURL) -> None:
+        with (
+            patch("app.routers.qr.get_cached_url_or_404", new_callable=AsyncMock, return_value=sample_db_url),
+            patch("app.rendering.generate_qr_code", return_value=b"fake_qr_code_data") as mock_generate,
+        ):
+            first = await get_qr_code("abc123", mock_db_session)
+            second = await get_qr_code("abc123", mock_db_session)
+
+            assert first.body == second.body
+            mock_generate.assert_called_once()
+
+    @pytest.mark.asyncio
+    async def test_get_qr_code_not_modified(self, mock_db_session: AsyncMock, sample_db_url: MockURL) -> None:
+        with (
+            patch("app.routers.qr.get_cached_url_or_404", new_callable=AsyncMock, return_value=sample_db_url),
+            patch("app.rendering.generate_qr_code", return_value=b"fake_qr_code_data") as mock_generate,
+        ):
+            etag = (await get_qr_code("abc123", mock_db_session)).headers["ETag"]
+            mock_generate.reset_mock()
+
+            result = await get_qr_code("abc123", mock_db_session, if_none_match=etag)
+
+            assert result.status_code == 304
+            assert result.headers["ETag"] == etag
+            mock_generate.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_get_qr_code_renderer_busy(self, mock_db_session: AsyncMock, sample_db_url: MockURL) -> None:
+        with (
+            patch("app.routers.qr.get_cached_url_or_404", new_callable=AsyncMock, return_value=sample_db_url),
+            patch("app.routers.qr.qr_code_renderer.render", side_effect=QRCodeRendererBusyError),
+        ):
+            with pytest.raises(HTTPException) as exc_info:
+                await get_qr_code("abc123", mock_db_session)
+
+            assert exc_info.value.status_code == 503
+            assert exc_info.value.headers == {"Retry-After": "1"}
+
+    @pytest.mark.asyncio
+    async def test_get_qr_code_archive(self, mock_db_session: AsyncMock) -> None:
+        request = QRCodeBatchRequest(short_urls=["abc123", "def456", "abc123"])
+
+        with (
+            patch("app.routers.qr.get_db_active_short_urls", new_callable=AsyncMock, return_value={"abc123", "def456"}),
+            patch("app.rendering.generate_qr_code", side_effect=lambda url: url.encode()),
+        ):
+            result = await get_qr_code_archive(request, mock_db_session)
+            body = b"".join([chunk async for chunk in result.body_iterator if isinstance(chunk, bytes)])
+
+        with zipfile.ZipFile(io.BytesIO(body)) as archive:
+            assert archive.namelist() == ["abc123.png", "def456.png"]
+            assert archive.read("def456.png").endswith(b"/def456")
+
+    @pytest.mark.asyncio
+    async def test_get_qr_code_archive_missing(self, mock_db_session: AsyncMock) -> None:
+        request = QRCodeBatchRequest(short_urls=["abc123", "nonexistent"])
+
+        with patch("app.routers.qr.get_db_active_short_urls", new_callable=AsyncMock, return_value={"abc123"}):
+            with pytest.raises(HTTPException) as exc_info:
+                await get_qr_code_archive(request, mock_db_session)
+
+            assert exc_info.value.status_code == 404
+            assert "nonexistent" in exc_info.value.detail
+
+
+class TestBuildRedirectResponse:
+    def test_temporary_redirect_is_not_cached(self) -> None:
+        response = build_redirect_response("abc123", CachedURL("https://example.com/", None, True))
+
+        assert response.status_code == 307
+        assert response.headers["cache-control"] == "no-store"
+        assert "surrogate-key" not in response.headers
+
+    def test_permanent_redirect_is_cached_until_expiry(self) -> None:
+        expires_at = datetime.now(UTC) + timedelta(minutes=10)
+
+        with patch("app.routers.redirects.settings.redirect_cache_max_age", 3600):
+            forever = build_redirect_response("abc123", CachedURL("https://example.com/", None, True, 308))
+            expiring = build_redirect_response("abc123", CachedURL("https://example.com/", expires_at, True, 301))
+
+        assert forever.status_code == 308
+        assert forever.headers["cache-control"] == "public, max-age=3600"
+        assert expiring.status_code == 301
+        max_age = int(expiring.headers["cache-control"].removeprefix("public, max-age="))
+        assert 595 <= max_age <= 600
+
+    def test_expired_permanent_redirect_is_not_cached(self) -> None:
+        expires_at = datetime.now(UTC) - timedelta(seconds=1)
+
+        response = build_redirect_response("abc123", CachedURL("https://example.com/", expires_at, True, 301))
+
+        assert response.headers["cache-control"] == "no-store"
+
+    def test_surrogate_key(self) -> None:
+        with patch("app.routers.redirects.settings.redirect_surrogate_keys_enabled", True):
+            response = build_redirect_response(
+                "abc123", CachedURL("https://example.com/", None, True, RedirectStatus.permanent_redirect)
+            )
+
+        assert response.headers["surrogate-key"] == "redirects url-abc123"
+
+
+class TestCreateApp:
+    def test_profiles_select_routes(self) -> None:
+        paths = {profile: set(create_app(profile).openapi()["paths"]) for profile in ("full", "api", "redirect")}
+
+        assert {"/{short_url}", "/check/{short_url}", "/shorten", "/qr/{short_url}"} <= paths["full"]
+        assert "/shorten" in paths["api"]
+        assert "/{short_url}" not in paths["api"]
+        assert {"/{short_url}", "/check/{short_url}", "/cache/stats"} <= paths["redirect"]
+        assert "/shorten" not in paths["redirect"]
+        assert "/qr/{short_url}" not in paths["redirect"]
+
+    @pytest.mark.parametrize(
+        "module", ["qrcode", "PIL", "app.rendering", "app.routers.urls", "app.batch", "app.partitions", "app.sweeper"]
+    )
+    def test_redirect_profile_skips_write_imports(self, module: str) -> None:
+        code = f"import sys, app.main; print({module!r} in sys.modules)"
+        result = subprocess.run(
+            [sys.executable, "-c", code],
+            env={**os.environ, "APP_PROFILE": "redirect"},
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+
+        assert result.stdout.strip() == "False"
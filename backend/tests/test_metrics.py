@@ -0,0 +1,67 @@
+import httpx
+import pytest
+from fastapi import FastAPI
+
+from app.metrics import Counter, Histogram, MetricsMiddleware, get_statement_operation, http_requests
+from app.routers.metrics import get_metrics
+
+
+class TestHistogram:
+    def test_collect_is_cumulative(self) -> None:
+        histogram = Histogram("latency_seconds", "Latency.", ("route",), buckets=(0.1, 1.0))
+        for value in [0.05, 0.1, 0.5, 5.0]:
+            histogram.observe(value, ("/a",))
+
+        lines = list(histogram.collect())
+
+        assert 'latency_seconds_bucket{route="/a",le="0.1"} 2' in lines
+        assert 'latency_seconds_bucket{route="/a",le="1"} 3' in lines
+        assert 'latency_seconds_bucket{route="/a",le="+Inf"} 4' in lines
+        assert 'latency_seconds_sum{route="/a"} 5.65' in lines
+        assert 'latency_seconds_count{route="/a"} 4' in lines
+        assert histogram.count(("/a",)) == 4
+
+    def test_counter(self) -> None:
+        counter = Counter("requests_total", "Requests.", ("status",))
+        counter.inc(("200",))
+        counter.inc(("200",))
+
+        assert 'requests_total{status="200"} 2' in list(counter.collect())
+
+
+class TestMetricsMiddleware:
+    @pytest.mark.asyncio
+    async def test_records_route_template_and_status(self) -> None:
+        app = FastAPI()
+        app.add_middleware(MetricsMiddleware)
+
+        @app.get("/items/{item_id}")
+        async def get_item(item_id: str) -> dict[str, str]:
+            return {"item_id": item_id}
+
+        labels = ("GET", "/items/{item_id}", "200")
+        before = http_requests.value(labels)
+
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+            await client.get("/items/1")
+            await client.get("/items/2")
+            response = await client.get("/missing")
+
+        assert response.status_code == 404
+        assert http_requests.value(labels) == before + 2
+        assert http_requests.value(("GET", "<unmatched>", "404")) >= 1
+
+
+class TestMetricsEndpoint:
+    @pytest.mark.asyncio
+    async def test_renders_prometheus_text(self) -> None:
+        response = await get_metrics()
+        body = bytes(response.body).decode()
+
+        assert response.media_type.startswith("text/plain; version=0.0.4")
+        assert "# TYPE http_request_duration_seconds histogram" in body
+        assert "# TYPE url_cache_hits_total counter" in body
+
+    def test_statement_operation(self) -> None:
+        assert get_statement_operation("\n  select * from urls") == "SELECT"
+        assert get_statement_operation("") == "UNKNOWN"
@@ -0,0 +1,129 @@
+from datetime import UTC, datetime, timedelta
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+from sqlalchemy.dialects import postgresql
+
+from app.crud import create_db_url, create_db_urls, lookup_db_url, maintain_db_url_partitions, release_db_url_partition
+from app.enums import ExpirationOption, RedirectStatus
+from app.utils import add_months, get_month_start, get_url_partition_name, parse_url_partition_name
+
+
+class TestPartitionNames:
+    def test_add_months_crosses_years(self) -> None:
+        assert add_months(datetime(2026, 11, 1, tzinfo=UTC), 3) == datetime(2027, 2, 1, tzinfo=UTC)
+        assert add_months(datetime(2026, 1, 1, tzinfo=UTC), -1) == datetime(2025, 12, 1, tzinfo=UTC)
+
+    def test_month_start(self) -> None:
+        assert get_month_start(datetime(2026, 10, 18, 16, 30, tzinfo=UTC)) == datetime(2026, 10, 1, tzinfo=UTC)
+
+    def test_round_trip(self) -> None:
+        month_start = datetime(2026, 10, 1, tzinfo=UTC)
+
+        assert get_url_partition_name(month_start) == "urls_p202610"
+        assert parse_url_partition_name("urls_p202610") == month_start
+        assert parse_url_partition_name("urls_archive") is None
+
+
+class TestMaintainDbUrlPartitions:
+    @pytest.mark.asyncio
+    async def test_creates_future_and_releases_past(self, mock_db_session: AsyncMock) -> None:
+        mock_db_session.scalar.return_value = True
+        current_month = get_month_start(datetime.now(UTC))
+        existing = {
+            get_url_partition_name(add_months(current_month, offset)): add_months(current_month, offset)
+            for offset in (-2, -1, 0)
+        }
+
+        with (
+            patch("app.crud.get_db_url_partitions", new_callable=AsyncMock, return_value=existing),
+            patch(
+                "app.crud.create_db_url_partition",
+                new_callable=AsyncMock,
+                side_effect=lambda month_start, db: get_url_partition_name(month_start),
+            ),
+            patch("app.crud.release_db_url_partition", new_callable=AsyncMock, side_effect=[False, True]) as release,
+        ):
+            result = await maintain_db_url_partitions(2, timedelta(days=30), True, 1, mock_db_session)
+
+        assert result is not None
+        created, released = result
+        assert created == [get_url_partition_name(add_months(current_month, offset)) for offset in (1, 2)]
+        assert released == [get_url_partition_name(add_months(current_month, -1))]
+        # The current month is never a candidate for release.
+        assert [call.args[0] for call in release.call_args_list] == list(existing)[:2]
+        mock_db_session.commit.assert_called_once()
+
+    @pytest.mark.asyncio
+    async def test_skips_when_locked(self, mock_db_session: AsyncMock) -> None:
+        mock_db_session.scalar.return_value = False
+
+        assert await maintain_db_url_partitions(2, timedelta(days=30), True, 1, mock_db_session) is None
+        mock_db_session.rollback.assert_called_once()
+
+
+class TestReleaseDbUrlPartition:
+    @staticmethod
+    def statements(mock_db_session: AsyncMock) -> list[str]:
+        return [str(call.args[0]) for call in mock_db_session.execute.call_args_list]
+
+    @pytest.mark.asyncio
+    async def test_detach_keeps_codes_reserved(self, mock_db_session: AsyncMock) -> None:
+        mock_db_session.scalar.return_value = False
+
+        assert await release_db_url_partition("urls_p202601", timedelta(days=30), False, mock_db_session)
+
+        assert self.statements(mock_db_session) == ["ALTER TABLE urls DETACH PARTITION urls_p202601"]
+
+    @pytest.mark.asyncio
+    async def test_drop_frees_codes_and_their_history(self, mock_db_session: AsyncMock) -> None:
+        mock_db_session.scalar.return_value = False
+
+        assert await release_db_url_partition("urls_p202601", timedelta(days=30), True, mock_db_session)
+
+        statements = self.statements(mock_db_session)
+        deleted = [statement.split()[2] for statement in statements if statement.startswith("DELETE")]
+        assert deleted == ["url_codes", "click_rollups_hourly", "click_rollups_daily", "visitor_sketches"]
+        assert statements[-2:] == ["ALTER TABLE urls DETACH PARTITION urls_p202601", "DROP TABLE urls_p202601"]
+
+    @pytest.mark.asyncio
+    async def test_keeps_partition_with_live_links(self, mock_db_session: AsyncMock) -> None:
+        mock_db_session.scalar.return_value = True
+
+        assert not await release_db_url_partition("urls_p202601", timedelta(days=30), True, mock_db_session)
+
+        mock_db_session.execute.assert_not_called()
+
+
+class TestCreateDbUrls:
+    @pytest.mark.asyncio
+    async def test_skips_insert_when_no_code_claimed(self, mock_db_session: AsyncMock) -> None:
+        mock_db_session.scalars.return_value = iter([])
+
+        result = await create_db_urls(
+            [("abc123", "https://example.com", ExpirationOption.indefinite, False, RedirectStatus.temporary_redirect)],
+            mock_db_session,
+        )
+
+        assert result == {}
+        mock_db_session.execute.assert_not_called()
+
+
+class TestClaimedUrlLookups:
+    @pytest.mark.asyncio
+    async def test_lookup_matches_claimed_created_at(self, mock_db_session: AsyncMock) -> None:
+        mock_db_session.execute.return_value = MagicMock(first=MagicMock(return_value=None))
+
+        with patch("app.crud.settings.db_fast_path_enabled", False):
+            assert await lookup_db_url("abc123", mock_db_session) is None
+
+        stmt = mock_db_session.execute.call_args.args[0]
+        sql = str(stmt.compile(dialect=postgresql.dialect()))
+        assert "urls.created_at = (SELECT url_codes.created_at" in sql
+
+    @pytest.mark.asyncio
+    async def test_create_claims_code_with_link_created_at(self, mock_db_session: AsyncMock) -> None:
+        new_url = await create_db_url("abc123", "https://example.com", ExpirationOption.indefinite, mock_db_session)
+
+        claim = mock_db_session.execute.call_args.args[0].compile().params
+        assert claim == {"short_url": "abc123", "created_at": new_url.created_at}
@@ -0,0 +1,122 @@
+import asyncio
+from unittest.mock import MagicMock, patch
+
+import pytest
+from fastapi import HTTPException
+
+from app.config import RateLimitRule
+from app.ratelimit import ConcurrencyLimiter, ConcurrencyLimitExceededError, RouteRateLimiter, TokenBucketLimiter
+from app.routers.urls import acquire_write_slot, rate_limited
+from tests.conftest import FakeClock
+
+
+def make_request(host: str) -> MagicMock:
+    request = MagicMock()
+    request.client.host = host
+    return request
+
+
+class TestTokenBucketLimiter:
+    def test_burst_then_refill(self, clock: FakeClock) -> None:
+        limiter = TokenBucketLimiter(rate=2, burst=3, max_keys=10, clock=clock)
+
+        assert [limiter.acquire("a") for _ in range(3)] == [0, 0, 0]
+        assert limiter.acquire("a") == pytest.approx(0.5)
+
+        clock.now = 0.5
+        assert limiter.acquire("a") == 0
+        assert limiter.acquire("b") == 0
+
+    def test_idle_buckets_are_evicted(self, clock: FakeClock) -> None:
+        limiter = TokenBucketLimiter(rate=1, burst=5, max_keys=10, clock=clock)
+        limiter.acquire("a")
+        clock.now = 3
+        limiter.acquire("b")
+
+        clock.now = 5
+        limiter.acquire("c")
+
+        assert len(limiter) == 2
+
+    def test_least_recently_used_bucket_is_dropped_at_max_keys(self, clock: FakeClock) -> None:
+        limiter = TokenBucketLimiter(rate=1, burst=1, max_keys=2, clock=clock)
+        limiter.acquire("a")
+        limiter.acquire("b")
+        limiter.acquire("a")
+
+        limiter.acquire("c")
+
+        assert limiter.acquire("a") > 0
+        assert limiter.acquire("b") == 0
+
+
+class TestRouteRateLimiter:
+    def test_global_bucket_is_shared_by_clients(self, clock: FakeClock) -> None:
+        rule = RateLimitRule(client_rate=1, client_burst=2, global_rate=1, global_burst=3)
+        limiter = RouteRateLimiter(rule, max_clients=10, clock=clock)
+
+        assert [limiter.acquire(client) for client in ("a", "a", "b")] == [0, 0, 0]
+        assert limiter.acquire("a") > 0
+        assert limiter.acquire("c") > 0
+
+    def test_zero_rate_disables_bucket(self) -> None:
+        rule = RateLimitRule(client_rate=0, client_burst=0, global_rate=0, global_burst=0)
+        limiter = RouteRateLimiter(rule, max_clients=10)
+
+        assert all(limiter.acquire("a") == 0 for _ in range(100))
+
+    def test_dependency_raises_too_many_requests(self) -> None:
+        rule = RateLimitRule(client_rate=0.4, client_burst=1, global_rate=0, global_burst=0)
+
+        with patch("app.ratelimit.settings.rate_limits", {"POST /test": rule}):
+            check_rate_limit = rate_limited("POST /test")
+
+        check_rate_limit(make_request("10.0.0.1"))
+        check_rate_limit(make_request("10.0.0.2"))
+        with pytest.raises(HTTPException) as exc_info:
+            check_rate_limit(make_request("10.0.0.1"))
+
+        assert exc_info.value.status_code == 429
+        assert exc_info.value.headers == {"Retry-After": "3"}
+
+
+class TestConcurrencyLimiter:
+    @pytest.mark.asyncio
+    async def test_excess_requests_are_shed(self) -> None:
+        limiter = ConcurrencyLimiter(max_concurrent=1, max_wait=0.01)
+
+        async with limiter.slot():
+            with pytest.raises(ConcurrencyLimitExceededError):
+                async with limiter.slot():
+                    pass
+
+        async with limiter.slot():
+            pass
+
+    @pytest.mark.asyncio
+    async def test_waiters_get_freed_slots(self) -> None:
+        limiter = ConcurrencyLimiter(max_concurrent=1, max_wait=1)
+        order: list[int] = []
+
+        async def hold(index: int) -> None:
+            async with limiter.slot():
+                order.append(index)
+                await asyncio.sleep(0.01)
+
+        await asyncio.gather(hold(0), hold(1))
+
+        assert order == [0, 1]
+
+    @pytest.mark.asyncio
+    async def test_dependency_raises_service_unavailable(self) -> None:
+        limiter = ConcurrencyLimiter(max_concurrent=1, max_wait=0)
+
+        with patch("app.routers.urls.write_limiter", limiter):
+            held = acquire_write_slot()
+            await anext(held)
+
+            with pytest.raises(HTTPException) as exc_info:
+                await anext(acquire_write_slot())
+
+        assert exc_info.value.status_code == 503
+        await held.aclose()
@@ -0,0 +1,44 @@
+import json
+from datetime import UTC, datetime
+
+import pytest
+from pydantic import HttpUrl
+
+from app.models import URL
+from app.schemas import URLResponse
+from app.serialization import FastJSONResponse, dumps, url_response_row
+
+
+@pytest.fixture
+def db_url() -> URL:
+    # Stored URLs are already normalized by HttpUrl, including the trailing slash.
+    return URL(
+        original_url="https://example.com/",
+        short_url="abc123",
+        is_active=True,
+        expires_at=datetime(2030, 1, 1, 12, 30, 15, 123456, tzinfo=UTC),
+    )
+
+
+class TestSerialization:
+    def test_matches_pydantic_output(self, db_url: URL) -> None:
+        expected = URLResponse(
+            original_url=HttpUrl(db_url.original_url),
+            short_url=db_url.short_url,
+            is_active=db_url.is_active,
+            expires_at=db_url.expires_at,
+        ).model_dump_json()
+
+        body = dumps(url_response_row(db_url))
+
+        assert json.loads(body) == json.loads(expected)
+
+    def test_rejects_unknown_types(self) -> None:
+        with pytest.raises(TypeError):
+            dumps({"value": object()})
+
+    def test_response(self) -> None:
+        response = FastJSONResponse({"short_url": "abc123", "expires_at": None})
+
+        assert response.media_type == "application/json"
+        assert json.loads(bytes(response.body)) == {"short_url": "abc123", "expires_at": None}
@@ -0,0 +1,324 @@
+import asyncio
+from collections.abc import AsyncIterator, Awaitable, Callable
+from contextlib import aclosing
+from datetime import UTC, datetime, timedelta
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+import pytest_asyncio
+from redis.exceptions import RedisError
+
+from app.cache import MISSING_URL, CachedURL, URLCache
+from app.constants import SHARED_CACHE_TOMBSTONE
+from app.routers.redirects import get_redirect_url_or_404
+from app.shared_cache import (
+    InMemorySharedCacheBackend,
+    RedisSharedCacheBackend,
+    SharedCacheBackend,
+    TwoLevelURLCache,
+    decode_cached_url,
+    encode_cached_url,
+)
+from tests.conftest import FakeClock
+
+CACHED_URL = CachedURL("https://example.com/", None, True)
+
+
+def make_worker(backend: SharedCacheBackend | None) -> TwoLevelURLCache:
+    return TwoLevelURLCache(URLCache(max_size=100, ttl=60, negative_ttl=5), backend, ttl=60, retry_interval=5)
+
+
+def slow_loader(result: CachedURL | None, calls: list[None]) -> Callable[[], Awaitable[CachedURL | None]]:
+    async def load() -> CachedURL | None:
+        calls.append(None)
+        await asyncio.sleep(0.01)
+        return result
+
+    return load
+
+
+def bulk(value: bytes) -> bytes:
+    return b"$%d\r\n%s\r\n" % (len(value), value)
+
+
+class StandInRedis:
+    # Just enough of RESP3 for the cache backend and the client's connection setup.
+    def __init__(self) -> None:
+        self.store: dict[bytes, bytes] = {}
+        self.subscribers: list[asyncio.StreamWriter] = []
+
+    @staticmethod
+    async def read_command(reader: asyncio.StreamReader) -> list[bytes]:
+        # Requests are arrays of bulk strings: *<count>, then $<length> and the bytes of each argument.
+        count = int((await reader.readuntil(b"\r\n"))[1:-2])
+        command = []
+        for _ in range(count):
+            length = int((await reader.readuntil(b"\r\n"))[1:-2])
+            command.append((await reader.readexactly(length + 2))[:-2])
+        return command
+
+    def reply(self, name: bytes, args: list[bytes], writer: asyncio.StreamWriter) -> bytes:
+        match name:
+            case b"HELLO":
+                response = b"%1\r\n+proto\r\n:3\r\n"
+            case b"CLIENT":
+                response = b"+OK\r\n"
+            case b"SET" if b"NX" in (arg.upper() for arg in args[2:]) and args[0] in self.store:
+                response = b"_\r\n"
+            case b"SET":
+                self.store[args[0]] = args[1]
+                response = b"+OK\r\n"
+            case b"GET":
+                value = self.store.get(args[0])
+                response = b"_\r\n" if value is None else bulk(value)
+            case b"SUBSCRIBE":
+                self.subscribers.append(writer)
+                response = b">3\r\n" + bulk(b"subscribe") + bulk(args[0]) + b":1\r\n"
+            case b"PUBLISH":
+                for subscriber in self.subscribers:
+                    subscriber.write(b">3\r\n" + b"".join(bulk(part) for part in (b"message", *args)))
+                response = b":%d\r\n" % len(self.subscribers)
+            case _:
+                response = b"-ERR unknown command\r\n"
+
+        return response
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        while True:
+            try:
+                name, *args = await self.read_command(reader)
+            except asyncio.IncompleteReadError:
+                break
+            writer.write(self.reply(name.upper(), args, writer))
+            await writer.drain()
+        writer.close()
+
+
+@pytest_asyncio.fixture
+async def stand_in_backend() -> AsyncIterator[tuple[RedisSharedCacheBackend, StandInRedis]]:
+    stand_in = StandInRedis()
+    server = await asyncio.start_server(stand_in.handle, "127.0.0.1", 0)
+    port = server.sockets[0].getsockname()[1]
+    backend = RedisSharedCacheBackend(f"redis://127.0.0.1:{port}", pool_size=2, timeout=1)
+    try:
+        yield backend, stand_in
+    finally:
+        await backend.close()
+        server.close()
+        await server.wait_closed()
+
+
+class TestRedisSharedCacheBackend:
+    @pytest.mark.asyncio
+    async def test_commands(self, stand_in_backend: tuple[RedisSharedCacheBackend, StandInRedis]) -> None:
+        backend, _ = stand_in_backend
+
+        await backend.set("url:abc", b"value", 60)
+        assert await backend.get("url:abc") == b"value"
+        await backend.set_many(["url:abc", "url:def"], SHARED_CACHE_TOMBSTONE, 5)
+        assert await backend.get("url:abc") == SHARED_CACHE_TOMBSTONE
+        await backend.set("url:abc", b"stale", 60, only_if_missing=True)
+        assert await backend.get("url:abc") == SHARED_CACHE_TOMBSTONE
+        assert await backend.get("url:xyz") is None
+        with pytest.raises(RedisError):
+            await backend.client.execute_command("FLUSHALL")
+
+    @pytest.mark.asyncio
+    async def test_subscribe(self, stand_in_backend: tuple[RedisSharedCacheBackend, StandInRedis]) -> None:
+        backend, stand_in = stand_in_backend
+
+        async with aclosing(backend.subscribe("invalidations")) as messages:
+            received = asyncio.ensure_future(anext(messages))
+            while not stand_in.subscribers:
+                await asyncio.sleep(0.01)
+            await backend.publish("invalidations", b"origin abc")
+
+            assert await asyncio.wait_for(received, 1) == b"origin abc"
+
+
+class TestTwoLevelURLCache:
+    def test_encoding_round_trip(self) -> None:
+        cached_url = CachedURL("https://example.com/", datetime(2030, 1, 1, tzinfo=UTC), True)
+
+        assert decode_cached_url(encode_cached_url(cached_url)) == cached_url
+        assert decode_cached_url(encode_cached_url(MISSING_URL)) == MISSING_URL
+        # Entries written before the redirect status was cached.
+        assert decode_cached_url(b'["https://example.com/", null, true]') == CACHED_URL._replace(redirect_status=307)
+
+    @pytest.mark.asyncio
+    async def test_second_worker_hits_shared_tier(self) -> None:
+        backend = InMemorySharedCacheBackend()
+        first, second = make_worker(backend), make_worker(backend)
+        calls: list[None] = []
+
+        assert await first.get_or_load("abc", slow_loader(CACHED_URL, calls)) == CACHED_URL
+        assert await second.get_or_load("abc", slow_loader(CACHED_URL, calls)) == CACHED_URL
+
+        assert len(calls) == 1
+        assert second.shared_hits == 1
+        assert second.local.get("abc") == CACHED_URL
+
+    @pytest.mark.asyncio
+    async def test_concurrent_misses_load_once(self) -> None:
+        worker = make_worker(None)
+        calls: list[None] = []
+
+        results = await asyncio.gather(*(worker.get_or_load("abc", slow_loader(None, calls)) for _ in range(10)))
+
+        assert results == [None] * 10
+        assert len(calls) == 1
+        assert worker.coalesced == 9
+        assert worker.local.get("abc") == MISSING_URL
+
+    @pytest.mark.asyncio
+    async def test_waiters_reload_when_loader_is_cancelled(self) -> None:
+        worker = make_worker(None)
+        calls: list[None] = []
+
+        leader = asyncio.create_task(worker.coalesce("abc", slow_loader(CACHED_URL, calls)))
+        await asyncio.sleep(0)
+        follower = asyncio.create_task(worker.coalesce("abc", slow_loader(CACHED_URL, calls)))
+        await asyncio.sleep(0)
+        leader.cancel()
+
+        assert await follower == (CACHED_URL, True)
+        assert len(calls) == 2
+
+    @pytest.mark.asyncio
+    async def test_invalidation_is_broadcast(self) -> None:
+        backend = InMemorySharedCacheBackend()
+        first, second = make_worker(backend), make_worker(backend)
+        await first.set("abc", CACHED_URL)
+        assert await second.get("abc") == CACHED_URL
+
+        listener = asyncio.create_task(second.listen())
+        await asyncio.sleep(0)
+        await first.invalidate(["abc"])
+        await asyncio.sleep(0)
+        listener.cancel()
+
+        assert second.local.get("abc") is None
+        assert await backend.get("url:abc") == SHARED_CACHE_TOMBSTONE
+        assert await second.get("abc") is None
+
+    @pytest.mark.asyncio
+    async def test_undelivered_invalidation_is_resent(self, clock: FakeClock) -> None:
+        backend = InMemorySharedCacheBackend()
+        first = TwoLevelURLCache(URLCache(100, 60, 5), backend, ttl=60, retry_interval=5, clock=clock)
+        second = make_worker(backend)
+        await first.set("abc", CACHED_URL)
+        await first.set("def", CACHED_URL)
+        assert await second.get("abc") == CACHED_URL
+        listener = asyncio.create_task(second.listen())
+        await asyncio.sleep(0)
+
+        # The link was deactivated, but the shared cache timed out.
+        with patch.object(backend, "set_many", side_effect=TimeoutError):
+            await first.invalidate(["abc"])
+
+        assert first.local.get("def") is None
+        assert second.local.get("abc") == CACHED_URL
+
+        clock.now = 5
+        await first.resend_invalidations()
+        await asyncio.sleep(0)
+        listener.cancel()
+
+        assert second.local.get("abc") is None
+        assert await backend.get("url:abc") == SHARED_CACHE_TOMBSTONE
+
+    @pytest.mark.asyncio
+    async def test_too_many_undelivered_invalidations_clear_everything(self, clock: FakeClock) -> None:
+        backend = InMemorySharedCacheBackend()
+        first = TwoLevelURLCache(URLCache(100, 60, 5), backend, ttl=60, retry_interval=5, clock=clock)
+        second = make_worker(backend)
+        second.local.set("abc", CACHED_URL)
+        listener = asyncio.create_task(second.listen())
+        await asyncio.sleep(0)
+
+        with (
+            patch("app.shared_cache.SHARED_CACHE_MAX_UNSENT_INVALIDATIONS", 1),
+            patch.object(backend, "publish", side_effect=ConnectionError),
+        ):
+            await first.invalidate(["def", "ghi"])
+
+        clock.now = 5
+        await first.resend_invalidations()
+        await asyncio.sleep(0)
+        listener.cancel()
+
+        assert second.local.get("abc") is None
+
+    @pytest.mark.asyncio
+    async def test_fill_after_invalidation_is_dropped(self) -> None:
+        backend = InMemorySharedCacheBackend()
+        first, second = make_worker(backend), make_worker(backend)
+
+        # The second worker read the old value just before the first one changed the link.
+        await first.invalidate(["abc"])
+        await second.set("abc", CACHED_URL)
+
+        assert await backend.get("url:abc") == SHARED_CACHE_TOMBSTONE
+        assert await first.get("abc") is None
+
+    @pytest.mark.asyncio
+    async def test_load_invalidated_midway_is_not_cached(self) -> None:
+        backend = InMemorySharedCacheBackend()
+        worker = make_worker(backend)
+
+        async def load() -> CachedURL | None:
+            await asyncio.sleep(0)
+            worker.apply_invalidation(b"other-worker abc")
+            return CACHED_URL
+
+        assert await worker.get_or_load("abc", load) == CACHED_URL
+
+        assert worker.local.get("abc") is None
+        assert await backend.get("url:abc") is None
+
+        calls: list[None] = []
+        assert await worker.get_or_load("abc", slow_loader(CACHED_URL, calls)) == CACHED_URL
+        assert worker.local.get("abc") == CACHED_URL
+
+    @pytest.mark.asyncio
+    async def test_unavailable_backend_is_skipped(self) -> None:
+        backend = MagicMock()
+        backend.get = AsyncMock(side_effect=ConnectionRefusedError)
+        worker = make_worker(backend)
+
+        assert await worker.get("abc") is None
+        assert await worker.get("abc") is None
+
+        backend.get.assert_awaited_once()
+        assert worker.shared_errors == 1
+
+    @pytest.mark.asyncio
+    async def test_shared_entry_expires_with_link(self) -> None:
+        backend = InMemorySharedCacheBackend()
+        worker = make_worker(backend)
+
+        await worker.set("abc", CACHED_URL._replace(expires_at=datetime.now(UTC) - timedelta(seconds=1)))
+
+        assert await backend.get("url:abc") is None
+
+
+class TestCoalescedRedirects:
+    @pytest.mark.asyncio
+    async def test_concurrent_misses_share_one_update(self, mock_db_session: AsyncMock) -> None:
+        worker = make_worker(None)
+        calls: list[None] = []
+
+        async def redirect_db_url(short_url: str, db: object) -> CachedURL | None:
+            return await slow_loader(CACHED_URL, calls)()
+
+        with (
+            patch("app.routers.redirects.shared_url_cache", worker),
+            patch("app.routers.redirects.redirect_db_url", redirect_db_url),
+            patch("app.routers.redirects.click_aggregator") as mock_aggregator,
+        ):
+            results = await asyncio.gather(*(get_redirect_url_or_404("abc", mock_db_session) for _ in range(5)))
+
+        assert results == [CACHED_URL] * 5
+        assert len(calls) == 1
+        # The update counted the first click; the others go through the aggregator.
+        assert mock_aggregator.record.call_count == 4
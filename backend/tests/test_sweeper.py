@@ -0,0 +1,30 @@
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+
+from app.sweeper import sweep_expired_urls
+
+
+class TestSweepExpiredUrls:
+    @pytest.mark.asyncio
+    async def test_sweeps_until_partial_batch(self) -> None:
+        batches = [["a", "b"], ["c", "d"], ["e"]]
+
+        with (
+            patch("app.sweeper.settings.sweeper_batch_size", 2),
+            patch("app.sweeper.async_session_maker", MagicMock()),
+            patch("app.sweeper.deactivate_expired_db_urls", new_callable=AsyncMock, side_effect=batches) as mock_sweep,
+        ):
+            assert await sweep_expired_urls() == 5
+
+        assert mock_sweep.call_count == 3
+
+    @pytest.mark.asyncio
+    async def test_stops_when_lock_is_held(self) -> None:
+        with (
+            patch("app.sweeper.async_session_maker", MagicMock()),
+            patch("app.sweeper.deactivate_expired_db_urls", new_callable=AsyncMock, return_value=None) as mock_sweep,
+        ):
+            assert await sweep_expired_urls() == 0
+
+        mock_sweep.assert_called_once()
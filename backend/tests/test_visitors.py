@@ -0,0 +1,162 @@
+import random
+from datetime import timedelta
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+
+from app.constants import VISITOR_SKETCH_ROLLUP_BUCKET
+from app.crud import roll_up_db_visitor_sketches
+from app.hll import HyperLogLog
+from app.visitors import VisitorSketchAggregator, roll_up_visitor_sketches
+
+
+def make_sketch(visitors: range, precision: int = 12) -> HyperLogLog:
+    sketch = HyperLogLog(precision)
+    for visitor in visitors:
+        sketch.add(f"visitor-{visitor}")
+    return sketch
+
+
+class TestHyperLogLog:
+    @pytest.mark.parametrize("count", [0, 10, 1_000, 50_000])
+    def test_estimate_within_error_bound(self, count: int) -> None:
+        sketch = make_sketch(range(count))
+
+        # Three standard errors; small cardinalities are counted almost exactly by linear counting.
+        assert abs(sketch.estimate() - count) <= max(3 * sketch.relative_error * count, 1)
+
+    @pytest.mark.parametrize("precision", [4, 5, 6, 7])
+    def test_low_precision_estimate_is_unbiased(self, precision: int) -> None:
+        # One small sketch is too noisy to check, so average many independent ones, past the linear counting range.
+        count, trials = 1_000, 200
+        estimates = [
+            make_sketch(range(trial * count, (trial + 1) * count), precision).estimate() for trial in range(trials)
+        ]
+
+        relative_error = HyperLogLog(precision).relative_error
+        assert abs(sum(estimates) / trials - count) <= 3 * relative_error / trials**0.5 * count
+
+    @pytest.mark.parametrize(("precision", "alpha"), [(4, 0.673), (5, 0.697), (6, 0.709)])
+    def test_small_sketches_use_paper_alpha(self, precision: int, alpha: float) -> None:
+        # With every register at 10, the raw estimate is alpha * m * 2**10.
+        size = 1 << precision
+        sketch = HyperLogLog(precision, bytes([10] * size))
+
+        assert sketch.estimate() == round(alpha * size * 2**10)
+
+    def test_duplicates_do_not_increase_estimate(self) -> None:
+        sketch = make_sketch(range(1_000))
+        estimate = sketch.estimate()
+
+        for visitor in random.Random(0).choices(range(1_000), k=5_000):
+            sketch.add(f"visitor-{visitor}")
+
+        assert sketch.estimate() == estimate
+
+    def test_merge_matches_union(self) -> None:
+        merged = make_sketch(range(0, 20_000))
+        merged.merge(make_sketch(range(10_000, 30_000)))
+
+        assert merged.to_bytes() == make_sketch(range(30_000)).to_bytes()
+        assert abs(merged.estimate() - 30_000) <= 3 * merged.relative_error * 30_000
+
+    def test_round_trip_bytes(self) -> None:
+        sketch = make_sketch(range(100), precision=10)
+        restored = HyperLogLog.from_bytes(sketch.to_bytes())
+
+        assert len(sketch.to_bytes()) == 1024
+        assert restored.precision == 10
+        assert restored.estimate() == sketch.estimate()
+
+    def test_merge_rejects_other_precision(self) -> None:
+        with pytest.raises(ValueError):
+            HyperLogLog(12).merge(HyperLogLog(10))
+
+    def test_invalid_registers(self) -> None:
+        with pytest.raises(ValueError):
+            HyperLogLog.from_bytes(bytes(1000))
+
+
+class TestVisitorSketchAggregator:
+    @pytest.mark.asyncio
+    async def test_flush_merges_sketches(self) -> None:
+        aggregator = VisitorSketchAggregator(MagicMock(), precision=10, max_pending=100)
+        for visitor in ["a", "b", "a"]:
+            aggregator.record("abc123", visitor)
+        aggregator.record("def456", "a")
+
+        with patch("app.visitors.merge_db_visitor_sketches", new_callable=AsyncMock) as mock_merge:
+            assert await aggregator.flush() == 2
+
+        sketches = mock_merge.call_args.args[0]
+        assert sorted(short_url for short_url, _ in sketches) == ["abc123", "def456"]
+        assert [sketch.estimate() for sketch in sketches.values()] == [2, 1]
+        assert aggregator.pending == 0
+
+    @pytest.mark.asyncio
+    async def test_failed_flush_keeps_visitors(self) -> None:
+        aggregator = VisitorSketchAggregator(MagicMock(), precision=10, max_pending=100)
+        aggregator.record("abc123", "a")
+
+        with (
+            patch(
+                "app.visitors.merge_db_visitor_sketches", new_callable=AsyncMock, side_effect=RuntimeError("db down")
+            ),
+            pytest.raises(RuntimeError),
+        ):
+            await aggregator.flush()
+
+        aggregator.record("abc123", "b")
+        with patch("app.visitors.merge_db_visitor_sketches", new_callable=AsyncMock) as mock_merge:
+            await aggregator.flush()
+
+        (sketch,) = mock_merge.call_args.args[0].values()
+        assert sketch.estimate() == 2
+
+
+class TestRollUpVisitorSketches:
+    @pytest.mark.asyncio
+    async def test_merges_expired_days_into_rollup(self, mock_db_session: AsyncMock) -> None:
+        mock_db_session.scalar.return_value = True
+        mock_db_session.execute.return_value = [
+            SimpleNamespace(short_url="abc123", registers=make_sketch(range(0, 100), precision=10).to_bytes()),
+            SimpleNamespace(short_url="abc123", registers=make_sketch(range(50, 150), precision=10).to_bytes()),
+            SimpleNamespace(short_url="def456", registers=make_sketch(range(10), precision=10).to_bytes()),
+        ]
+
+        with patch("app.crud.merge_db_visitor_sketches", new_callable=AsyncMock) as mock_merge:
+            assert await roll_up_db_visitor_sketches(timedelta(days=30), 100, 1, mock_db_session) == 2
+
+        rollups = mock_merge.call_args.args[0]
+        assert set(rollups) == {("abc123", VISITOR_SKETCH_ROLLUP_BUCKET), ("def456", VISITOR_SKETCH_ROLLUP_BUCKET)}
+        assert rollups["abc123", VISITOR_SKETCH_ROLLUP_BUCKET].to_bytes() == make_sketch(range(150), 10).to_bytes()
+
+    @pytest.mark.asyncio
+    async def test_nothing_to_roll_up(self, mock_db_session: AsyncMock) -> None:
+        mock_db_session.scalar.return_value = True
+        mock_db_session.execute.return_value = []
+
+        with patch("app.crud.merge_db_visitor_sketches", new_callable=AsyncMock) as mock_merge:
+            assert await roll_up_db_visitor_sketches(timedelta(days=30), 100, 1, mock_db_session) == 0
+
+        mock_merge.assert_not_called()
+        mock_db_session.rollback.assert_called_once()
+
+    @pytest.mark.asyncio
+    async def test_skips_when_locked(self, mock_db_session: AsyncMock) -> None:
+        mock_db_session.scalar.return_value = False
+
+        assert await roll_up_db_visitor_sketches(timedelta(days=30), 100, 1, mock_db_session) is None
+        mock_db_session.execute.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_runs_batches_until_done(self) -> None:
+        with (
+            patch("app.visitors.async_session_maker"),
+            patch("app.visitors.settings.unique_visitors_rollup_batch_size", 2),
+            patch("app.visitors.roll_up_db_visitor_sketches", new_callable=AsyncMock, side_effect=[2, 2, 1]) as roll_up,
+        ):
+            assert await roll_up_visitor_sketches() == 5
+
+        assert roll_up.call_count == 3
@@ -18,6 +18,8 @@ export interface URLStats {
   expires_at: string | null
   is_active: boolean
   click_count: number
+  unique_visitors_estimate: number
+  unique_visitors_relative_error: number
 }
 
 export interface URLListResponse {
@@ -26,4 +28,5 @@ export interface URLListResponse {
   page: number
   page_size: number
   total_pages: number
+  next_cursor: string | null
 }